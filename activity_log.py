@@ -0,0 +1,267 @@
+import bisect
+import json
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime
+
+from journal import write_atomic
+from salary_log import RecordCache
+from temporal import format_datetime, parse_timestamp, to_timestamp
+
+
+# Dòng lịch sử kiểu cũ: "YYYY-MM-DD HH:MM:SS - nội dung"
+LEGACY_ENTRY = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - (.*)$", re.S)
+
+
+def make_record(message, action="", entity_id=None, actor="", moment=None):
+    # moment: datetime hoặc số giây; mặc định là bây giờ
+    if moment is None:
+        moment = datetime.now()
+    return {
+        "ts": moment if isinstance(moment, int) else to_timestamp(moment),
+        "actor": actor,
+        "action": action,
+        "entity": entity_id,
+        "message": message
+    }
+
+
+def format_record(record):
+    return f"{format_datetime(record['ts'])} - {record['message']}"
+
+
+def parse_legacy(entry):
+    match = LEGACY_ENTRY.match(entry)
+    if match is None:
+        return make_record(entry, "legacy", moment=0)
+    return make_record(match.group(2), "legacy", moment=parse_timestamp(match.group(1)))
+
+
+class ActivityLog:
+    # Lịch sử hoạt động có cấu trúc (thời điểm, người thực hiện, hành động, mã đối tượng,
+    # nội dung), chỉ ghi thêm vào các đoạn JSONL trong một thư mục riêng:
+    # - Đoạn đang ghi vượt segment_bytes thì được đóng lại; mỗi đoạn đã đóng có tệp .idx
+    #   (thời điểm + vị trí byte từng dòng) và một dòng tóm tắt trong segments.json
+    #   (số bản ghi, thời điểm đầu/cuối) để lọc theo khoảng thời gian mà không đọc đoạn.
+    # - Quá max_segments đoạn thì xóa đoạn cũ nhất; vị trí toàn cục của bản ghi không đổi.
+    # - Trong bộ nhớ chỉ có `recent` bản ghi mới nhất; bản ghi cũ hơn đọc theo trang.
+    # add() chạy trên luồng giao diện (bản ghi dùng được ngay), write_pending() trên luồng
+    # ghi nền; read()/positions() thấy cả các bản ghi chưa kịp ghi.
+    # read_only=True (lệnh chỉ đọc): không tạo thư mục, không sửa hay bổ sung tệp nào.
+    def __init__(self, directory, segment_bytes=1024 * 1024, recent=1000, max_segments=None, read_only=False):
+        self.directory = directory
+        self.read_only = read_only
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.manifest_path = os.path.join(directory, "segments.json")
+        self._lock = threading.Lock()
+        self._base = 0          # số bản ghi thuộc các đoạn đã xóa
+        self._segments = []     # [số đoạn, số bản ghi, thời điểm đầu, thời điểm cuối] của đoạn đã đóng
+        self._starts = []       # vị trí toàn cục của bản ghi đầu tiên mỗi đoạn đã đóng
+        self._indexes = RecordCache(capacity=8)
+        self._current = 1
+        self._current_start = 0
+        self._times = []
+        self._offsets = []
+        self._size = 0
+        self._file = None
+        self._pending = []
+        self._written = 0
+        self._recent = deque(maxlen=recent)
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self):
+        with self._lock:
+            return self._written + len(self._pending)
+
+    def first_position(self):
+        # Vị trí nhỏ nhất còn đọc được (các đoạn cũ có thể đã bị xóa)
+        return self._base
+
+    def recent(self):
+        with self._lock:
+            return list(self._recent)
+
+    def add(self, record):
+        with self._lock:
+            self._pending.append(record)
+            self._recent.append(record)
+        return record
+
+    def write_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            if self._file is None:
+                self._file = open(self._segment_path(self._current), "ab")
+            for record in pending:
+                if self._size >= self.segment_bytes and self._times:
+                    self._rotate()
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                self._file.write(line)
+                self._times.append(record["ts"])
+                self._offsets.append(self._size)
+                self._size += len(line)
+                self._written += 1
+            self._file.flush()
+            return len(pending)
+
+    def import_legacy(self, records):
+        # Chuyển lịch sử kiểu cũ (đã qua parse_legacy) sang log, chỉ làm một lần khi log còn
+        # trống; gọi trên luồng giao diện như add(), phần ghi đĩa do write_pending() làm
+        with self._lock:
+            self._pending.extend(records)
+            self._recent.extend(records)
+        return len(records)
+
+    def read(self, start, stop):
+        # Các bản ghi ở vị trí [start, stop), theo thứ tự thời gian
+        with self._lock:
+            start = max(start, self._base)
+            stop = min(stop, self._written + len(self._pending))
+            records = []
+            position = start
+            while position < stop:
+                if position >= self._written:
+                    records.extend(self._pending[position - self._written:stop - self._written])
+                    break
+                number, first, offsets = self._segment_at(position)
+                local = position - first
+                count = min(stop - position, len(offsets) - local)
+                records.extend(self._read_lines(number, offsets[local], count))
+                position += count
+            return records
+
+    def positions(self, start_time=None, end_time=None):
+        # (đầu, cuối) của các vị trí có start_time <= thời điểm <= end_time (số giây)
+        with self._lock:
+            low = self._base if start_time is None else self._boundary(start_time, bisect.bisect_left)
+            high = self._written + len(self._pending) if end_time is None else self._boundary(end_time, bisect.bisect_right)
+            return low, max(low, high)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _boundary(self, moment, find):
+        # Vị trí đầu tiên có thời điểm > moment (bisect_right) hoặc >= moment (bisect_left)
+        for (number, count, first_time, last_time), start in zip(self._segments, self._starts):
+            if find([last_time], moment) == 0:
+                return start + find(self._segment_index(number)[0], moment)
+        if self._times and find(self._times[-1:], moment) == 0:
+            return self._current_start + find(self._times, moment)
+        times = [record["ts"] for record in self._pending]
+        return self._written + find(times, moment)
+
+    def _segment_at(self, position):
+        if position >= self._current_start:
+            return self._current, self._current_start, self._offsets
+        position_index = bisect.bisect_right(self._starts, position) - 1
+        number = self._segments[position_index][0]
+        return number, self._starts[position_index], self._segment_index(number)[1]
+
+    def _segment_index(self, number):
+        return self._indexes.get(number, self._load_segment_index)
+
+    def _load_segment_index(self, number):
+        try:
+            with open(self._index_path(number), "r", encoding="utf-8") as f:
+                index = json.load(f)
+            return index["times"], index["offsets"]
+        except (FileNotFoundError, json.JSONDecodeError):
+            times, offsets, size = self._scan(number)
+            if not self.read_only:
+                write_atomic(self._index_path(number), {"times": times, "offsets": offsets})
+            return times, offsets
+
+    def _read_lines(self, number, offset, count):
+        with open(self._segment_path(number), "rb") as f:
+            f.seek(offset)
+            return [json.loads(f.readline()) for _ in range(count)]
+
+    def _scan(self, number):
+        times = []
+        offsets = []
+        offset = 0
+        try:
+            with open(self._segment_path(number), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Dòng cuối bị ghi dở khi chương trình dừng đột ngột
+                        break
+                    times.append(json.loads(line)["ts"])
+                    offsets.append(offset)
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return times, offsets, offset
+
+    def _rotate(self):
+        # Đóng đoạn hiện tại: ghi chỉ mục của đoạn và cập nhật segments.json
+        self._file.close()
+        write_atomic(self._index_path(self._current), {"times": self._times, "offsets": self._offsets})
+        self._segments.append([self._current, len(self._times), self._times[0], self._times[-1]])
+        self._starts.append(self._current_start)
+        while self.max_segments is not None and len(self._segments) > self.max_segments:
+            number, count, first_time, last_time = self._segments.pop(0)
+            self._starts.pop(0)
+            self._base += count
+            for path in (self._segment_path(number), self._index_path(number)):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._save_manifest()
+        self._current_start += len(self._times)
+        self._current += 1
+        self._times = []
+        self._offsets = []
+        self._size = 0
+        self._file = open(self._segment_path(self._current), "ab")
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._base = manifest["base"]
+            self._segments = manifest["segments"]
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        closed = {segment[0] for segment in self._segments}
+        names = os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        numbers = sorted(int(name[:-6]) for name in names if name.endswith(".jsonl") and name[:-6].isdigit())
+        # Đoạn đã đầy nhưng chưa kịp ghi vào segments.json (dừng giữa lúc xoay vòng)
+        for number in numbers[:-1]:
+            if number not in closed:
+                times, offsets, size = self._scan(number)
+                if times:
+                    self._segments.append([number, len(times), times[0], times[-1]])
+        self._segments.sort()
+        position = self._base
+        self._starts = []
+        for segment in self._segments:
+            self._starts.append(position)
+            position += segment[1]
+        self._current_start = position
+        self._current = max([segment[0] + 1 for segment in self._segments] + numbers[-1:] + [1])
+        self._times, self._offsets, self._size = self._scan(self._current)
+        current_path = self._segment_path(self._current)
+        if not self.read_only and os.path.exists(current_path) and os.path.getsize(current_path) > self._size:
+            # Bỏ dòng ghi dở ở cuối để các dòng ghi tiếp không bị dính vào nó
+            os.truncate(current_path, self._size)
+        self._written = self._current_start + len(self._times)
+        self._recent.extend(self.read(max(self._base, self._written - self._recent.maxlen), self._written))
+
+    def _save_manifest(self):
+        write_atomic(self.manifest_path, {"base": self._base, "segments": self._segments})
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:06d}.jsonl")
+
+    def _index_path(self, number):
+        return os.path.join(self.directory, f"{number:06d}.idx")
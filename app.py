@@ -1,78 +1,326 @@
+import bisect
+import csv
+import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-import json
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 from tkinter import Scrollbar
 from tkinter.simpledialog import askfloat
+from constraints import ConstraintError
+from core import DATASET_DEPENDENCIES, DATASETS, HRService
+from io_worker import IOWorker
+from models import Employee
+from virtual_tree import VirtualTreeview
+from activity_log import format_record
+from temporal import SECONDS_PER_DAY, format_date, format_datetime, format_day, format_display_date, parse_datetime, parse_day
+from bulk import FILE_TYPES
+from tracing import tracer
+
+# Tiêu chí sắp xếp (xem sorting.py): mục trong ô chọn và cột bấm được -> tên khóa
+EMPLOYEE_SORT_OPTIONS = {"Tên": "name", "Mã NV": "employee_id", "Mã phòng": "department_id", "Mã lương": "salary", "Ngày sinh": "dob"}
+EMPLOYEE_SORT_COLUMNS = {"Name": "name", "Position": "position", "Employee ID": "employee_id", "Department ID": "department_id", "Salary ID": "salary", "DOB": "dob"}
+PROJECT_SORT_OPTIONS = {"Tên dự án": "name", "Ngày bắt đầu": "start_date", "Ngày kết thúc": "end_date"}
+PROJECT_SORT_COLUMNS = {"Name": "name", "Start Date": "start_date", "End Date": "end_date", "Status": "status", "Assigned Employees": "headcount"}
+
+# Mục "mọi phòng" trong bộ lọc danh sách chọn nhân viên để chấm công
+ALL_DEPARTMENTS = "Tất cả"
+
+# Số dòng lịch sử đọc thêm mỗi lần cuộn lên đầu danh sách
+HISTORY_PAGE = 200
+
+# Tiêu đề cột của các báo cáo tổng hợp (xem reports.py)
+REPORT_HEADINGS = {
+    "department_id": "Mã phòng", "position": "Chức vụ", "headcount": "Số nhân viên",
+    "month": "Tháng", "records": "Số bản ghi", "total_salary": "Tổng lương",
+    "employee_id": "Mã NV", "name": "Tên", "period": "Kỳ", "days_present": "Ngày có mặt",
+    "working_days": "Ngày công", "rate": "Tỷ lệ (%)", "late_count": "Số lần muộn",
+    "project_id": "Mã dự án", "status": "Trạng thái", "start_date": "Ngày bắt đầu",
+    "end_date": "Ngày kết thúc", "assigned": "Mã được gán", "active_headcount": "Nhân viên hiện có",
+}
+
+
+def toggle_sort(specs, field, add):
+    # Bấm lại đúng tiêu chí đang dùng thì đảo chiều; add=True thêm tiêu chí phụ
+    for position, (current, descending) in enumerate(specs):
+        if current == field and (add or len(specs) == 1):
+            specs = list(specs)
+            specs[position] = (field, not descending)
+            return specs
+    if add:
+        return list(specs) + [(field, False)]
+    return [(field, False)]
 
-class Project:
-    def __init__(self, project_id, name, start_date, end_date, description, status="", assigned_employees=None):
-        self.project_id = project_id
-        self.name = name
-        self.start_date = start_date
-        self.end_date = end_date
-        self.description = description
-        self.status = status
-        self.assigned_employees = assigned_employees if assigned_employees else []
-
-    def to_dict(self):
-        return {
-            'project_id': self.project_id,
-            'name': self.name,
-            'start_date': self.start_date.strftime('%Y-%m-%d'),
-            'end_date': self.end_date.strftime('%Y-%m-%d'),
-            'description': self.description,
-            'status': self.status,
-            'assigned_employees': self.assigned_employees
-        }
-
-    @classmethod
-    def from_dict(cls, project_dict):
-        return cls(
-            project_dict['project_id'],
-            project_dict['name'],
-            datetime.strptime(project_dict['start_date'], '%Y-%m-%d'),
-            datetime.strptime(project_dict['end_date'], '%Y-%m-%d'),
-            project_dict['description'],
-            project_dict.get('status', ''),
-            project_dict.get('assigned_employees', [])
-        )
-
-
-class Employee:
-    def __init__(self, employee_id, department_id, salary_id, name, dob, gender, ethnicity, id_number, id_issued_place, position, hired_date=None):
-        self.employee_id = employee_id
-        self.department_id = department_id
-        self.salary_id = salary_id
-        self.name = name
-        self.dob = dob
-        self.gender = gender
-        self.ethnicity = ethnicity
-        self.id_number = id_number
-        self.id_issued_place = id_issued_place
-        self.position = position
-        self.hired_date = hired_date if hired_date else datetime.now()
 
 class EmployeeManagementApp(tk.Tk):
+    # Các lệnh giao diện được đo thời gian; p50/p95 xem ở tab "Chẩn đoán" (Ctrl+Shift+D)
+    TRACED_ACTIONS = (
+        "add_employee", "save_employee", "edit_employee", "update_employee", "delete_employee", "search_employee", "sort_employees",
+        "mark_attendance", "import_badge_file", "delete_attendance", "update_attendance_tree",
+        "calculate_salary", "process_salary", "process_batch_salary", "update_salary_tree",
+        "save_new_project", "save_edit_project", "delete_project", "assign_employee_to_project", "save_assigned_employees",
+        "search_project", "sort_projects", "update_employee_tree", "update_project_tree", "sort_employees_by", "sort_projects_by",
+    )
+
     def __init__(self):
+        started = time.perf_counter()
         super().__init__()
 
         self.title("Quản lý nhân viên")
         self.geometry("1200x600")
         self.configure(background="#F0F0F0")
 
-        self.projects = []
-        self.employees = []
-        self.activity_history = []
-        self.attendance = {}
-
+        # HR_TRACE: đường dẫn tệp trace (mặc định trace.json), để trống thì chỉ đo trong bộ nhớ
+        trace_path = os.environ.get("HR_TRACE", "trace.json")
+        if trace_path:
+            tracer.open(trace_path)
+        for action in self.TRACED_ACTIONS:
+            setattr(self, action, tracer.wrap(getattr(self, action), f"ui.{action}", "ui"))
+
+        # Toàn bộ nghiệp vụ nằm trong HRService; lớp giao diện chỉ hiển thị và gọi vào đó
+        # Ghi tệp chạy trên luồng nền; kết quả được đưa về luồng giao diện qua after()
+        self.io = IOWorker(on_error=self.show_io_error)
+        self.core = HRService(executor=self.io)
+        self.employees = self.core.employees
+        self.salary_history = self.core.salary_history
+        self.core.subscribe_activity(self.show_activity)
+        self.employees.subscribe(self.on_employee_change)
+
+        # Khởi động theo từng bước: cửa sổ hiện ngay, dữ liệu được đọc trên luồng nền
+        # theo thứ tự DATASETS; mỗi tab chỉ được vẽ khi được chọn lần đầu.
+        self.startup_timings = {}
+        self.filled_tabs = set()
+        self.heading_texts = {}
+        self.waiting_actions = []
+        self.attendance_row_counts = None
+        self.status_label = tk.Label(self, text="Đang tải dữ liệu...", anchor=tk.W, bg="#F0F0F0")
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
         self.create_widgets()
-        self.load_data()
-        self.load_attendance_data()
-        self.create_attendance_list()
-        self.load_attendance_data()
-        self.load_salary_data()
-        self.load_project_data()
+        self.create_report_tab()
+        self.create_diagnostics_tab()
+        self.tab_loaders = {
+            str(self.employee_frame): (("employees",), self.update_employee_tree),
+            str(self.history_frame): (("employees",), self.load_history_list),
+            str(self.attendance_frame): (("attendance",), self.load_attendance_data),
+            str(self.salary_frame): (("salary",), self.load_salary_data),
+            str(self.project_frame): (("projects",), self.load_project_data),
+            str(self.report_frame): (DATASETS, self.show_report),
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.on_tab_changed())
+        self.bind("<Map>", lambda event: self.record_first_paint(started), add="+")
+        for dataset in DATASETS:
+            if not DATASET_DEPENDENCIES.get(dataset):
+                self.load_dataset(dataset, started)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_io()
+
+    def record_first_paint(self, started):
+        if "first_paint" in self.startup_timings:
+            return
+        # after_idle chạy sau khi Tk đã vẽ xong lượt đầu tiên của cửa sổ
+        self.startup_timings["first_paint"] = None
+        self.after_idle(lambda: self.record_timing("first_paint", started))
+
+    def record_timing(self, name, started):
+        self.startup_timings[name] = time.perf_counter() - started
+        parts = [f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.startup_timings.items() if seconds is not None]
+        loading = [dataset for dataset in DATASETS if not self.core.is_loaded(dataset)]
+        status = "Khởi động: " + ", ".join(parts)
+        if loading:
+            status += f" (đang tải: {', '.join(loading)})"
+        self.status_label.config(text=status)
+
+    def load_dataset(self, dataset, started):
+        def loaded(data):
+            self.core.apply(dataset, data)
+            self.record_timing(dataset, started)
+            # Phần phụ thuộc (vd. chấm công cần nhân viên) chỉ được đọc sau khi apply xong
+            for waiting, dependencies in DATASET_DEPENDENCIES.items():
+                if dataset in dependencies and self.core.is_loaded(*dependencies):
+                    self.load_dataset(waiting, started)
+            if dataset == "attendance" and self.core.attendance.unresolved:
+                self.warn_unresolved_attendance(self.core.attendance.unresolved)
+            self.fill_current_tab()
+            self.run_waiting_actions()
+
+        self.io.submit(None, lambda: self.core.read(dataset), loaded)
+
+    def warn_unresolved_attendance(self, unresolved):
+        names = ", ".join(f"{name} ({count})" for name, count in list(unresolved.items())[:10])
+        more = f" và {len(unresolved) - 10} tên khác" if len(unresolved) > 10 else ""
+        messagebox.showwarning("Cảnh báo", f"Không chuyển được {sum(unresolved.values())} lượt chấm công trong attendance.json "
+                                           f"vì tên không khớp nhân viên nào: {names}{more}.")
+
+    def on_tab_changed(self):
+        # Tab báo cáo được tính lại mỗi lần mở (kết quả chưa đổi thì lấy từ bộ nhớ đệm)
+        tab = self.notebook.select()
+        if tab == str(self.report_frame) and tab in self.filled_tabs:
+            self.show_report()
+        else:
+            self.fill_current_tab()
+
+    def fill_current_tab(self):
+        # Vẽ tab đang chọn lần đầu, khi dữ liệu của nó đã sẵn sàng
+        tab = self.notebook.select()
+        if tab in self.filled_tabs or tab not in self.tab_loaders:
+            return
+        datasets, fill = self.tab_loaders[tab]
+        if self.core.is_loaded(*datasets):
+            self.filled_tabs.add(tab)
+            fill()
+
+    def ensure_loaded(self, action, *datasets):
+        # Thao tác cần dữ liệu chưa tải xong được chạy lại ngay khi dữ liệu sẵn sàng
+        if self.core.is_loaded(*datasets):
+            return True
+        self.waiting_actions.append((datasets, action))
+        self.status_label.config(text="Đang tải dữ liệu, thao tác sẽ tiếp tục khi tải xong...")
+        return False
+
+    def run_waiting_actions(self):
+        waiting, self.waiting_actions = self.waiting_actions, []
+        for datasets, action in waiting:
+            if self.core.is_loaded(*datasets):
+                action()
+            else:
+                self.waiting_actions.append((datasets, action))
+
+    def poll_io(self):
+        self.io.poll()
+        self.after(50, self.poll_io)
+
+    def show_io_error(self, error):
+        messagebox.showerror("Lỗi", f"Không ghi được dữ liệu: {error}")
+
+    def on_close(self):
+        # Ghi nốt các việc đang chờ trên luồng nền trước khi thoát
+        self.core.close()
+        tracer.close()
+        self.destroy()
+
+    def create_report_tab(self):
+        # Báo cáo tổng hợp; kết quả được nhớ trong core.reports nên xem lại gần như tức thì
+        self.report_frame = tk.Frame(self.notebook, bg="#F0F0F0")
+        self.notebook.add(self.report_frame, text="Báo cáo")
+
+        report_filter_frame = tk.Frame(self.report_frame, bg="#F0F0F0")
+        report_filter_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        tk.Label(report_filter_frame, text="Báo cáo:", bg="#F0F0F0").pack(side=tk.LEFT)
+        self.report_kinds = {title: kind for kind, title in self.core.reports.KINDS.items()}
+        self.report_kind_box = ttk.Combobox(report_filter_frame, values=list(self.report_kinds), state="readonly", width=32)
+        self.report_kind_box.current(0)
+        self.report_kind_box.pack(side=tk.LEFT, padx=5)
+        self.report_kind_box.bind("<<ComboboxSelected>>", lambda event: self.show_report())
+        tk.Label(report_filter_frame, text="Tháng (YYYY-MM):", bg="#F0F0F0").pack(side=tk.LEFT)
+        self.report_period_entry = tk.Entry(report_filter_frame, width=10)
+        self.report_period_entry.insert(0, datetime.now().strftime("%Y-%m"))
+        self.report_period_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(report_filter_frame, text="Phòng:", bg="#F0F0F0").pack(side=tk.LEFT)
+        self.report_department_box = ttk.Combobox(report_filter_frame, values=[ALL_DEPARTMENTS], width=15, postcommand=self.update_report_departments)
+        self.report_department_box.set(ALL_DEPARTMENTS)
+        self.report_department_box.pack(side=tk.LEFT, padx=5)
+        tk.Button(report_filter_frame, text="Xem", command=self.show_report, bg="#1E90FF", fg="white", width=8).pack(side=tk.LEFT, padx=5)
+        tk.Button(report_filter_frame, text="Xuất CSV", command=self.export_report, width=10).pack(side=tk.LEFT)
+
+        report_scrollbar = ttk.Scrollbar(self.report_frame, orient="vertical")
+        report_scrollbar.pack(side="right", fill="y")
+        self.report_tree = ttk.Treeview(self.report_frame, show="headings")
+        self.report_tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.report_view = VirtualTreeview(self.report_tree, self.build_report_row, report_scrollbar)
+        self.current_report = None
+
+    def update_report_departments(self):
+        self.report_department_box["values"] = [ALL_DEPARTMENTS] + self.employees.distinct("department_id")
+
+    def run_report(self):
+        # Trả về báo cáo theo các lựa chọn trên tab, None nếu tháng nhập sai
+        period = self.report_period_entry.get().strip() or None
+        if period:
+            try:
+                datetime.strptime(period, "%Y-%m")
+            except ValueError:
+                messagebox.showerror("Lỗi", "Vui lòng nhập tháng theo định dạng YYYY-MM!")
+                return None
+        department_id = self.report_department_box.get().strip()
+        department_id = None if department_id in ("", ALL_DEPARTMENTS) else department_id
+        return self.core.reports.run(self.report_kinds[self.report_kind_box.get()], period, department_id)
+
+    def show_report(self):
+        if not self.ensure_loaded(self.show_report, *DATASETS):
+            return
+        report = self.run_report()
+        if report is None:
+            return
+        self.current_report = report
+        self.report_tree["columns"] = report.columns
+        for column in report.columns:
+            self.report_tree.heading(column, text=REPORT_HEADINGS.get(column, column), anchor=tk.CENTER)
+            self.report_tree.column(column, width=120, anchor=tk.CENTER)
+        self.report_view.set_rows(range(len(report.rows)))
+
+    def build_report_row(self, key, position):
+        return "", self.current_report.rows[key]
+
+    def export_report(self):
+        if self.current_report is None:
+            messagebox.showwarning("Cảnh báo", "Vui lòng xem một báo cáo trước khi xuất!")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.current_report.columns)
+            writer.writerows(self.current_report.rows)
+        messagebox.showinfo("Thông báo", f"Đã xuất báo cáo: {self.current_report.title}")
+
+    def create_diagnostics_tab(self):
+        # Tab ẩn, bật/tắt bằng Ctrl+Shift+D: thời gian p50/p95 của từng thao tác
+        self.diagnostics_frame = tk.Frame(self.notebook, bg="#F0F0F0")
+        self.diagnostics_tree = ttk.Treeview(self.diagnostics_frame, columns=("Category", "Count", "P50", "P95", "Max"), show="tree headings")
+        self.diagnostics_tree.heading("#0", text="Thao tác", anchor="center")
+        self.diagnostics_tree.heading("Category", text="Nhóm", anchor="center")
+        self.diagnostics_tree.heading("Count", text="Số lần", anchor="center")
+        self.diagnostics_tree.heading("P50", text="p50 (ms)", anchor="center")
+        self.diagnostics_tree.heading("P95", text="p95 (ms)", anchor="center")
+        self.diagnostics_tree.heading("Max", text="Lâu nhất (ms)", anchor="center")
+        self.diagnostics_tree.column("#0", width=280)
+        self.diagnostics_tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+
+        diagnostics_button_frame = tk.Frame(self.diagnostics_frame, bg="#F0F0F0")
+        diagnostics_button_frame.pack(pady=5)
+        reset_button = tk.Button(diagnostics_button_frame, text="Đặt lại", command=self.reset_diagnostics, bg="#FF0000", fg="white")
+        reset_button.pack(side=tk.LEFT, padx=5)
+        trace_label = tk.Label(diagnostics_button_frame, text=f"Tệp trace: {tracer.path or '(không ghi)'}", bg="#F0F0F0")
+        trace_label.pack(side=tk.LEFT, padx=5)
+
+        self.diagnostics_visible = False
+        self.bind("<Control-D>", lambda event: self.toggle_diagnostics())
+
+    def toggle_diagnostics(self):
+        if self.diagnostics_visible:
+            self.notebook.forget(self.diagnostics_frame)
+            self.diagnostics_visible = False
+            return
+        self.notebook.add(self.diagnostics_frame, text="Chẩn đoán")
+        self.notebook.select(self.diagnostics_frame)
+        self.diagnostics_visible = True
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        # Tự cập nhật mỗi giây khi tab đang hiện
+        if not self.diagnostics_visible:
+            return
+        tracer.flush()
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        for name, category, count, p50, p95, longest in tracer.stats():
+            self.diagnostics_tree.insert("", tk.END, text=name, values=(category, count, f"{p50 * 1000:.1f}", f"{p95 * 1000:.1f}", f"{longest * 1000:.1f}"))
+        self.after(1000, self.refresh_diagnostics)
+
+    def reset_diagnostics(self):
+        tracer.reset()
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
 
     def create_widgets(self):
         self.notebook = ttk.Notebook(self)
@@ -106,6 +354,7 @@ class EmployeeManagementApp(tk.Tk):
         x_scrollbar.pack(side="bottom", fill="x")
 
         self.salary_tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.salary_view = VirtualTreeview(self.salary_tree, self.build_salary_row, y_scrollbar)
 
         # New Project Frame
         self.project_frame = tk.Frame(self.notebook, bg="#F0F0F0")
@@ -119,6 +368,9 @@ class EmployeeManagementApp(tk.Tk):
         self.project_tree.heading("Status", text="Trạng thái", anchor=tk.CENTER)  # Thêm cột Trạng thái
         self.project_tree.heading("Assigned Employees", text="Mã NV Join", anchor=tk.CENTER)  # Thêm cột Nhân viên tham gia
         self.project_tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        self.project_view = VirtualTreeview(self.project_tree, self.build_project_row)
+        self.project_sort = []
+        self.bind_sort_headings(self.project_tree, PROJECT_SORT_COLUMNS, self.sort_projects_by)
 
         # Buttons for project frame
         add_project_button = tk.Button(self.project_frame, text="Thêm dự án", command=self.add_project, bg="#4CAF50", fg="white")
@@ -145,7 +397,7 @@ class EmployeeManagementApp(tk.Tk):
         search_button.pack(side=tk.LEFT, padx=5, pady=5)
 
         # Add sorting functionality
-        sort_options = ["Tên dự án", "Ngày bắt đầu", "Ngày kết thúc"]
+        sort_options = list(PROJECT_SORT_OPTIONS)
         self.sort_variable = tk.StringVar(self.project_frame)
         self.sort_variable.set(sort_options[0])
         sort_dropdown = tk.OptionMenu(self.project_frame, self.sort_variable, *sort_options, command=self.sort_projects)
@@ -170,6 +422,7 @@ class EmployeeManagementApp(tk.Tk):
         h_scrollbar = Scrollbar(self.attendance_frame, orient="horizontal", command=self.attendance_tree.xview)
         h_scrollbar.pack(side="bottom", fill="x")
         self.attendance_tree.configure(xscrollcommand=h_scrollbar.set)
+        self.attendance_view = VirtualTreeview(self.attendance_tree, self.build_attendance_row, v_scrollbar)
 
         # Widgets for employee frame
         self.employee_tree = ttk.Treeview(self.employee_frame, columns=("Name", "Position", "Employee ID", "Department ID", "Salary ID", "DOB", "Gender", "Ethnicity", "ID Number", "ID Issued Place"))
@@ -193,11 +446,18 @@ class EmployeeManagementApp(tk.Tk):
         
         self.employee_tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
 
+        self.employee_tree.column("#0", anchor=tk.CENTER, width=70)
+        for column in ("Name", "Position", "Employee ID", "Department ID", "Salary ID", "DOB", "Gender", "Ethnicity", "ID Number", "ID Issued Place"):
+            self.employee_tree.column(column, anchor=tk.CENTER, width=120)
+        self.employee_view = VirtualTreeview(self.employee_tree, self.build_employee_row, y_scrollbar)
+        self.employee_sort = []
+        self.bind_sort_headings(self.employee_tree, EMPLOYEE_SORT_COLUMNS, self.sort_employees_by)
+
         button_frame = tk.Frame(self.employee_frame, bg="#F0F0F0")
         button_frame.pack(side=tk.TOP, padx=10, pady=10)
 
         # Thêm ô nhập mã nhân viên và nút tìm kiếm vào button_frame
-        search_label = tk.Label(button_frame, text="Mã nhân viên:", bg="#F0F0F0")
+        search_label = tk.Label(button_frame, text="Tìm nhân viên:", bg="#F0F0F0")
         search_label.pack(side=tk.LEFT, padx=5, pady=5)
 
         self.search_entry = tk.Entry(button_frame)
@@ -207,7 +467,7 @@ class EmployeeManagementApp(tk.Tk):
         search_button.pack(side=tk.LEFT, padx=5, pady=5)
 
         # Thêm nút sắp xếp danh sách vào button_frame
-        sort_options = ["Tên", "Mã NV", "Mã phòng", "Mã lương", "Ngày sinh"]
+        sort_options = list(EMPLOYEE_SORT_OPTIONS)
         sort_variable = tk.StringVar(button_frame)
         sort_variable.set(sort_options[0])
         sort_dropdown = tk.OptionMenu(button_frame, sort_variable, *sort_options, command=self.sort_employees)
@@ -223,9 +483,35 @@ class EmployeeManagementApp(tk.Tk):
         delete_button = tk.Button(button_frame, text="Xóa nhân viên", command=self.delete_employee, bg="#FF0000", fg="white", width=15)
         delete_button.pack(side=tk.LEFT, padx=5)
 
-        # Widgets for history frame
-        self.history_listbox = tk.Listbox(self.history_frame, bg="#FFFFFF", selectbackground="#D5E8D4")
-        self.history_listbox.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        import_employees_button = tk.Button(button_frame, text="Nhập từ tệp", command=self.import_employees_file, bg="#1E90FF", fg="white", width=12)
+        import_employees_button.pack(side=tk.LEFT, padx=5)
+
+        export_employees_button = tk.Button(button_frame, text="Xuất tệp", command=self.export_employees_file, bg="#1E90FF", fg="white", width=10)
+        export_employees_button.pack(side=tk.LEFT, padx=5)
+
+        # Widgets for history frame: lọc theo ngày, danh sách chỉ giữ các trang đã xem
+        history_filter_frame = tk.Frame(self.history_frame, bg="#F0F0F0")
+        history_filter_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        tk.Label(history_filter_frame, text="Từ (YYYY-MM-DD):", bg="#F0F0F0").pack(side=tk.LEFT)
+        self.history_from_entry = tk.Entry(history_filter_frame, width=12)
+        self.history_from_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(history_filter_frame, text="Đến:", bg="#F0F0F0").pack(side=tk.LEFT)
+        self.history_to_entry = tk.Entry(history_filter_frame, width=12)
+        self.history_to_entry.pack(side=tk.LEFT, padx=5)
+        tk.Button(history_filter_frame, text="Lọc", command=self.filter_history, width=8).pack(side=tk.LEFT, padx=5)
+        tk.Button(history_filter_frame, text="Bỏ lọc", command=self.clear_history_filter, width=8).pack(side=tk.LEFT)
+
+        history_list_frame = tk.Frame(self.history_frame)
+        history_list_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+        history_scrollbar = Scrollbar(history_list_frame, orient=tk.VERTICAL)
+        history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.history_listbox = tk.Listbox(history_list_frame, bg="#FFFFFF", selectbackground="#D5E8D4",
+                                          yscrollcommand=lambda first, last: self.on_history_scroll(history_scrollbar, first, last))
+        self.history_listbox.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        history_scrollbar.config(command=self.history_listbox.yview)
+        self.history_start = 0
+        self.history_floor = 0
+        self.history_filtered = False
 
         # Bind double click event to show employee details
         self.employee_tree.bind("<Double-1>", self.show_employee_details)
@@ -241,7 +527,43 @@ class EmployeeManagementApp(tk.Tk):
         calculate_salary_button = tk.Button(self.salary_button_frame, text="Tính lương", command=self.calculate_salary, bg="#1E90FF", fg="white", width=15)
         calculate_salary_button.pack(side=tk.LEFT, padx=5)
 
+        batch_salary_button = tk.Button(self.salary_button_frame, text="Tính lương hàng loạt", command=self.calculate_batch_salary, bg="#1E90FF", fg="white", width=18)
+        batch_salary_button.pack(side=tk.LEFT, padx=5)
+
+        # Bộ lọc bảng lương: chỉ nạp các bản ghi của tháng/phòng được chọn
+        salary_month_label = tk.Label(self.salary_button_frame, text="Tháng (YYYY-MM):", bg="#F0F0F0")
+        salary_month_label.pack(side=tk.LEFT, padx=5)
+        self.salary_month_entry = tk.Entry(self.salary_button_frame, width=10)
+        self.salary_month_entry.pack(side=tk.LEFT, padx=5)
+
+        salary_department_label = tk.Label(self.salary_button_frame, text="Mã phòng:", bg="#F0F0F0")
+        salary_department_label.pack(side=tk.LEFT, padx=5)
+        self.salary_department_entry = tk.Entry(self.salary_button_frame, width=12)
+        self.salary_department_entry.pack(side=tk.LEFT, padx=5)
+
+        salary_filter_button = tk.Button(self.salary_button_frame, text="Lọc", command=self.update_salary_tree, bg="#1E90FF", fg="white", width=8)
+        salary_filter_button.pack(side=tk.LEFT, padx=5)
+
+        export_salary_button = tk.Button(self.salary_button_frame, text="Xuất tệp", command=self.export_salary_file, bg="#1E90FF", fg="white", width=10)
+        export_salary_button.pack(side=tk.LEFT, padx=5)
+
         # Widgets for attendance frame
+        # Bộ lọc danh sách chọn nhân viên: theo phòng và theo tên/mã (gõ tới đâu lọc tới đó)
+        select_filter_frame = tk.Frame(self.attendance_frame, bg="#F0F0F0")
+        select_filter_frame.pack(fill=tk.X, padx=10, pady=(5, 0))
+        select_department_label = tk.Label(select_filter_frame, text="Phòng:", bg="#F0F0F0")
+        select_department_label.pack(side=tk.LEFT, padx=5)
+        self.select_department_variable = tk.StringVar(select_filter_frame, value=ALL_DEPARTMENTS)
+        self.select_department_box = ttk.Combobox(select_filter_frame, textvariable=self.select_department_variable, values=[ALL_DEPARTMENTS], state="readonly", width=20)
+        self.select_department_box.pack(side=tk.LEFT, padx=5)
+        self.select_department_box.bind("<<ComboboxSelected>>", lambda event: self.update_selection_list())
+        select_name_label = tk.Label(select_filter_frame, text="Tên/Mã NV:", bg="#F0F0F0")
+        select_name_label.pack(side=tk.LEFT, padx=5)
+        self.select_name_entry = tk.Entry(select_filter_frame)
+        self.select_name_entry.pack(side=tk.LEFT, padx=5)
+        self.select_name_entry.bind("<KeyRelease>", self.schedule_selection_filter)
+        self.select_filter_job = None
+
         self.select_employee_tree = ttk.Treeview(self.attendance_frame, columns=("Name", "Employee ID", "Department ID", "Salary ID"), show="headings")
         self.select_employee_tree.heading("Name", text="Tên nhân viên", anchor="center")
         self.select_employee_tree.heading("Employee ID", text="Mã NV", anchor="center")
@@ -258,6 +580,7 @@ class EmployeeManagementApp(tk.Tk):
         select_x_scrollbar = ttk.Scrollbar(self.attendance_frame, orient="horizontal", command=self.select_employee_tree.xview)
         select_x_scrollbar.pack(side="bottom", fill="x")
         self.select_employee_tree.configure(xscroll=select_x_scrollbar.set)
+        self.select_employee_view = VirtualTreeview(self.select_employee_tree, self.build_selection_row, select_y_scrollbar)
 
         # New frame to contain buttons
         button_frame = tk.Frame(self.attendance_frame, bg="#F0F0F0")
@@ -269,7 +592,15 @@ class EmployeeManagementApp(tk.Tk):
         delete_attendance_button = tk.Button(button_frame, text="Xóa điểm danh", command=self.delete_attendance, bg="#FF0000", fg="white")
         delete_attendance_button.pack(side=tk.LEFT, padx=10)
 
+        import_badge_button = tk.Button(button_frame, text="Nhập từ máy chấm công", command=self.import_badge_file, bg="#1E90FF", fg="white")
+        import_badge_button.pack(side=tk.LEFT, padx=10)
+
+        export_attendance_button = tk.Button(button_frame, text="Xuất tệp", command=self.export_attendance_file, bg="#1E90FF", fg="white")
+        export_attendance_button.pack(side=tk.LEFT, padx=10)
+
     def add_project(self):
+        if not self.ensure_loaded(self.add_project, "projects"):
+            return
         project_window = tk.Toplevel(self)
         project_window.title("Thêm dự án")
 
@@ -307,37 +638,32 @@ class EmployeeManagementApp(tk.Tk):
             return
 
         try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+            start_date = parse_day(start_date_str)
+            end_date = parse_day(end_date_str)
         except ValueError:
             messagebox.showwarning("Cảnh báo", "Định dạng ngày không hợp lệ!")
             return
 
-        project_id = len(self.projects) + 1
-        new_project = Project(project_id, name, start_date, end_date, description)
-        self.projects.append(new_project)
-        self.update_project_tree()
-        self.save_project_data()
+        new_project = self.core.add_project(name, start_date, end_date, description)
+        if self.project_sort:
+            self.update_project_tree(keep_position=True)
+        else:
+            self.project_view.insert(new_project.project_id)
         messagebox.showinfo("Thông báo", "Thêm dự án thành công!")
         self.name_entry.delete(0, tk.END)
         self.start_date_entry.delete(0, tk.END)
         self.end_date_entry.delete(0, tk.END)
         self.description_entry.delete("1.0", tk.END)
 
-        # Lưu thông tin dự án
-        self.save_project_data()
-        self.update_activity_history(f"Thêm Dự Án: {name}")
+        self.update_activity_history(f"Thêm Dự Án: {name}", "project.add", new_project.project_id)
         
 
     def edit_project(self):
-        selected_items = self.project_tree.selection()
-        if not selected_items:
+        if not self.project_view.selection_keys():
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn một dự án để sửa!")
             return
 
-        selected_item = selected_items[0]
-        project_id = int(self.project_tree.item(selected_item, "text"))
-        selected_project = self.projects[project_id - 1]
+        selected_project = self.selected_project()
 
         edit_window = tk.Toplevel(self)
         edit_window.title("Sửa dự án")
@@ -352,13 +678,13 @@ class EmployeeManagementApp(tk.Tk):
         start_date_label.grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
         self.edit_start_date_entry = tk.Entry(edit_window)
         self.edit_start_date_entry.grid(row=1, column=1, padx=5, pady=5)
-        self.edit_start_date_entry.insert(tk.END, selected_project.start_date.strftime("%Y-%m-%d"))
+        self.edit_start_date_entry.insert(tk.END, format_day(selected_project.start_day))
 
         end_date_label = tk.Label(edit_window, text="Ngày kết thúc (YYYY-MM-DD):")
         end_date_label.grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
         self.edit_end_date_entry = tk.Entry(edit_window)
         self.edit_end_date_entry.grid(row=2, column=1, padx=5, pady=5)
-        self.edit_end_date_entry.insert(tk.END, selected_project.end_date.strftime("%Y-%m-%d"))
+        self.edit_end_date_entry.insert(tk.END, format_day(selected_project.end_day))
 
         description_label = tk.Label(edit_window, text="Mô tả:")
         description_label.grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
@@ -392,25 +718,19 @@ class EmployeeManagementApp(tk.Tk):
             return
 
         try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+            start_date = parse_day(start_date_str)
+            end_date = parse_day(end_date_str)
         except ValueError:
             messagebox.showwarning("Cảnh báo", "Định dạng ngày không hợp lệ!")
             return
 
-        selected_project.name = name
-        selected_project.start_date = start_date
-        selected_project.end_date = end_date
-        selected_project.description = description
-
-        self.update_project_tree()
-        self.save_project_data()
-        self.update_activity_history(f"Sửa dự án: {name}")
+        self.core.update_project(selected_project, name=name, start_date=start_date, end_date=end_date, description=description)
+        self.refresh_project_row(selected_project.project_id)
+        self.update_activity_history(f"Sửa dự án: {name}", "project.update", selected_project.project_id)
         messagebox.showinfo("Thông báo", "Sửa dự án thành công!")
 
     def delete_project(self):
-        selected_items = self.project_tree.selection()
-        if not selected_items:
+        if not self.project_view.selection_keys():
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn một dự án để xóa!")
             return
 
@@ -418,13 +738,10 @@ class EmployeeManagementApp(tk.Tk):
         if not confirmation:
             return
 
-        selected_item = selected_items[0]
-        project_id = int(self.project_tree.item(selected_item, "text"))
-        del self.projects[project_id - 1]
+        deleted_project = self.core.remove_project(self.selected_project())
 
-        self.update_project_tree()
-        self.save_project_data()
-        self.update_activity_history(f"Xóa dự án: {project_id}")
+        self.project_view.delete(deleted_project.project_id)
+        self.update_activity_history(f"Xóa dự án: {deleted_project.project_id}", "project.delete", deleted_project.project_id)
         messagebox.showinfo("Thông báo", "Xóa dự án thành công!")
 
     def show_project_details(self, project):
@@ -438,12 +755,12 @@ class EmployeeManagementApp(tk.Tk):
 
         start_date_label = tk.Label(project_info_window, text="Ngày bắt đầu:")
         start_date_label.grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
-        start_date_value = tk.Label(project_info_window, text=project.start_date.strftime("%Y-%m-%d"))
+        start_date_value = tk.Label(project_info_window, text=format_day(project.start_day))
         start_date_value.grid(row=1, column=1, padx=5, pady=5)
 
         end_date_label = tk.Label(project_info_window, text="Ngày kết thúc:")
         end_date_label.grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
-        end_date_value = tk.Label(project_info_window, text=project.end_date.strftime("%Y-%m-%d"))
+        end_date_value = tk.Label(project_info_window, text=format_day(project.end_day))
         end_date_value.grid(row=2, column=1, padx=5, pady=5)
 
         description_label = tk.Label(project_info_window, text="Mô tả:")
@@ -463,68 +780,120 @@ class EmployeeManagementApp(tk.Tk):
         employees_listbox = tk.Listbox(project_info_window, bg="#FFFFFF", selectbackground="#D5E8D4")
         employees_listbox.grid(row=4, column=1, padx=5, pady=5)
 
-        for employee_id in project.assigned_employees:
-            employee = self.get_employee_by_id(employee_id)
-            if employee:
-                employees_listbox.insert(tk.END, employee.name)
+        for employee in self.core.project_employees(project):
+            employees_listbox.insert(tk.END, employee.name)
 
 
 
     def get_employee_by_id(self, employee_id):
-        for employee in self.employees:
-            if employee.employee_id == employee_id:
-                return employee
-        return None
+        return self.employees.get(employee_id)
 
 
     def search_project(self):
-        keyword = self.search_entry_project.get().strip().lower()
+        if not self.ensure_loaded(self.search_project, "projects"):
+            return
+        keyword = self.search_entry_project.get().strip()
         if not keyword:
             messagebox.showwarning("Cảnh báo", "Vui lòng nhập từ khóa tìm kiếm!")
             return
 
-        found_projects = []
-        for project in self.projects:
-            if keyword == project.name.lower():
-                found_projects.append(project)
-
+        # Tìm theo tên và mô tả, không phân biệt dấu, theo tiền tố hoặc sai một ký tự
+        found_projects = self.core.search_projects(keyword)
         if not found_projects:
             messagebox.showinfo("Thông báo", "Không tìm thấy dự án phù hợp.")
             return
 
-        # Mở cửa sổ mới để hiển thị thông tin chi tiết của dự án
-        for found_project in found_projects:
-            self.show_project_details(found_project)
+        if len(found_projects) == 1:
+            self.show_project_details(found_projects[0])
+        else:
+            self.show_search_results("Kết quả tìm dự án", found_projects, lambda project: project.name, self.show_project_details)
 
-    def sort_projects(self, option):
-        if option == "Tên dự án":
-            self.projects.sort(key=lambda x: x.name)
-        elif option == "Ngày bắt đầu":
-            self.projects.sort(key=lambda x: x.start_date)
-        elif option == "Ngày kết thúc":
-            self.projects.sort(key=lambda x: x.end_date)
+    def show_search_results(self, title, results, describe, open_result):
+        # Danh sách kết quả xếp theo độ phù hợp; kích đúp để mở chi tiết
+        results_window = tk.Toplevel(self)
+        results_window.title(title)
+
+        results_listbox = tk.Listbox(results_window, width=60, bg="#FFFFFF", selectbackground="#D5E8D4")
+        results_listbox.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+        for result in results:
+            results_listbox.insert(tk.END, describe(result))
+
+        def open_selected(event):
+            selection = results_listbox.curselection()
+            if selection:
+                open_result(results[selection[0]])
+
+        results_listbox.bind("<Double-1>", open_selected)
 
+    def sort_projects(self, option):
+        # Chỉ sắp xếp thứ tự hiển thị; danh sách dự án trong HRService giữ nguyên
+        self.project_sort = [(PROJECT_SORT_OPTIONS[option], False)]
         self.update_project_tree()
 
-    def update_project_tree(self):
-        for item in self.project_tree.get_children():
-            self.project_tree.delete(item)
+    def sort_projects_by(self, field, add=False):
+        if not self.ensure_loaded(lambda: self.sort_projects_by(field, add), "projects"):
+            return
+        self.project_sort = toggle_sort(self.project_sort, field, add)
+        self.update_project_tree()
 
-        for project in self.projects:
-            assigned_employees_str = ", ".join(project.assigned_employees)
-            self.project_tree.insert("", tk.END, text=project.project_id, values=(project.name, project.start_date.strftime("%Y-%m-%d"), project.end_date.strftime("%Y-%m-%d"), project.description, project.status, assigned_employees_str))
+    def update_project_tree(self, keep_position=False):
+        if self.project_sort:
+            keys = self.core.project_orders.order(*self.project_sort)
+        else:
+            keys = [project.project_id for project in self.core.projects]
+        self.project_view.set_rows(keys, keep_position=keep_position)
+        self.mark_sort_headings(self.project_tree, PROJECT_SORT_COLUMNS, self.project_sort)
+
+    def refresh_project_row(self, project_id):
+        # Khi đang sắp xếp, dự án vừa sửa có thể phải đổi chỗ
+        if self.project_sort:
+            self.update_project_tree(keep_position=True)
+        else:
+            self.project_view.refresh(project_id)
+
+    def bind_sort_headings(self, tree, columns, on_sort):
+        # Bấm tiêu đề cột để sắp xếp theo cột đó (bấm lại để đảo chiều),
+        # Shift+bấm để thêm cột làm tiêu chí phụ
+        self.heading_texts[str(tree)] = {column: tree.heading(column, "text") for column in columns}
+        for column, field in columns.items():
+            tree.heading(column, command=lambda field=field: on_sort(field))
+
+        def add_sort_column(event):
+            if tree.identify_region(event.x, event.y) != "heading":
+                return None
+            column = tree.column(tree.identify_column(event.x), "id")
+            if column in columns:
+                on_sort(columns[column], True)
+            return "break"
+
+        tree.bind("<Shift-Button-1>", add_sort_column)
+
+    def mark_sort_headings(self, tree, columns, specs):
+        texts = self.heading_texts[str(tree)]
+        marks = {}
+        for position, (field, descending) in enumerate(specs):
+            marks[field] = (" ▼" if descending else " ▲") + (str(position + 1) if len(specs) > 1 else "")
+        for column, field in columns.items():
+            tree.heading(column, text=texts[column] + marks.get(field, ""))
+
+    def selected_project(self):
+        # Dự án của hàng đang chọn, tra theo khóa gắn với hàng (không theo vị trí hiển thị)
+        keys = self.project_view.selection_keys()
+        return self.core.get_project(keys[0]) if keys else None
+
+    def build_project_row(self, project_id, position):
+        project = self.core.get_project(project_id)
+        assigned_employees_str = ", ".join(project.assigned_employees)
+        return project.project_id, (project.name, format_day(project.start_day), format_day(project.end_day), project.description, project.status, assigned_employees_str)
 
     def assign_employee_to_project(self):
         # Kiểm tra xem có dự án nào được chọn không
-        selected_items = self.project_tree.selection()
-        if not selected_items:
+        if not self.project_view.selection_keys():
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn một dự án để gán nhân viên!")
             return
 
         # Lấy thông tin về dự án được chọn
-        selected_item = selected_items[0]
-        project_id = int(self.project_tree.item(selected_item, "text"))
-        selected_project = self.projects[project_id - 1]
+        selected_project = self.selected_project()
 
         # Tạo cửa sổ mới để chọn nhân viên
         assign_window = tk.Toplevel(self)
@@ -555,48 +924,36 @@ class EmployeeManagementApp(tk.Tk):
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn ít nhất một nhân viên để gán!")
             return
 
-        for item in selected_items:
-            employee_id = select_employee_tree.item(item, "text")
-            project.assigned_employees.append(employee_id)
-
-        self.update_project_tree()  # Cập nhật giao diện hiển thị dự án
-        self.save_project_data()  # Lưu thông tin về việc gán nhân viên vào dự án
+        added = self.core.assign_employees(project, [select_employee_tree.item(item, "text") for item in selected_items])
+        if not added:
+            messagebox.showinfo("Thông báo", "Các nhân viên đã chọn đều đã có trong dự án.")
+            return
+        self.refresh_project_row(project.project_id)  # Cập nhật giao diện hiển thị dự án
 
-        messagebox.showinfo("Thông báo", "Đã gán nhân viên vào dự án thành công!")
+        messagebox.showinfo("Thông báo", f"Đã gán {len(added)} nhân viên vào dự án thành công!")
 
 
     def update_project_status(self, selected_project):
         new_status = self.edit_status_entry.get().strip()
-        selected_project.status = new_status
-        self.save_project_data()
+        self.core.update_project(selected_project, status=new_status)
+        self.refresh_project_row(selected_project.project_id)
         messagebox.showinfo("Thông báo", "Cập nhật trạng thái dự án thành công!")
     def show_project_details_on_double_click(self, event):
-        # Lấy vị trí của dự án được kích đúp
-        item_id = self.project_tree.selection()[0]
-        project_id = int(self.project_tree.item(item_id, "text"))
-        
-        # Lấy thông tin chi tiết của dự án
-        selected_project = self.projects[project_id - 1]
-        
+        # Lấy dự án được kích đúp theo khóa gắn với hàng
+        selected_project = self.selected_project()
+        if selected_project is None:
+            return
+
         # Hiển thị thông tin chi tiết của dự án trong một cửa sổ mới
         self.show_project_details(selected_project)
 
 
 
     def save_project_data(self):
-        with open("projects.json", "w") as file:
-            json.dump([project.to_dict() for project in self.projects], file, indent=4, default=str)
+        self.core.save_projects()
 
     def load_project_data(self):
-        try:
-            with open("projects.json", "r") as file:
-                data = json.load(file)
-                self.projects = [Project.from_dict(project_data) for project_data in data]
-        except FileNotFoundError:
-            self.projects = []
-
-
-        # Sau khi tải dữ liệu, cập nhật giao diện
+        # Dữ liệu đã được HRService đọc trên luồng nền; chỉ cần vẽ bảng
         self.update_project_tree()
         
     def show_attendance_history(self, event):
@@ -604,26 +961,33 @@ class EmployeeManagementApp(tk.Tk):
         if not selected_item:
             return
 
-        employee_name = self.attendance_tree.item(selected_item, "values")[3]
-        self.view_attendance_history(employee_name)
+        employee_id = self.attendance_tree.item(selected_item, "values")[0]
+        self.view_attendance_history(employee_id)
 
 
     def search_employee(self):
-        search_text = self.search_entry.get()
+        if not self.ensure_loaded(self.search_employee, "employees"):
+            return
+        search_text = self.search_entry.get().strip()
         if not search_text:
-            messagebox.showwarning("Cảnh báo", "Vui lòng nhập mã nhân viên!")
+            messagebox.showwarning("Cảnh báo", "Vui lòng nhập mã, tên hoặc số CMND của nhân viên!")
             return
 
-        found_employee = None
-        for employee in self.employees:
-            if employee.employee_id == search_text:
-                found_employee = employee
-                break
-
+        # Trùng đúng mã nhân viên thì mở luôn, không thì tìm theo chỉ mục toàn văn
+        found_employee = self.employees.get(search_text)
         if found_employee:
             self.display_employee_details(found_employee)
+            return
+
+        found_employees = self.core.search_employees(search_text)
+        if not found_employees:
+            messagebox.showinfo("Thông báo", f"Không tìm thấy nhân viên phù hợp với {search_text}")
+        elif len(found_employees) == 1:
+            self.display_employee_details(found_employees[0])
         else:
-            messagebox.showinfo("Thông báo", f"Không tìm thấy nhân viên có mã {search_text}")
+            self.show_search_results("Kết quả tìm nhân viên", found_employees,
+                                     lambda employee: f"{employee.employee_id} - {employee.name} ({employee.position}, {employee.department_id})",
+                                     self.display_employee_details)
 
     def display_employee_details(self, employee):
         details_window = tk.Toplevel(self)
@@ -633,7 +997,7 @@ class EmployeeManagementApp(tk.Tk):
         details_frame.pack(padx=10, pady=10)
 
         labels = ["Họ và Tên:", "Chức vụ:", "Mã nhân viên:", "Mã phòng:", "Mã lương:", "Ngày sinh:", "Giới tính:", "Dân tộc:", "Số CMND/CCCD:", "Nơi cấp:"]
-        employee_details = [employee.name, employee.position, employee.employee_id, employee.department_id, employee.salary_id, employee.dob.strftime("%d/%m/%Y"), employee.gender, employee.ethnicity, employee.id_number, employee.id_issued_place]
+        employee_details = [employee.name, employee.position, employee.employee_id, employee.department_id, employee.salary_id, format_display_date(employee.dob_timestamp), employee.gender, employee.ethnicity, employee.id_number, employee.id_issued_place]
 
         for i, (label_text, detail) in enumerate(zip(labels, employee_details)):
             label = tk.Label(details_frame, text=label_text, bg="#F0F0F0")
@@ -642,12 +1006,14 @@ class EmployeeManagementApp(tk.Tk):
             detail_label.grid(row=i, column=1, padx=5, pady=5, sticky="w")
 
         # Add a button to view attendance history
-        view_attendance_button = tk.Button(details_frame, text="Xem lịch sử điểm danh", command=lambda: self.view_attendance_history(employee.name), bg="#1E90FF", fg="white")
+        view_attendance_button = tk.Button(details_frame, text="Xem lịch sử điểm danh", command=lambda: self.view_attendance_history(employee.employee_id), bg="#1E90FF", fg="white")
         view_attendance_button.grid(row=len(labels), columnspan=2, pady=10)
 
-    def view_attendance_history(self, employee_name):
-        if employee_name in self.attendance:
-            attendance_history = self.attendance[employee_name]
+    def view_attendance_history(self, employee_id):
+        employee = self.employees.get(employee_id)
+        employee_name = employee.name if employee else employee_id
+        if employee_id in self.core.attendance:
+            attendance_history = self.core.attendance.check_ins(employee_id)
             if attendance_history:
                 history_window = tk.Toplevel(self)
                 history_window.title("Lịch sử điểm danh")
@@ -669,27 +1035,33 @@ class EmployeeManagementApp(tk.Tk):
 
 
     def load_salary_data(self):
-        try:
-            self.salary_tree.delete(*self.salary_tree.get_children())
-            with open("salary.json", "r") as f:
-                salary_data = [json.loads(line) for line in f]
-                # Sắp xếp danh sách nhân viên theo mã phòng trước khi hiển thị
-                sorted_salary_data = sorted(salary_data, key=lambda x: x["department_id"])
-                for data in sorted_salary_data:
-                    self.salary_tree.insert("", "end", values=(
-                        data["name"],
-                        data["employee_id"],
-                        data["department_id"],
-                        data["salary_id"],
-                        data["total_salary"],
-                        data["calculation_time"].split(" ")[0]  # Lấy phần tháng từ thời gian tính lương
-                    ))
-        except FileNotFoundError:
+        if not self.salary_history.exists():
             messagebox.showwarning("Cảnh báo", "Không tìm thấy dữ liệu lương!")
+            return
+        self.update_salary_tree()
+
+    def update_salary_tree(self, keep_position=False):
+        month = self.salary_month_entry.get().strip() or None
+        department_id = self.salary_department_entry.get().strip() or None
+        # Các khóa được xếp theo mã phòng trước khi hiển thị
+        self.salary_view.set_rows(self.salary_history.keys(department_id=department_id, month=month), keep_position=keep_position)
+
+    def build_salary_row(self, key, position):
+        data = self.salary_history.get(key)
+        return "", (
+            data["name"],
+            data["employee_id"],
+            data["department_id"],
+            data["salary_id"],
+            data["total_salary"],
+            data["calculation_time"].split(" ")[0]  # Lấy phần tháng từ thời gian tính lương
+        )
 
 
 
     def calculate_salary(self):
+        if not self.ensure_loaded(self.calculate_salary, "attendance"):
+            return
         # Tạo cửa sổ mới để nhập mã nhân viên
         input_window = tk.Toplevel(self)
         input_window.title("Nhập mã nhân viên")
@@ -705,12 +1077,7 @@ class EmployeeManagementApp(tk.Tk):
 
     def process_salary(self, employee_id):
         # Tìm nhân viên với mã nhân viên được nhập
-        selected_employee = None
-        for employee in self.employees:
-            if employee.employee_id == employee_id:
-                selected_employee = employee
-                break
-
+        selected_employee = self.employees.get(employee_id)
         if selected_employee:
             # Nhập số tiền thưởng
             bonus = askfloat("Nhập số tiền thưởng", "Nhập số tiền thưởng:")
@@ -722,39 +1089,89 @@ class EmployeeManagementApp(tk.Tk):
             if penalty is None:
                 return
 
-            # Tính tổng lương
-            total_salary = float(selected_employee.salary_id) + bonus - penalty
+            # Tính tổng lương bằng cùng công thức với đợt tính lương hàng loạt
+            payroll_run = self.core.pay_employee(selected_employee, bonus, penalty, on_written=self.add_salary_rows)
+            if payroll_run.errors:
+                messagebox.showerror("Lỗi", payroll_run.errors[0][1])
+                return
+            record = payroll_run.records[0]
+
+            # Hiển thị kết quả tính toán cùng số ngày công đã dùng để tính lương cơ bản
+            message = (f"Tổng lương của nhân viên {selected_employee.name} là: {record['total_salary']:,.0f}\n"
+                       f"Ngày công kỳ {payroll_run.period}: {record['days_present']}/{record['working_days']}")
+            if not record["days_present"]:
+                messagebox.showwarning("Cảnh báo", f"{message}\nKhông có ngày công nên lương cơ bản bằng 0. Hãy kiểm tra dữ liệu chấm công của kỳ này.")
+            else:
+                messagebox.showinfo("Kết quả", message)
+        else:
+            messagebox.showwarning("Cảnh báo", f"Không tìm thấy nhân viên với mã {employee_id}")
+
+    def calculate_batch_salary(self):
+        if not self.ensure_loaded(self.calculate_batch_salary, "attendance"):
+            return
+        batch_window = tk.Toplevel(self)
+        batch_window.title("Tính lương hàng loạt")
+
+        labels = ["Kỳ lương (YYYY-MM):", "Mã phòng (để trống = tất cả):", "Chức vụ (để trống = tất cả):", "Bảng thưởng (CSV):", "Bảng phạt (CSV):"]
+        entries = []
+        for i, label_text in enumerate(labels):
+            label = tk.Label(batch_window, text=label_text, bg="#F0F0F0")
+            label.grid(row=i, column=0, padx=10, pady=5, sticky=tk.W)
+            entry = tk.Entry(batch_window, width=30)
+            entry.grid(row=i, column=1, padx=10, pady=5)
+            entries.append(entry)
+        entries[0].insert(0, datetime.now().strftime("%Y-%m"))
 
-            # Lưu dữ liệu lương vào tệp JSON
-            salary_data = {
-                "name": selected_employee.name,
-                "employee_id": selected_employee.employee_id,
-                "department_id": selected_employee.department_id,
-                "salary_id": selected_employee.salary_id,
-                "total_salary": total_salary,
-                "calculation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+        for entry, row in ((entries[3], 3), (entries[4], 4)):
+            browse_button = tk.Button(batch_window, text="Chọn...", command=lambda entry=entry: self.browse_csv(entry))
+            browse_button.grid(row=row, column=2, padx=5, pady=5)
 
-            with open("salary.json", "a") as f:
-                json.dump(salary_data, f)
-                f.write("\n")
+        run_button = tk.Button(batch_window, text="Tính lương", command=lambda: self.process_batch_salary(*[entry.get().strip() for entry in entries]), bg="#4CAF50", fg="white")
+        run_button.grid(row=len(labels), columnspan=3, padx=10, pady=5)
 
-            # Hiển thị kết quả tính toán
-            messagebox.showinfo("Kết quả", f"Tổng lương của nhân viên {selected_employee.name} là: {total_salary}")
+    def browse_csv(self, entry):
+        path = filedialog.askopenfilename(filetypes=[("CSV", "*.csv"), ("Tất cả", "*.*")])
+        if path:
+            entry.delete(0, tk.END)
+            entry.insert(0, path)
 
+    def process_batch_salary(self, period, department_id, position, bonus_path, penalty_path):
+        try:
+            datetime.strptime(period, "%Y-%m")
+        except ValueError:
+            messagebox.showwarning("Cảnh báo", "Định dạng kỳ lương không hợp lệ!")
+            return
 
+        try:
+            payroll_run = self.core.run_payroll(period, department_id or None, position or None, bonus_path or None, penalty_path or None, on_written=self.show_payroll_result)
+        except (OSError, KeyError, ValueError) as e:
+            messagebox.showerror("Lỗi", f"Không đọc được bảng thưởng/phạt: {e}")
+            return
+        if payroll_run is None:
+            messagebox.showinfo("Thông báo", "Không có nhân viên nào phù hợp.")
+
+    def show_payroll_result(self, payroll_run):
+        # Gọi khi đợt lương đã được ghi xong trên luồng nền
+        self.add_salary_rows(payroll_run)
+        message = payroll_run.summary()
+        if payroll_run.errors:
+            message += f"\nBỏ qua {len(payroll_run.errors)} nhân viên có mã lương không hợp lệ."
+        if payroll_run.absent:
+            names = ", ".join(record["name"] for record in payroll_run.absent[:10])
+            more = f" và {len(payroll_run.absent) - 10} người khác" if len(payroll_run.absent) > 10 else ""
+            message += f"\nKhông có ngày công (0/{payroll_run.working_days}), lương cơ bản bằng 0: {names}{more}."
+            messagebox.showwarning("Cảnh báo", message)
         else:
-            messagebox.showwarning("Cảnh báo", f"Không tìm thấy nhân viên với mã {employee_id}")
-        
-        self.update_activity_history(f"Tính lương cho nhân viên: {selected_employee.name}")
+            messagebox.showinfo("Kết quả", message)
+
+    def add_salary_rows(self, payroll_run):
+        # Lịch sử lương đã được đọc tiếp trong HRService; chỉ cần vẽ lại bảng
+        self.update_salary_tree(keep_position=True)
 
     def show_employee_details(self, event):
-        selected_item = self.employee_tree.selection()
-        if len(selected_item) == 0:
+        selected_employee = self.selected_employee()
+        if selected_employee is None:
             return
-        
-        employee_id = self.employee_tree.item(selected_item)['text']
-        selected_employee = self.employees[int(employee_id) - 1]
 
         details_window = tk.Toplevel(self)
         details_window.title("Chi tiết nhân viên")
@@ -763,100 +1180,218 @@ class EmployeeManagementApp(tk.Tk):
         details_frame.pack(padx=10, pady=10)
 
         labels = ["Họ và Tên:", "Chức vụ:", "Mã nhân viên:", "Mã phòng:", "Mã lương:", "Ngày sinh:", "Giới tính:", "Dân tộc:", "Số CMND/CCCD:", "Nơi cấp:"]
-        employee_details = [selected_employee.name, selected_employee.position, selected_employee.employee_id, selected_employee.department_id, selected_employee.salary_id, selected_employee.dob.strftime("%d/%m/%Y"), selected_employee.gender, selected_employee.ethnicity, selected_employee.id_number, selected_employee.id_issued_place]
+        employee_details = [selected_employee.name, selected_employee.position, selected_employee.employee_id, selected_employee.department_id, selected_employee.salary_id, format_display_date(selected_employee.dob_timestamp), selected_employee.gender, selected_employee.ethnicity, selected_employee.id_number, selected_employee.id_issued_place]
+        if self.core.is_loaded("projects"):
+            projects = self.core.projects_for_employee(selected_employee.employee_id)
+            labels.append("Dự án:")
+            employee_details.append(", ".join(project.name for project in projects) or "Chưa tham gia dự án nào")
 
         for i, (label_text, detail) in enumerate(zip(labels, employee_details)):
             label = tk.Label(details_frame, text=label_text, bg="#F0F0F0")
             label.grid(row=i, column=0, padx=5, pady=5, sticky="w")
             detail_label = tk.Label(details_frame, text=detail, bg="#FFFFFF")
             detail_label.grid(row=i, column=1, padx=5, pady=5, sticky="w")
-                # Thêm nút "Xem lịch sử điểm danh"
-            view_attendance_button = tk.Button(details_frame, text="Xem lịch sử điểm danh", command=lambda: self.view_attendance_history(selected_employee.name), bg="#1E90FF", fg="white")
-            view_attendance_button.grid(row=len(labels), columnspan=2, pady=10)
+
+        # Thêm nút "Xem lịch sử điểm danh"
+        view_attendance_button = tk.Button(details_frame, text="Xem lịch sử điểm danh", command=lambda: self.view_attendance_history(selected_employee.employee_id), bg="#1E90FF", fg="white")
+        view_attendance_button.grid(row=len(labels), columnspan=2, pady=10)
+
     def sort_employees(self, criteria):
-        if criteria == "Tên":
-            self.employees.sort(key=lambda x: x.name)
-        elif criteria == "Mã NV":
-            self.employees.sort(key=lambda x: x.employee_id)
-        elif criteria == "Mã phòng":
-            self.employees.sort(key=lambda x: x.department_id)
-        elif criteria == "Mã lương":
-            self.employees.sort(key=lambda x: x.salary_id)
-        elif criteria == "Ngày sinh":
-            self.employees.sort(key=lambda x: x.dob)
+        if not self.ensure_loaded(lambda: self.sort_employees(criteria), "employees"):
+            return
+        # Chỉ đổi thứ tự hiển thị theo thứ tự đã tính sẵn; kho nhân viên giữ nguyên
+        self.employee_sort = [(EMPLOYEE_SORT_OPTIONS[criteria], False)]
+        self.update_employee_tree()
+
+    def sort_employees_by(self, field, add=False):
+        if not self.ensure_loaded(lambda: self.sort_employees_by(field, add), "employees"):
+            return
+        self.employee_sort = toggle_sort(self.employee_sort, field, add)
         self.update_employee_tree()
                 
     def mark_attendance(self):
-        selected_items = self.select_employee_tree.selection()
-        if not selected_items:
+        # Gồm cả các nhân viên đã chọn nhưng đã cuộn khỏi cửa sổ hiển thị
+        selected_keys = self.select_employee_view.selection_keys()
+        if not selected_keys:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn ít nhất một nhân viên để chấm công!")
             return
 
-        current_date = datetime.now().date()
-        for item in selected_items:
-            values = self.select_employee_tree.item(item, "values")
-            employee_name = values[0]
-            employee_id = values[1]
-            department_id = values[2]
-            salary_id = values[3]
-
-            if employee_name in self.attendance:
-                if self.attendance[employee_name]:
-                    last_check_in_date = self.attendance[employee_name][-1].date()
-                    if last_check_in_date == current_date:
-                        messagebox.showwarning("Cảnh báo", f"{employee_name} đã được chấm công vào ngày hôm nay!")
-                        continue
-            else:
-                self.attendance[employee_name] = []
-
-            self.attendance[employee_name].append(datetime.now())
-            self.update_attendance_tree()
-            self.save_attendance_data()
-            self.update_activity_history("Chấm công cho các nhân viên")
-
-    def update_attendance_tree(self):
-        self.attendance_tree.delete(*self.attendance_tree.get_children())
-        for employee, check_in_times in self.attendance.items():
-            employee_info = None
-            for emp in self.employees:
-                if emp.name == employee:
-                    employee_info = emp
-                    break
-            if employee_info:
-                employee_id = employee_info.employee_id
-                department_id = employee_info.department_id
-                salary_id = employee_info.salary_id
-                for idx, check_in_time in enumerate(check_in_times, start=1):
-                    self.attendance_tree.insert("", "end", values=(employee_id, department_id, salary_id, employee, check_in_time))
-            else:
-                for idx, check_in_time in enumerate(check_in_times, start=1):
-                    self.attendance_tree.insert("", "end", text=str(idx), values=("N/A", "N/A", "N/A", employee, check_in_time))
+        check_in = datetime.now()
+        entries = [(self.employees.get_by_key(key).employee_id, check_in) for key in selected_keys]
+        self.record_check_ins(entries)
+
+    def import_badge_file(self):
+        if not self.ensure_loaded(self.import_badge_file, "attendance"):
+            return
+        path = filedialog.askopenfilename(filetypes=FILE_TYPES)
+        if not path:
+            return
+        try:
+            result, errors = self.core.import_badges(path)
+        except (OSError, ValueError, csv.Error) as e:
+            messagebox.showerror("Lỗi", f"Không đọc được tệp chấm công: {e}")
+            return
+        self.show_check_in_result(result, [f"Dòng {line_number}: {message}" for line_number, message in errors])
+
+    def import_employees_file(self):
+        if not self.ensure_loaded(self.import_employees_file, "employees"):
+            return
+        path = filedialog.askopenfilename(filetypes=FILE_TYPES)
+        if not path:
+            return
+        try:
+            added, errors = self.core.import_employees(path)
+        except (OSError, ValueError, csv.Error) as e:
+            messagebox.showerror("Lỗi", f"Không đọc được tệp nhân viên: {e}")
+            return
+        if errors:
+            shown = "\n".join(f"Dòng {line_number}: {message}" for line_number, message in errors[:10])
+            if len(errors) > 10:
+                shown += f"\n... và {len(errors) - 10} dòng khác"
+            messagebox.showwarning("Cảnh báo", f"Đã thêm {added} nhân viên, bỏ qua {len(errors)} dòng:\n{shown}")
+        else:
+            messagebox.showinfo("Thông báo", f"Đã thêm {added} nhân viên")
 
+    def export_employees_file(self):
+        if self.ensure_loaded(self.export_employees_file, "employees"):
+            self.export_to_file("nhân viên", self.core.export_employees)
+
+    def export_attendance_file(self):
+        if self.ensure_loaded(self.export_attendance_file, "attendance"):
+            self.export_to_file("lượt chấm công", self.core.export_attendance)
+
+    def export_salary_file(self):
+        if not self.ensure_loaded(self.export_salary_file, "salary"):
+            return
+        # Xuất theo bộ lọc tháng/phòng đang nhập ở tab lương
+        month = self.salary_month_entry.get().strip() or None
+        department_id = self.salary_department_entry.get().strip() or None
+        self.export_to_file("bản ghi lương", lambda path: self.core.export_salary(path, month, department_id))
+
+    def export_to_file(self, label, export):
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=FILE_TYPES)
+        if not path:
+            return
+        try:
+            count = export(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Lỗi", f"Không ghi được tệp: {e}")
+            return
+        messagebox.showinfo("Thông báo", f"Đã xuất {count} {label} ra {path}")
+
+    def record_check_ins(self, entries):
+        self.show_check_in_result(self.core.check_in(entries))
+
+    def show_check_in_result(self, result, errors=()):
+        # Cả lô chấm công chỉ cập nhật bảng một lần, đúng các nhân viên vừa được chấm công
+        if result.recorded:
+            self.update_attendance_rows(dict.fromkeys(employee_id for employee_id, moment in result.recorded))
+
+        problems = list(errors) + [f"{employee_id}: {reason}" for employee_id, reason in result.skipped]
+        if problems:
+            shown = "\n".join(problems[:10])
+            if len(problems) > 10:
+                shown += f"\n... và {len(problems) - 10} mục khác"
+            messagebox.showwarning("Cảnh báo", f"Đã chấm công {len(result.recorded)} lượt, bỏ qua {len(problems)} mục:\n{shown}")
+
+    def update_attendance_tree(self, keep_position=False):
+        # Mỗi hàng được định danh bởi (mã nhân viên, thứ tự lần chấm công); các hàng của một
+        # nhân viên nằm liền nhau theo thứ tự nhân viên trong kho chấm công
+        self.attendance_row_counts = {employee_id: len(column) for employee_id, column in self.core.attendance.items()}
+        keys = [(employee_id, idx) for employee_id, count in self.attendance_row_counts.items() for idx in range(count)]
+        self.attendance_view.set_rows(keys, keep_position=keep_position)
+
+    def update_attendance_rows(self, employee_ids):
+        # Chỉ thay khối hàng của các nhân viên thay đổi thay vì dựng lại khóa cho mọi lần
+        # chấm công; vị trí mỗi khối là tổng số hàng của các nhân viên đứng trước
+        counts = self.attendance_row_counts
+        if counts is None:
+            self.update_attendance_tree(keep_position=True)
+            return
+        attendance = self.core.attendance
+        changes = []
+        start = 0
+        for employee_id, old_count in list(counts.items()):
+            if employee_id in employee_ids:
+                # Lần chấm công cũ hơn có thể được chèn vào giữa cột nên cả khối được thay
+                new_count = attendance.count(employee_id)
+                changes.append((start, old_count, [(employee_id, idx) for idx in range(new_count)]))
+                if new_count:
+                    counts[employee_id] = new_count
+                else:
+                    del counts[employee_id]
+            start += old_count
+        # Nhân viên lần đầu được chấm công nằm cuối kho chấm công
+        added = []
+        for employee_id in employee_ids:
+            if employee_id not in counts and attendance.count(employee_id):
+                counts[employee_id] = attendance.count(employee_id)
+                added.extend((employee_id, idx) for idx in range(counts[employee_id]))
+        if added:
+            changes.append((start, 0, added))
+        self.attendance_view.splice(changes)
+
+    def build_attendance_row(self, key, position):
+        employee_id, idx = key
+        check_in_time = format_datetime(self.core.attendance.timestamps(employee_id)[idx])
+        employee_info = self.employees.get(employee_id)
+        if employee_info:
+            return "", (employee_id, employee_info.department_id, employee_info.salary_id, employee_info.name, check_in_time)
+        return str(idx + 1), (employee_id, "N/A", "N/A", "N/A", check_in_time)
 
     def save_attendance_data(self):
-        with open("attendance.json", "w") as f:
-            # Chuyển đổi dữ liệu thời gian chấm công sang định dạng chuỗi
-            converted_attendance = {employee: [str(time) for time in times] for employee, times in self.attendance.items()}
-            json.dump(converted_attendance, f)
+        self.core.save_attendance()
 
-    # Phương thức load_attendance_data sẽ chuyển đổi dữ liệu thời gian từ chuỗi sang đối tượng datetime sau khi tải từ tệp JSON
     def load_attendance_data(self):
-        try:
-            with open("attendance.json", "r") as f:
-                converted_attendance = json.load(f)
-                # Chuyển đổi dữ liệu thời gian chấm công từ chuỗi sang đối tượng datetime
-                self.attendance = {employee: [datetime.fromisoformat(time) for time in times] for employee, times in converted_attendance.items()}
-                self.update_attendance_tree()  # Update attendance tree when loading data
-        except FileNotFoundError:
-            self.attendance = {}
-
-    def create_attendance_list(self):
-        for employee in self.employees:
-            self.select_employee_tree.insert("", "end", values=(employee.name, employee.employee_id, employee.department_id, employee.salary_id))
+        self.update_selection_list()
+        self.update_attendance_tree()  # Update attendance tree when loading data
+
+    def selection_filter(self):
+        department_id = self.select_department_variable.get()
+        return self.select_name_entry.get(), (None if department_id == ALL_DEPARTMENTS else department_id)
+
+    def schedule_selection_filter(self, event=None):
+        # Gõ liên tục chỉ lọc một lần sau khi ngừng gõ
+        if self.select_filter_job is not None:
+            self.after_cancel(self.select_filter_job)
+        self.select_filter_job = self.after(150, self.update_selection_list)
+
+    def update_selection_list(self):
+        self.select_filter_job = None
+        self.select_department_box.configure(values=[ALL_DEPARTMENTS] + self.employees.distinct("department_id"))
+        self.select_employee_view.set_rows(self.core.filter_employees(*self.selection_filter()))
+
+    def build_selection_row(self, key, position):
+        employee = self.employees.get_by_key(key)
+        return "", (employee.name, employee.employee_id, employee.department_id, employee.salary_id)
+
+    def on_employee_change(self, event, employee):
+        # Danh sách chọn nhân viên để chấm công chỉ sửa đúng một hàng mỗi lần thêm/sửa/xóa
+        if str(self.attendance_frame) not in self.filled_tabs:
+            return
+        view = self.select_employee_view
+        if event in ("load", "add_many"):
+            self.update_selection_list()
+            return
+        shown = employee.key in view
+        if event == "remove":
+            if shown:
+                view.delete(employee.key)
+        elif not self.core.employee_matches(employee, *self.selection_filter()):
+            if shown:
+                view.delete(employee.key)
+        elif not shown:
+            keys = view.keys()
+            view.insert(employee.key, bisect.bisect_left(keys, employee.key) if event == "update" else len(keys))
+        else:
+            view.refresh(employee.key)
+        self.select_department_box.configure(values=[ALL_DEPARTMENTS] + self.employees.distinct("department_id"))
 
 
 
     def add_employee(self):
+        if not self.ensure_loaded(self.add_employee, "employees"):
+            return
         employee_window = tk.Toplevel(self)
         employee_window.title("Thêm nhân viên")
 
@@ -875,42 +1410,55 @@ class EmployeeManagementApp(tk.Tk):
 
     def save_employee(self, name, position, employee_id, department_id, salary_id, dob, gender, ethnicity, id_number, id_issued_place):
         try:
-            dob = datetime.strptime(dob, "%d/%m/%Y")
+            dob = parse_datetime(dob)
             employee = Employee(employee_id, department_id, salary_id, name, dob, gender, ethnicity, id_number, id_issued_place, position)
-            self.employees.append(employee)
-            self.update_employee_tree()
-            self.update_activity_history(f"Thêm nhân viên: {name}")
-            self.save_data()
-            self.create_attendance_list()  # Update the attendance list
+            self.core.add_employee(employee)
+            if self.employee_sort:
+                self.update_employee_tree(keep_position=True)
+            else:
+                self.employee_view.insert(employee.key)
+            self.update_activity_history(f"Thêm nhân viên: {name}", "employee.add", employee_id)
+        except ConstraintError as e:
+            messagebox.showerror("Lỗi", str(e))
+            return
         except ValueError:
             messagebox.showerror("Lỗi", "Vui lòng nhập đúng định dạng cho các trường!")
             return
 
-    def update_employee_tree(self):
-        self.employee_tree.delete(*self.employee_tree.get_children())
-        for idx, employee in enumerate(self.employees, start=1):
-            dob_date = employee.dob.date()
-            self.employee_tree.insert("", "end", text=str(idx), values=(employee.name, employee.position, employee.employee_id, employee.department_id, employee.salary_id, dob_date, employee.gender, employee.ethnicity, employee.id_number, employee.id_issued_place))
+    def update_employee_tree(self, keep_position=False):
+        if self.employee_sort:
+            keys = self.core.employee_orders.order(*self.employee_sort)
+        else:
+            keys = [employee.key for employee in self.employees]
+        self.employee_view.set_rows(keys, keep_position=keep_position)
+        self.employee_tree.xview_moveto(0)
+        self.mark_sort_headings(self.employee_tree, EMPLOYEE_SORT_COLUMNS, self.employee_sort)
 
-        self.employee_tree.heading("#0", text="STT", anchor=tk.CENTER)
-        self.employee_tree.column("#0", anchor=tk.CENTER, width=70)
+    def refresh_employee_row(self, key):
+        # Khi đang sắp xếp, nhân viên vừa sửa có thể phải đổi chỗ
+        if self.employee_sort:
+            self.update_employee_tree(keep_position=True)
+        else:
+            self.employee_view.refresh(key)
 
-        columns = ("Name", "Position", "Employee ID", "Department ID", "Salary ID", "DOB", "Gender", "Ethnicity", "ID Number", "ID Issued Place")
-        for column in columns:
-            self.employee_tree.heading(column, anchor=tk.CENTER)
-            self.employee_tree.column(column, anchor=tk.CENTER, width=120)
-        
-        self.employee_tree.update()
-        self.employee_tree.yview_moveto(0)
-        self.employee_tree.xview_moveto(0)
+    def selected_employee(self):
+        # Nhân viên của hàng đang chọn, tra theo khóa gắn với hàng (không theo vị trí hiển thị)
+        keys = self.employee_view.selection_keys()
+        return self.employees.get_by_key(keys[0]) if keys else None
+
+    def build_employee_row(self, key, position):
+        employee = self.employees.get_by_key(key)
+        dob_date = format_date(employee.dob_timestamp)
+        return str(position + 1), (employee.name, employee.position, employee.employee_id, employee.department_id, employee.salary_id, dob_date, employee.gender, employee.ethnicity, employee.id_number, employee.id_issued_place)
 
     def edit_employee(self):
-        selected_item = self.employee_tree.selection()
-        if len(selected_item) == 0:
+        # Đổi mã nhân viên cập nhật cả danh sách gán dự án nên cần dự án đã tải xong
+        if not self.ensure_loaded(self.edit_employee, "employees", "projects"):
+            return
+        if not self.employee_view.selection_keys():
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn một nhân viên để sửa!")
             return
-        employee_id = self.employee_tree.item(selected_item)['text']
-        selected_employee = self.employees[int(employee_id) - 1]  # Trích xuất mã nhân viên để sửa
+        selected_employee = self.selected_employee()
         employee_window = tk.Toplevel(self)
         employee_window.title("Sửa nhân viên")
 
@@ -924,100 +1472,136 @@ class EmployeeManagementApp(tk.Tk):
             entry.grid(row=i, column=1, padx=10, pady=5)
             entries.append(entry)
 
-        for entry, value in zip(entries, [selected_employee.name, selected_employee.position, selected_employee.employee_id, selected_employee.department_id, selected_employee.salary_id, selected_employee.dob.strftime("%d/%m/%Y"), selected_employee.gender, selected_employee.ethnicity, selected_employee.id_number, selected_employee.id_issued_place]):
+        for entry, value in zip(entries, [selected_employee.name, selected_employee.position, selected_employee.employee_id, selected_employee.department_id, selected_employee.salary_id, format_display_date(selected_employee.dob_timestamp), selected_employee.gender, selected_employee.ethnicity, selected_employee.id_number, selected_employee.id_issued_place]):
             entry.insert(0, value)
 
-        update_button = tk.Button(employee_window, text="Cập nhật", command=lambda: self.update_employee(employee_id, *[entry.get() for entry in entries]), bg="#4CAF50", fg="white")
+        update_button = tk.Button(employee_window, text="Cập nhật", command=lambda: self.update_employee(selected_employee, *[entry.get() for entry in entries]), bg="#4CAF50", fg="white")
         update_button.grid(row=len(labels), columnspan=2, padx=10, pady=5)
 
     def delete_employee(self):
-        selected_item = self.employee_tree.selection()
-        if len(selected_item) == 0:
+        if not self.ensure_loaded(self.delete_employee, "employees", "projects"):
+            return
+        if not self.employee_view.selection_keys():
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn một nhân viên để xóa!")
             return
-        employee_id = self.employee_tree.item(selected_item)['text']
+        selected_employee = self.selected_employee()
         confirmed = messagebox.askyesno("Xác nhận", "Bạn có chắc chắn muốn xóa nhân viên này?")
         if confirmed:
-            deleted_employee = self.employees.pop(int(employee_id) - 1)
-            self.update_employee_tree()
-            self.update_activity_history(f"Xóa nhân viên: {deleted_employee.name}")
-            self.save_data()
-            self.create_attendance_list()  # Update the attendance list
-
-    def update_employee(self, selected_item, name, position, employee_id, department_id, salary_id, dob, gender, ethnicity, id_number, id_issued_place):
+            affected_projects = self.core.projects_for_employee(selected_employee.employee_id)
+            deleted_employee = self.core.remove_employee(selected_employee)
+            self.employee_view.delete(deleted_employee.key)
+            for project in affected_projects:
+                self.refresh_project_row(project.project_id)
+            self.update_activity_history(f"Xóa nhân viên: {deleted_employee.name}", "employee.delete", deleted_employee.employee_id)
+
+    def update_employee(self, selected_employee, name, position, employee_id, department_id, salary_id, dob, gender, ethnicity, id_number, id_issued_place):
         try:
-            selected_employee = self.employees[int(selected_item) - 1]  # Chuyển đổi selected_item sang kiểu int
-            dob = datetime.strptime(dob, "%d/%m/%Y")
-            selected_employee.name = name
-            selected_employee.position = position
-            selected_employee.employee_id = employee_id
-            selected_employee.department_id = department_id
-            selected_employee.salary_id = salary_id
-            selected_employee.dob = dob
-            selected_employee.gender = gender
-            selected_employee.ethnicity = ethnicity
-            selected_employee.id_number = id_number
-            selected_employee.id_issued_place = id_issued_place
-            self.update_employee_tree()
-            self.update_activity_history(f"Sửa thông tin nhân viên: {name}")
-            self.save_data()
-            self.create_attendance_list()  # Update the attendance list
+            dob = parse_datetime(dob)
+            # Cập nhật qua HRService để chỉ mục và dữ liệu chấm công luôn đồng bộ
+            self.core.update_employee(
+                selected_employee,
+                name=name,
+                position=position,
+                employee_id=employee_id,
+                department_id=department_id,
+                salary_id=salary_id,
+                dob=dob,
+                gender=gender,
+                ethnicity=ethnicity,
+                id_number=id_number,
+                id_issued_place=id_issued_place,
+            )
+            self.refresh_employee_row(selected_employee.key)
+            for project in self.core.projects_for_employee(selected_employee.employee_id):
+                self.refresh_project_row(project.project_id)
+            self.update_activity_history(f"Sửa thông tin nhân viên: {name}", "employee.update", selected_employee.employee_id)
+        except ConstraintError as e:
+            messagebox.showerror("Lỗi", str(e))
+            return
         except ValueError:
             messagebox.showerror("Lỗi", "Vui lòng nhập đúng định dạng cho các trường!")
             return
 
-    def update_activity_history(self, activity):
-        current_time = datetime.now()
-        activity_with_time = f"{current_time.strftime('%Y-%m-%d %H:%M:%S')} - {activity}"
-        if activity_with_time:  # Thêm điều kiện kiểm tra giá trị
-            self.activity_history.append(activity_with_time)
-            self.history_listbox.insert(tk.END, activity_with_time)
+    def update_activity_history(self, activity, action="", entity_id=None):
+        self.core.log_activity(activity, action, entity_id)
+
+    def show_activity(self, record):
+        # Tab lịch sử chưa vẽ thì mục mới sẽ có sẵn trong core.activity khi vẽ; đang lọc
+        # theo ngày thì không chen mục mới vào kết quả lọc
+        if str(self.history_frame) not in self.filled_tabs or self.history_filtered:
+            return
+        at_bottom = self.history_listbox.yview()[1] >= 1.0
+        self.history_listbox.insert(tk.END, format_record(record))
+        if at_bottom:
+            self.history_listbox.see(tk.END)
 
     def delete_attendance(self):
-        selected_items = self.attendance_tree.selection()
-        if not selected_items:
+        selected_keys = self.attendance_view.selection_keys(ordered=False)
+        if not selected_keys:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn ít nhất một nhân viên để xóa điểm danh!")
             return
 
-        for item in selected_items:
-            employee_name = self.attendance_tree.item(item, "values")[3]  # Lấy tên nhân viên từ mục đã chọn
-            if employee_name in self.attendance:
-                del self.attendance[employee_name]
-
-        self.update_attendance_tree()
-        self.save_attendance_data()
+        # Khóa mỗi hàng là (mã nhân viên, thứ tự lần chấm công)
+        employee_ids = dict.fromkeys(employee_id for employee_id, idx in selected_keys)
+        self.core.remove_attendance(employee_ids)
+        self.update_attendance_rows(employee_ids)
         messagebox.showinfo("Thông báo", "Đã xóa điểm danh cho các nhân viên đã chọn.")
 
     def save_data(self):
-        def default(obj):
-            if isinstance(obj, datetime):
-                return obj.strftime("%Y-%m-%d %H:%M:%S")
-            raise TypeError("Object of type {} is not JSON serializable".format(obj.__class__.__name__))
-        
-        data = {
-            "employees": [employee.__dict__ for employee in self.employees],
-            "attendance": {employee: [str(time) for time in times] for employee, times in self.attendance.items()},
-            "activity_history": self.activity_history
-        }
-        with open("employees.json", "w") as f:
-            json.dump(data, f, default=default)
-
-    def load_data(self):
+        self.core.flush()
+
+    def load_history_list(self):
+        # Chỉ hiện các mục gần nhất (đã có trong bộ nhớ); mục cũ hơn đọc khi cuộn lên
+        activity = self.core.activity
+        records = activity.recent()
+        self.show_history_page(records, len(activity) - len(records), activity.first_position(), False)
+
+    def show_history_page(self, records, start, floor, filtered):
+        self.history_start = start
+        self.history_floor = floor
+        self.history_filtered = filtered
+        self.history_listbox.delete(0, tk.END)
+        if records:
+            self.history_listbox.insert(tk.END, *[format_record(record) for record in records])
+        self.history_listbox.see(tk.END)
+
+    def on_history_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        if float(first) <= 0.0 and self.history_start > self.history_floor and str(self.history_frame) in self.filled_tabs:
+            self.after_idle(self.load_older_history)
+
+    def load_older_history(self):
+        if self.history_start <= self.history_floor or self.history_listbox.yview()[0] > 0.0:
+            return
+        start = max(self.history_floor, self.history_start - HISTORY_PAGE)
+        records = self.core.activity.read(start, self.history_start)
+        self.history_start = start
+        if records:
+            # Giữ nguyên dòng đang xem sau khi chèn trang cũ hơn lên đầu
+            self.history_listbox.insert(0, *[format_record(record) for record in records])
+            self.history_listbox.yview(len(records))
+
+    def filter_history(self):
         try:
-            with open("employees.json", "r") as f:
-                data = json.load(f)
-                self.employees = [Employee(**employee_data) for employee_data in data["employees"]]
-                for employee in self.employees:
-                    employee.dob = datetime.strptime(employee.dob, "%Y-%m-%d %H:%M:%S")
-                self.attendance = {employee: [datetime.fromisoformat(time) for time in times] for employee, times in data.get("attendance", {}).items()}
-                self.activity_history = data.get("activity_history", [])
-                self.attendance = data.get("attendance", {})
-                self.update_employee_tree()
-                self.update_attendance_tree()
-                for activity in self.activity_history:
-                    self.history_listbox.insert(tk.END, activity)
-        except FileNotFoundError:
-            self.employees = []
+            start_text = self.history_from_entry.get().strip()
+            end_text = self.history_to_entry.get().strip()
+            start_time = parse_day(start_text) * SECONDS_PER_DAY if start_text else None
+            # Ngày kết thúc tính trọn cả ngày
+            end_time = (parse_day(end_text) + 1) * SECONDS_PER_DAY - 1 if end_text else None
+        except ValueError:
+            messagebox.showerror("Lỗi", "Vui lòng nhập ngày theo định dạng YYYY-MM-DD!")
+            return
+        if start_time is None and end_time is None:
+            self.clear_history_filter()
+            return
+        low, high = self.core.activity.positions(start_time, end_time)
+        start = max(low, high - HISTORY_PAGE)
+        self.show_history_page(self.core.activity.read(start, high), start, low, True)
+
+    def clear_history_filter(self):
+        self.history_from_entry.delete(0, tk.END)
+        self.history_to_entry.delete(0, tk.END)
+        self.load_history_list()
 
 if __name__ == "__main__":
     app = EmployeeManagementApp()
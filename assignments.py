@@ -0,0 +1,73 @@
+class AssignmentIndex:
+    # Chỉ mục hai chiều dự án <-> nhân viên (theo project_id và employee_id), dùng tập hợp
+    # nên kiểm tra thành viên, số người mỗi dự án và danh sách dự án của một nhân viên
+    # đều không phải quét. Project.assigned_employees vẫn giữ thứ tự gán để lưu và hiển
+    # thị; HRService cập nhật cả hai cùng lúc.
+    def __init__(self):
+        self._employees_by_project = {}
+        self._projects_by_employee = {}
+
+    def load(self, projects):
+        # Bỏ các mã bị gán trùng trong dữ liệu cũ, giữ lần gán đầu tiên
+        self._employees_by_project = {}
+        self._projects_by_employee = {}
+        for project in projects:
+            project.assigned_employees = self.assign(project.project_id, project.assigned_employees)
+
+    def assign(self, project_id, employee_ids):
+        # Trả về các mã mới được gán (theo thứ tự, không trùng)
+        members = self._employees_by_project.setdefault(project_id, set())
+        added = []
+        for employee_id in employee_ids:
+            if employee_id not in members:
+                members.add(employee_id)
+                self._projects_by_employee.setdefault(employee_id, set()).add(project_id)
+                added.append(employee_id)
+        return added
+
+    def unassign(self, project_id, employee_id):
+        members = self._employees_by_project.get(project_id)
+        if not members or employee_id not in members:
+            return False
+        members.discard(employee_id)
+        self._discard_project(employee_id, project_id)
+        return True
+
+    def remove_project(self, project_id):
+        for employee_id in self._employees_by_project.pop(project_id, ()):
+            self._discard_project(employee_id, project_id)
+
+    def remove_employee(self, employee_id):
+        # Trả về các project_id bị ảnh hưởng
+        project_ids = self._projects_by_employee.pop(employee_id, set())
+        for project_id in project_ids:
+            self._employees_by_project[project_id].discard(employee_id)
+        return project_ids
+
+    def rename_employee(self, old_employee_id, new_employee_id):
+        project_ids = self.remove_employee(old_employee_id)
+        for project_id in project_ids:
+            self.assign(project_id, [new_employee_id])
+        return project_ids
+
+    def employees_of(self, project_id):
+        return self._employees_by_project.get(project_id, frozenset())
+
+    def projects_of(self, employee_id):
+        return self._projects_by_employee.get(employee_id, frozenset())
+
+    def is_assigned(self, project_id, employee_id):
+        return employee_id in self._employees_by_project.get(project_id, ())
+
+    def headcount(self, project_id):
+        return len(self._employees_by_project.get(project_id, ()))
+
+    def headcounts(self):
+        return {project_id: len(members) for project_id, members in self._employees_by_project.items()}
+
+    def _discard_project(self, employee_id, project_id):
+        project_ids = self._projects_by_employee.get(employee_id)
+        if project_ids is not None:
+            project_ids.discard(project_id)
+            if not project_ids:
+                del self._projects_by_employee[employee_id]
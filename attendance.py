@@ -0,0 +1,334 @@
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from calendar import monthrange
+from datetime import time
+
+from bulk import read_rows
+from temporal import SECONDS_PER_DAY, format_display_day, from_timestamp, parse_datetime, parse_timestamp, to_day, to_timestamp
+
+
+# Chấm công sau giờ này được tính là đi muộn
+WORK_START = time(8, 0)
+
+# Định dạng tệp attendance.bin (little-endian):
+#   header    : magic "ATT1", số nhân viên (uint32), tổng số lần chấm công (uint64)
+#   directory : với mỗi nhân viên: độ dài mã (uint16), mã NV (utf-8),
+#               vị trí bắt đầu và số phần tử trong khối dữ liệu (2 x uint64)
+#   padding   : tới bội số của 8 byte
+#   data      : các mốc thời gian int64 (giây kể từ 1970-01-01), liên tiếp theo nhân viên
+MAGIC = b"ATT1"
+HEADER = struct.Struct("<4sIQ")
+ENTRY = struct.Struct("<QQ")
+
+
+class AttendanceStore:
+    # Lưu chấm công theo cột: mỗi mã nhân viên ứng với một mảng int64 đã sắp xếp.
+    # Khi nạp từ tệp nhị phân, các cột chỉ là vùng nhớ ánh xạ (mmap) chỉ đọc và
+    # được chép sang array('q') ở lần ghi đầu tiên.
+    def __init__(self):
+        self._columns = {}
+        self._mmap = None
+        # Tên trong dữ liệu cũ không khớp nhân viên nào: {tên: số lượt chấm công bị bỏ qua}
+        self.unresolved = {}
+
+    def __contains__(self, employee_id):
+        return employee_id in self._columns
+
+    def __len__(self):
+        return len(self._columns)
+
+    def employee_ids(self):
+        return list(self._columns)
+
+    def items(self):
+        return self._columns.items()
+
+    def event_count(self):
+        return sum(len(column) for column in self._columns.values())
+
+    def timestamps(self, employee_id):
+        return self._columns.get(employee_id, ())
+
+    def check_ins(self, employee_id):
+        return [from_timestamp(timestamp) for timestamp in self.timestamps(employee_id)]
+
+    def count(self, employee_id):
+        return len(self._columns.get(employee_id, ()))
+
+    def last(self, employee_id):
+        column = self._columns.get(employee_id)
+        return from_timestamp(column[-1]) if column else None
+
+    def range(self, employee_id, start=None, end=None):
+        # Các lần chấm công trong [start, end) tìm bằng bisect trên cột đã sắp xếp
+        column = self._columns.get(employee_id, ())
+        low = 0 if start is None else bisect.bisect_left(column, to_timestamp(start))
+        high = len(column) if end is None else bisect.bisect_left(column, to_timestamp(end))
+        return [from_timestamp(column[index]) for index in range(low, high)]
+
+    def has_check_in_on(self, employee_id, day):
+        column = self._columns.get(employee_id, ())
+        start = to_day(day) * SECONDS_PER_DAY
+        position = bisect.bisect_left(column, start)
+        return position < len(column) and column[position] < start + SECONDS_PER_DAY
+
+    def add(self, employee_id, moment):
+        # Trả về vị trí của lần chấm công mới trong cột của nhân viên; moment là datetime
+        # hoặc số giây (temporal.to_timestamp)
+        timestamp = moment if isinstance(moment, int) else to_timestamp(moment)
+        column = self._writable(employee_id)
+        if not column or column[-1] <= timestamp:
+            column.append(timestamp)
+            return len(column) - 1
+        position = bisect.bisect_right(column, timestamp)
+        column.insert(position, timestamp)
+        return position
+
+    def remove_employee(self, employee_id):
+        self._columns.pop(employee_id, None)
+
+    def rename_employee(self, old_employee_id, new_employee_id):
+        column = self._columns.pop(old_employee_id, None)
+        if column is None:
+            return
+        if new_employee_id in self._columns:
+            merged = sorted(list(self._columns[new_employee_id]) + list(column))
+            column = array("q", merged)
+        self._columns[new_employee_id] = column
+
+    def save(self, path):
+        # Đọc hết các cột còn nằm trên mmap trước khi thay tệp cũ
+        for employee_id in list(self._columns):
+            self._writable(employee_id)
+        self.close()
+
+        encoded = [(employee_id.encode("utf-8"), column) for employee_id, column in self._columns.items()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(encoded), sum(len(column) for _, column in encoded)))
+            offset = 0
+            for encoded_id, column in encoded:
+                f.write(struct.pack("<H", len(encoded_id)) + encoded_id + ENTRY.pack(offset, len(column)))
+                offset += len(column)
+            f.write(b"\0" * (-f.tell() % 8))
+            for _, column in encoded:
+                column.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return store
+            store._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = store._mmap
+        magic, employee_count, _ = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            store.close()
+            raise ValueError(f"{path} không phải tệp chấm công hợp lệ")
+        position = HEADER.size
+        directory = []
+        for _ in range(employee_count):
+            (length,) = struct.unpack_from("<H", buffer, position)
+            position += 2
+            employee_id = bytes(buffer[position:position + length]).decode("utf-8")
+            position += length
+            directory.append((employee_id,) + ENTRY.unpack_from(buffer, position))
+            position += ENTRY.size
+        position += -position % 8
+        data = memoryview(buffer)[position:].cast("q")
+        for employee_id, offset, count in directory:
+            store._columns[employee_id] = data[offset:offset + count]
+        return store
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        # pairs: các cặp (mã NV, mốc thời gian) đã sắp theo mã NV rồi theo thời gian
+        store = cls()
+        for employee_id, timestamp in pairs:
+            store._writable(employee_id).append(timestamp)
+        return store
+
+    @classmethod
+    def from_legacy(cls, attendance, resolve_employee_id):
+        # attendance: {tên nhân viên: [chuỗi thời gian]} theo định dạng attendance.json cũ
+        store = cls()
+        for name, times in attendance.items():
+            employee_id = resolve_employee_id(name)
+            if employee_id is None:
+                store.unresolved[name] = len(times)
+                continue
+            for moment in times:
+                store.add(employee_id, parse_timestamp(str(moment)))
+        return store
+
+    def snapshot(self):
+        # Bản sao độc lập để luồng nền ghi tệp trong khi cột gốc vẫn tiếp tục thay đổi
+        self.close()
+        store = AttendanceStore()
+        store._columns = {employee_id: array("q", column) for employee_id, column in self._columns.items()}
+        return store
+
+    def close(self):
+        if self._mmap is not None:
+            self._columns = {employee_id: array("q", column.tobytes()) if not isinstance(column, array) else column for employee_id, column in self._columns.items()}
+            self._mmap.close()
+            self._mmap = None
+
+    def _writable(self, employee_id):
+        column = self._columns.get(employee_id)
+        if column is None:
+            column = self._columns[employee_id] = array("q")
+        elif not isinstance(column, array):
+            column = self._columns[employee_id] = array("q", column.tobytes())
+        return column
+
+
+
+class MonthlyAttendance:
+    # Tổng hợp chấm công của một nhân viên trong một tháng
+    def __init__(self):
+        self.days = set()
+        self.first_check_in = None
+        self.last_check_in = None
+        self.late_count = 0
+
+    @property
+    def days_present(self):
+        return len(self.days)
+
+
+class AttendanceAggregates:
+    # Chỉ mục tổng hợp theo (mã nhân viên, tháng) được cập nhật dần mỗi lần chấm công,
+    # để kỳ tính lương không phải quét lại toàn bộ danh sách thời gian chấm công.
+    # version tăng sau mỗi thay đổi để các báo cáo biết lúc cần tính lại.
+    def __init__(self, work_start=WORK_START):
+        self.work_start = work_start
+        self.version = 0
+        self._by_employee = {}
+
+    def rebuild(self, store):
+        # Các cột đã sắp xếp: duyệt bằng số học trên số giây. Tháng của từng ngày được nhớ
+        # lại nên datetime chỉ được tạo cho lần chấm công đầu/cuối mỗi tháng.
+        self._by_employee = {}
+        self.version += 1
+        late_after = self.work_start.hour * 3600 + self.work_start.minute * 60 + self.work_start.second
+        month_of_day = {}
+        for employee_id, column in store.items():
+            months = {}
+            stats = None
+            month_start = month_end = previous_day = None
+            first_timestamp = last_timestamp = None
+            for timestamp in column:
+                day = timestamp // SECONDS_PER_DAY
+                if stats is None or not month_start <= day < month_end:
+                    if stats is not None:
+                        stats.last_check_in = from_timestamp(last_timestamp)
+                    month = month_of_day.get(day)
+                    if month is None:
+                        moment = from_timestamp(day * SECONDS_PER_DAY)
+                        first_day = day - moment.day + 1
+                        month = month_of_day[day] = (moment.strftime("%Y-%m"), first_day, first_day + monthrange(moment.year, moment.month)[1])
+                    period, month_start, month_end = month
+                    stats = months.get(period)
+                    if stats is None:
+                        stats = months[period] = MonthlyAttendance()
+                        stats.first_check_in = from_timestamp(timestamp)
+                        first_timestamp = timestamp
+                if day != previous_day:
+                    stats.days.add(day - month_start + 1)
+                    if timestamp - day * SECONDS_PER_DAY > late_after:
+                        stats.late_count += 1
+                    previous_day = day
+                last_timestamp = timestamp
+            if stats is not None:
+                stats.last_check_in = stats.first_check_in if last_timestamp == first_timestamp else from_timestamp(last_timestamp)
+                self._by_employee[employee_id] = months
+
+    def add(self, employee_id, check_in):
+        self.version += 1
+        months = self._by_employee.setdefault(employee_id, {})
+        period = check_in.strftime("%Y-%m")
+        stats = months.get(period)
+        if stats is None:
+            stats = months[period] = MonthlyAttendance()
+        day = check_in.day
+        if day not in stats.days:
+            stats.days.add(day)
+            if check_in.time() > self.work_start:
+                stats.late_count += 1
+        if stats.first_check_in is None or check_in < stats.first_check_in:
+            stats.first_check_in = check_in
+        if stats.last_check_in is None or check_in > stats.last_check_in:
+            stats.last_check_in = check_in
+
+    def rename_employee(self, old_employee_id, new_employee_id):
+        months = self._by_employee.pop(old_employee_id, None)
+        self.version += 1
+        if months is not None:
+            self._by_employee[new_employee_id] = months
+
+    def remove_employee(self, employee_id):
+        self.version += 1
+        self._by_employee.pop(employee_id, None)
+
+    def get(self, employee_id, period):
+        return self._by_employee.get(employee_id, {}).get(period)
+
+    def days_present(self, employee_id, period):
+        stats = self.get(employee_id, period)
+        return stats.days_present if stats else 0
+
+    def late_count(self, employee_id, period):
+        stats = self.get(employee_id, period)
+        return stats.late_count if stats else 0
+
+
+class CheckInResult:
+    def __init__(self):
+        self.recorded = []
+        self.skipped = []
+
+
+def check_in_many(store, aggregates, entries, get_employee):
+    # entries: các cặp (mã NV, thời điểm). Kiểm tra toàn bộ trước, ghi nhận trong một lượt;
+    # việc cập nhật giao diện và lưu trữ do nơi gọi thực hiện đúng một lần.
+    result = CheckInResult()
+    seen = set()
+    for employee_id, moment in entries:
+        if get_employee(employee_id) is None:
+            result.skipped.append((employee_id, "không tồn tại"))
+            continue
+        day = moment.date()
+        if (employee_id, day) in seen or store.has_check_in_on(employee_id, day):
+            result.skipped.append((employee_id, f"đã được chấm công ngày {format_display_day(to_day(day))}"))
+            continue
+        seen.add((employee_id, day))
+        store.add(employee_id, moment)
+        aggregates.add(employee_id, moment)
+        result.recorded.append((employee_id, moment))
+    return result
+
+
+def read_badge_file(path):
+    # Tệp từ máy chấm công (CSV, XLSX hoặc JSONL): cột employee_id và timestamp
+    # ("YYYY-MM-DD HH:MM:SS" hoặc ISO). Trả về (các cặp hợp lệ, các lỗi theo số dòng).
+    entries = []
+    errors = []
+    for line_number, row in read_rows(path, errors):
+        employee_id = (row.get("employee_id") or "").strip()
+        timestamp = (row.get("timestamp") or "").strip()
+        if not employee_id or not timestamp:
+            errors.append((line_number, "thiếu employee_id hoặc timestamp"))
+            continue
+        try:
+            entries.append((employee_id, parse_datetime(timestamp)))
+        except ValueError:
+            errors.append((line_number, f"thời gian không hợp lệ: {timestamp}"))
+    return entries, errors
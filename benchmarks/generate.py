@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from attendance import AttendanceStore
+from journal import write_atomic
+from temporal import to_timestamp
+
+
+# Sinh dữ liệu giả lập giống dữ liệu thật (tên tiếng Việt, mã trùng định dạng, chấm công
+# ngày làm việc, bảng lương theo tháng). Cùng seed luôn cho cùng bộ tệp.
+
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ", "Hồ", "Ngô", "Dương", "Lý"]
+MIDDLE_NAMES = ["Văn", "Thị", "Hữu", "Minh", "Thu", "Ngọc", "Đức", "Thanh", "Quốc", "Hoài"]
+GIVEN_NAMES = ["An", "Bình", "Chi", "Dũng", "Giang", "Hà", "Hải", "Hùng", "Khánh", "Lan", "Linh", "Mai", "Nam", "Phúc", "Quang", "Sơn", "Tâm", "Thảo", "Trang", "Tuấn", "Vy", "Yến"]
+DEPARTMENTS = [("KT", "Kế Toán"), ("NS", "Nhân Sự"), ("MKT", "Marketing"), ("KD", "Kinh Doanh"), ("IT", "Công Nghệ")]
+POSITIONS = ["Nhân Viên", "Nhân Viên", "Nhân Viên", "Trưởng Nhóm", "Trưởng Phòng"]
+PLACES = ["Hà Nội", "Hồ Chí Minh", "Đà Nẵng", "Quảng Ngãi", "Cần Thơ", "Huế"]
+STATUSES = ["Đang Thực Hiện", "Hoàn Thành", "Tạm Dừng", ""]
+
+
+def generate_employees(rng, count):
+    employees = []
+    for key in range(1, count + 1):
+        prefix, department = rng.choice(DEPARTMENTS)
+        dob = datetime(1965, 1, 1) + timedelta(days=rng.randrange(365 * 40))
+        hired = datetime(2010, 1, 1) + timedelta(seconds=rng.randrange(14 * 365 * 86400))
+        employees.append({
+            "key": key,
+            "employee_id": f"{prefix}{key:06d}",
+            "department_id": department,
+            "salary_id": str(rng.randrange(5, 40) * 1000000),
+            "name": f"{rng.choice(FAMILY_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}",
+            "dob": dob.strftime("%Y-%m-%d %H:%M:%S"),
+            "gender": rng.choice(["Nam", "Nữ"]),
+            "ethnicity": "Kinh",
+            "id_number": str(rng.randrange(10 ** 11, 10 ** 12)),
+            "id_issued_place": rng.choice(PLACES),
+            "position": rng.choice(POSITIONS),
+            "hired_date": hired.strftime("%Y-%m-%d %H:%M:%S")
+        })
+    return employees
+
+
+def generate_attendance(rng, employees, count, start):
+    # count lượt chấm công rải đều cho các nhân viên, mỗi người một lượt mỗi ngày làm việc
+    per_employee = max(1, count // max(1, len(employees)))
+    pairs = []
+    for employee in employees:
+        day = start
+        for _ in range(per_employee):
+            while day.weekday() >= 5:
+                day += timedelta(days=1)
+            moment = day + timedelta(hours=7, minutes=rng.randrange(0, 90), seconds=rng.randrange(60))
+            pairs.append((employee["employee_id"], to_timestamp(moment)))
+            day += timedelta(days=1)
+            if len(pairs) >= count:
+                break
+        if len(pairs) >= count:
+            break
+    pairs.sort()
+    return AttendanceStore.from_pairs(pairs)
+
+
+def generate_salary(rng, employees, count, start):
+    lines = []
+    month = start
+    while len(lines) < count:
+        period = month.strftime("%Y-%m")
+        calculation_time = (month + timedelta(days=27, hours=17)).strftime("%Y-%m-%d %H:%M:%S")
+        for employee in employees:
+            base = float(employee["salary_id"])
+            lines.append(json.dumps({
+                "name": employee["name"],
+                "employee_id": employee["employee_id"],
+                "department_id": employee["department_id"],
+                "salary_id": employee["salary_id"],
+                "total_salary": base + rng.randrange(-5, 20) * 100000,
+                "calculation_time": calculation_time,
+                "period": period
+            }) + "\n")
+            if len(lines) >= count:
+                break
+        month = (month + timedelta(days=32)).replace(day=1)
+    return "".join(lines)
+
+
+def generate_projects(rng, employees, count):
+    projects = []
+    for project_id in range(1, count + 1):
+        start = datetime(2023, 1, 1) + timedelta(days=rng.randrange(700))
+        team = rng.sample(employees, min(len(employees), rng.randrange(3, 15)))
+        projects.append({
+            "project_id": project_id,
+            "name": f"Dự Án {project_id}",
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": (start + timedelta(days=rng.randrange(14, 400))).strftime("%Y-%m-%d"),
+            "description": f"Dự án {rng.choice(['nội bộ', 'khách hàng', 'nghiên cứu'])} của phòng {team[0]['department_id']}",
+            "status": rng.choice(STATUSES),
+            "assigned_employees": [employee["employee_id"] for employee in team]
+        })
+    return projects
+
+
+def generate_dataset(directory, size, seed=0):
+    # Mỗi tệp có khoảng `size` bản ghi: nhân viên, lượt chấm công, dòng lương;
+    # số dự án bằng 1% số nhân viên (ít nhất 10).
+    rng = random.Random(f"{seed}-{size}")
+    os.makedirs(directory, exist_ok=True)
+    start = datetime(2024, 1, 1)
+
+    employees = generate_employees(rng, size)
+    write_atomic(os.path.join(directory, "employees.json"), {
+        "employees": employees,
+        "attendance": {},
+        "activity_history": [f"2024-01-01 08:00:00 - Thêm nhân viên: {employee['name']}" for employee in employees[:1000]]
+    }, ensure_ascii=False)
+    generate_attendance(rng, employees, size, start).save(os.path.join(directory, "attendance.bin"))
+    with open(os.path.join(directory, "salary.json"), "w") as f:
+        f.write(generate_salary(rng, employees, size, start))
+    write_atomic(os.path.join(directory, "projects.json"), generate_projects(rng, employees, max(10, size // 100)), indent=4)
+    return directory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh bộ dữ liệu giả lập cho benchmark")
+    parser.add_argument("directory")
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate_dataset(args.directory, args.size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
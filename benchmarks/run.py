@@ -0,0 +1,355 @@
+import argparse
+import gc
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.generate import generate_dataset
+from core import DATASETS, HRService
+from io_worker import SyncExecutor
+from salary_log import SalaryLog
+from storage import JsonStorage
+
+
+# Chạy các thao tác dữ liệu chính trên bộ dữ liệu giả lập, đo thời gian và bộ nhớ đỉnh,
+# rồi so với baseline.json để phát hiện chậm đi. Ví dụ:
+#   python -m benchmarks.run                       (1k, 10k, 100k)
+#   python -m benchmarks.run --sizes 1000000       (1M bản ghi, mất vài phút)
+#   python -m benchmarks.run --save-baseline       (ghi lại baseline sau khi tối ưu)
+# Có màn hình (hoặc chạy qua xvfb-run) thì đo thêm các bảng Treeview của ứng dụng.
+# Số liệu phụ thuộc máy: baseline nên được ghi lại trên chính máy dùng để so sánh.
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def loaded_service(directory, datasets=DATASETS):
+    service = HRService(JsonStorage(directory), SyncExecutor())
+    for dataset in datasets:
+        service.apply(dataset, service.read(dataset))
+    return service
+
+
+# Mỗi thao tác nhận thư mục dữ liệu, chuẩn bị trạng thái cần thiết và trả về
+# (hàm cần đo, hàm dọn dẹp); chỉ hàm thứ nhất được tính giờ.
+
+def bench_load_data(directory):
+    service = HRService(JsonStorage(directory), SyncExecutor())
+    return (lambda: service.apply("employees", service.read("employees"))), service.close
+
+
+def bench_load_attendance_data(directory):
+    service = loaded_service(directory, ("employees",))
+    return (lambda: service.apply("attendance", service.read("attendance"))), service.close
+
+
+def bench_load_project_data(directory):
+    service = HRService(JsonStorage(directory), SyncExecutor())
+    return (lambda: service.apply("projects", service.read("projects"))), service.close
+
+
+def bench_load_salary_data_cold(directory):
+    # Lần mở đầu tiên: chưa có salary.json.idx, phải quét toàn bộ tệp
+    path = os.path.join(directory, "salary.json")
+
+    def load():
+        if os.path.exists(path + ".idx"):
+            os.remove(path + ".idx")
+        SalaryLog(path).refresh()
+
+    return load, None
+
+
+def bench_load_salary_data_warm(directory):
+    path = os.path.join(directory, "salary.json")
+    salary_log = SalaryLog(path)
+    salary_log.refresh()
+    salary_log.close()
+    return (lambda: SalaryLog(path).refresh()), None
+
+
+def bench_save_data(directory):
+    service = loaded_service(directory, ("employees",))
+    return service.flush, service.close
+
+
+def bench_save_attendance_data(directory):
+    service = loaded_service(directory, ("employees", "attendance"))
+    return service.save_attendance, service.close
+
+
+def bench_check_in_batch(directory):
+    # Một lô 1000 lượt chấm công từ máy chấm công, gồm cả lần lưu tệp
+    service = loaded_service(directory, ("employees", "attendance"))
+    moment = datetime(2030, 1, 2, 7, 45)
+    entries = [(employee.employee_id, moment) for employee in list(service.employees)[:1000]]
+    return (lambda: service.check_in(entries)), service.close
+
+
+def bench_export_employees(directory):
+    service = loaded_service(directory, ("employees",))
+    path = os.path.join(directory, "export.csv")
+    return (lambda: service.export_employees(path)), service.close
+
+
+def bench_import_employees(directory):
+    # Nhập toàn bộ nhân viên của bộ dữ liệu (đã xuất ra CSV) vào một kho trống, gồm cả lần ghi lô
+    path = os.path.join(directory, "import.csv")
+    source = loaded_service(directory, ("employees",))
+    source.export_employees(path)
+    source.close()
+
+    def run():
+        service = HRService(JsonStorage(tempfile.mkdtemp(dir=directory)), SyncExecutor())
+        try:
+            imported, errors = service.import_employees(path)
+        finally:
+            service.close()
+        return imported
+
+    return run, None
+
+
+def bench_sort_employees(directory):
+    # Luân phiên các tiêu chí như người dùng đổi cách sắp xếp. Thứ tự được tính sẵn và
+    # cập nhật dần nên chỉ lần đầu của mỗi tiêu chí phải sắp thật.
+    service = loaded_service(directory, ("employees",))
+    specs = itertools.cycle([("name",), ("dob",), ("employee_id",), (("department_id", False), ("salary", True))])
+    return (lambda: service.employee_orders.order(*next(specs))), service.close
+
+
+def bench_search_employees(directory):
+    service = loaded_service(directory, ("employees",))
+    queries = ["nguyen van", "tran thi lan", "KT0001", "trang", "hung", "ke toan tuan", "dugn", "truong phong"]
+    return (lambda: [service.search_employees(query) for query in queries]), service.close
+
+
+def bench_assign_employees(directory):
+    # Gán 100 nhân viên vào một dự án rồi lưu projects.json. Nhân viên đã gán thì bị bỏ qua,
+    # nên mỗi lần đo gán vào một dự án chưa có ai trong nhóm này.
+    service = loaded_service(directory, ("employees", "projects"))
+    employee_ids = [employee.employee_id for employee in list(service.employees)[:100]]
+    projects = iter([service.add_project(f"Benchmark {number}", datetime(2030, 1, 1), datetime(2030, 12, 31), "") for number in range(50)])
+    return (lambda: service.assign_employees(next(projects), employee_ids)), service.close
+
+
+def bench_run_payroll(directory):
+    service = loaded_service(directory)
+    return (lambda: service.run_payroll("2024-01")), service.close
+
+
+def bench_reports(directory):
+    # Tính lại mọi báo cáo tổng hợp (bỏ kết quả đã nhớ); các tổng hợp bên dưới được cập nhật dần
+    service = loaded_service(directory)
+
+    def run():
+        service.reports.invalidate()
+        return [service.reports.run(kind, "2024-01") for kind in service.reports.KINDS]
+
+    return run, service.close
+
+
+def bench_verify_integrity(directory):
+    # Quét toàn bộ dữ liệu tìm vi phạm ràng buộc (mỗi bộ dữ liệu một lượt)
+    service = loaded_service(directory)
+    return service.verify_integrity, service.close
+
+
+OPERATIONS = {
+    "load_data": bench_load_data,
+    "load_attendance_data": bench_load_attendance_data,
+    "load_project_data": bench_load_project_data,
+    "load_salary_data_cold": bench_load_salary_data_cold,
+    "load_salary_data_warm": bench_load_salary_data_warm,
+    "save_data": bench_save_data,
+    "save_attendance_data": bench_save_attendance_data,
+    "check_in_batch": bench_check_in_batch,
+    "sort_employees": bench_sort_employees,
+    "search_employees": bench_search_employees,
+    "assign_employees": bench_assign_employees,
+    "run_payroll": bench_run_payroll,
+    "reports": bench_reports,
+    "export_employees": bench_export_employees,
+    "import_employees": bench_import_employees,
+    "verify_integrity": bench_verify_integrity,
+}
+
+
+def gui_available():
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        return False
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def gui_operations(directory):
+    # Đo chính các phương thức vẽ bảng của ứng dụng trên cửa sổ ẩn
+    from app import EmployeeManagementApp
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        app = EmployeeManagementApp()
+    finally:
+        os.chdir(cwd)
+    app.withdraw()
+    app.io.flush()
+    app.io.poll()
+    app.update()
+
+    def close():
+        app.core.close()
+        app.destroy()
+
+    operations = {
+        "gui_update_employee_tree": app.update_employee_tree,
+        "gui_update_attendance_tree": lambda: (app.load_attendance_data(), app.update()),
+        "gui_update_salary_tree": lambda: (app.update_salary_tree(), app.update()),
+        "gui_sort_employees": lambda: (app.sort_employees("Tên"), app.update()),
+        "gui_update_project_tree": lambda: (app.update_project_tree(), app.update()),
+    }
+    return operations, close
+
+
+def measure(func, repeat, memory):
+    # Thời gian tốt nhất sau `repeat` lần, rồi một lần riêng có tracemalloc để lấy bộ nhớ đỉnh
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    result = {"seconds": best}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        func()
+        result["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def run_size(size, operations, repeat, memory, seed, gui, keep=None):
+    directory = keep or tempfile.mkdtemp(prefix=f"hr-bench-{size}-")
+    source = os.path.join(directory, "source")
+    results = {}
+    try:
+        started = time.perf_counter()
+        generate_dataset(source, size, seed)
+        print(f"[{size}] sinh dữ liệu: {time.perf_counter() - started:.1f} s", file=sys.stderr)
+        for name in operations:
+            # Mỗi thao tác chạy trên bản sao dữ liệu gốc để không ảnh hưởng lẫn nhau
+            work = os.path.join(directory, name)
+            shutil.copytree(source, work, dirs_exist_ok=True)
+            func, cleanup = OPERATIONS[name](work)
+            try:
+                results[name] = measure(func, repeat, memory)
+            finally:
+                if cleanup is not None:
+                    cleanup()
+            print(f"[{size}] {name}: {results[name]['seconds'] * 1000:.1f} ms", file=sys.stderr)
+        if gui:
+            work = os.path.join(directory, "gui")
+            shutil.copytree(source, work, dirs_exist_ok=True)
+            gui_funcs, close = gui_operations(work)
+            try:
+                for name, func in gui_funcs.items():
+                    results[name] = measure(func, repeat, memory)
+                    print(f"[{size}] {name}: {results[name]['seconds'] * 1000:.1f} ms", file=sys.stderr)
+            finally:
+                close()
+    finally:
+        if keep is None:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance, min_seconds=0.005, min_kb=256):
+    # Chậm hơn (hoặc tốn bộ nhớ hơn) baseline quá `tolerance`, bỏ qua chênh lệch nhỏ do nhiễu
+    regressions = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if result["seconds"] > base["seconds"] * (1 + tolerance) and result["seconds"] - base["seconds"] > min_seconds:
+                regressions.append((size, name, "thời gian", base["seconds"] * 1000, result["seconds"] * 1000, "ms"))
+            if "peak_kb" in result and "peak_kb" in base:
+                if result["peak_kb"] > base["peak_kb"] * (1 + tolerance) and result["peak_kb"] - base["peak_kb"] > min_kb:
+                    regressions.append((size, name, "bộ nhớ", base["peak_kb"], result["peak_kb"], "KB"))
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"{'cỡ':>8}  {'thao tác':<28} {'thời gian (ms)':>14} {'baseline':>10} {'bộ nhớ (KB)':>12}")
+    for size, operations in results.items():
+        for name, result in operations.items():
+            base = baseline.get(size, {}).get(name)
+            base_text = f"{base['seconds'] * 1000:.1f}" if base else "-"
+            peak = f"{result['peak_kb']:.0f}" if "peak_kb" in result else "-"
+            print(f"{size:>8}  {name:<28} {result['seconds'] * 1000:>14.1f} {base_text:>10} {peak:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark các luồng dữ liệu của ứng dụng quản lý nhân viên")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", help="chỉ chạy các thao tác này (phân tách bằng dấu phẩy)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="bỏ qua đo bộ nhớ đỉnh")
+    parser.add_argument("--no-gui", action="store_true", help="không đo Treeview kể cả khi có màn hình")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="ghi kết quả lần chạy này làm baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="mức chậm đi cho phép so với baseline (0.25 = 25%%)")
+    parser.add_argument("--output", help="ghi kết quả ra tệp JSON")
+    parser.add_argument("--keep", help="giữ dữ liệu sinh ra trong thư mục này (chỉ dùng với một cỡ)")
+    args = parser.parse_args(argv)
+
+    operations = args.only.split(",") if args.only else list(OPERATIONS)
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"không có thao tác: {', '.join(unknown)}")
+    gui = not args.no_gui and gui_available()
+    if not gui:
+        print("Không có màn hình: bỏ qua các phép đo Treeview", file=sys.stderr)
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = run_size(size, operations, args.repeat, not args.no_memory, args.seed, gui, args.keep)
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        for size, operations_result in results.items():
+            baseline.setdefault(size, {}).update(operations_result)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for size, name, kind, before, after, unit in regressions:
+        print(f"CHẬM ĐI [{size}] {name} ({kind}): {before:.1f} -> {after:.1f} {unit}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+from datetime import date, datetime
+
+from temporal import format_date, format_datetime, to_timestamp
+
+
+# Đọc/ghi bảng dữ liệu từng dòng một (CSV, JSONL, XLSX) nên bộ nhớ không phụ thuộc
+# kích thước tệp. Định dạng chọn theo đuôi tệp; XLSX cần openpyxl, chỉ nạp khi dùng tới.
+FORMATS = (".csv", ".jsonl", ".xlsx")
+FILE_TYPES = [("CSV", "*.csv"), ("Excel", "*.xlsx"), ("JSON Lines", "*.jsonl"), ("Tất cả", "*.*")]
+
+
+def file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Không hỗ trợ định dạng tệp: {extension or path} (chỉ {', '.join(FORMATS)})")
+    return extension
+
+
+def load_openpyxl():
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("Cần cài openpyxl để đọc/ghi tệp .xlsx (pip install openpyxl)") from None
+    return openpyxl
+
+
+def cell_text(value):
+    # Ô Excel/JSON có thể là số hoặc ngày: đưa về chuỗi như khi đọc từ CSV
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return format_datetime(to_timestamp(value))
+    if isinstance(value, date):
+        return format_date(to_timestamp(value))
+    return str(value)
+
+
+def read_rows(path, errors):
+    # Sinh (số dòng, dict tên cột -> chuỗi); dòng không đọc được thì ghi vào errors và bỏ qua.
+    # Số dòng tính như khi mở tệp (CSV/XLSX có dòng tiêu đề là dòng 1).
+    extension = file_format(path)
+    if extension == ".csv":
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            yield from enumerate(csv.DictReader(f), start=2)
+    elif extension == ".jsonl":
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    errors.append((line_number, f"JSON không hợp lệ: {e.msg}"))
+                    continue
+                if not isinstance(row, dict):
+                    errors.append((line_number, "mỗi dòng phải là một đối tượng JSON"))
+                    continue
+                yield line_number, {str(column): cell_text(value) for column, value in row.items()}
+    else:
+        workbook = load_openpyxl().load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [cell_text(value).strip() for value in next(rows, ())]
+            for line_number, values in enumerate(rows, start=2):
+                if all(value is None for value in values):
+                    continue
+                yield line_number, {column: cell_text(value) for column, value in zip(header, values) if column}
+        finally:
+            workbook.close()
+
+
+def write_rows(path, columns, rows):
+    # Ghi dòng tiêu đề rồi từng dòng của `rows` (iterable, có thể là generator) ra tệp tạm,
+    # đổi tên khi xong để tệp đích không bao giờ bị ghi dở. Trả về số dòng đã ghi.
+    extension = file_format(path)
+    temporary_path = path + ".tmp"
+    count = 0
+    try:
+        if extension == ".csv":
+            with open(temporary_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        elif extension == ".jsonl":
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+                    count += 1
+        else:
+            workbook = load_openpyxl().Workbook(write_only=True)
+            sheet = workbook.create_sheet()
+            sheet.append(list(columns))
+            for row in rows:
+                sheet.append(list(row))
+                count += 1
+            workbook.save(temporary_path)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return count
@@ -0,0 +1,210 @@
+import argparse
+import csv
+import sys
+from datetime import datetime
+
+from core import HRService
+from payroll import count_working_days
+from reports import ReportEngine
+from storage import open_storage
+from temporal import format_date
+
+
+# Chạy các tác vụ hàng loạt không cần giao diện, ví dụ:
+#   python cli.py import-employees nhan_vien.csv        (hoặc .xlsx, .jsonl)
+#   python cli.py payroll 2024-05 --department "Ke Toan" --bonus thuong.csv
+#   python cli.py report salary --period 2024-05 -o bang_luong.csv
+#   python cli.py report payroll-totals --period 2024-05
+#   python cli.py export attendance cham_cong.jsonl
+#   python cli.py verify --repair
+
+
+def print_errors(errors):
+    for line_number, message in errors:
+        print(f"Dòng {line_number}: {message}", file=sys.stderr)
+
+
+def import_employees(service, args):
+    imported, errors = service.import_employees(args.path)
+    print(f"Đã nhập {imported} nhân viên, bỏ qua {len(errors)} dòng")
+    print_errors(errors)
+    return 1 if errors else 0
+
+
+def import_badges(service, args):
+    result, errors = service.import_badges(args.path)
+    print(f"Đã chấm công {len(result.recorded)} lượt, bỏ qua {len(result.skipped) + len(errors)} mục")
+    print_errors(errors)
+    for employee_id, reason in result.skipped:
+        print(f"{employee_id}: {reason}", file=sys.stderr)
+    return 1 if errors or result.skipped else 0
+
+
+def payroll(service, args):
+    payroll_run = service.run_payroll(args.period, args.department, args.position, args.bonus, args.penalty)
+    if payroll_run is None:
+        print("Không có nhân viên nào phù hợp.", file=sys.stderr)
+        return 1
+    print(payroll_run.summary())
+    for employee_id, message in payroll_run.errors:
+        print(f"{employee_id}: {message}", file=sys.stderr)
+    for record in payroll_run.absent:
+        print(f"{record['employee_id']}: cảnh báo, không có ngày công trong kỳ (0/{record['working_days']}), lương cơ bản bằng 0", file=sys.stderr)
+    return 1 if payroll_run.errors or payroll_run.absent else 0
+
+
+EXPORTS = {
+    "employees": lambda service, args: service.export_employees(args.path, args.department),
+    "attendance": lambda service, args: service.export_attendance(args.path),
+    "salary": lambda service, args: service.export_salary(args.path, args.period, args.department),
+}
+
+
+def export(service, args):
+    count = EXPORTS[args.kind](service, args)
+    print(f"Đã xuất {count} dòng ra {args.path}")
+    return 0
+
+
+def verify(service, args):
+    # Kiểm tra toàn vẹn dữ liệu; --repair sửa những vi phạm sửa được tự động
+    if args.repair:
+        fixed, remaining = service.repair_integrity()
+        for violation in fixed:
+            print(f"Đã sửa [{violation.dataset}] {violation.message}")
+    else:
+        remaining = service.verify_integrity()
+    for violation in remaining:
+        print(f"[{violation.dataset}] {violation.message}", file=sys.stderr)
+    if args.repair:
+        print(f"Đã sửa {len(fixed)} vi phạm, còn {len(remaining)} vi phạm cần xem xét")
+    else:
+        fixable = sum(1 for violation in remaining if violation.fix is not None)
+        print(f"Có {len(remaining)} vi phạm ({fixable} sửa được bằng --repair)")
+    return 1 if remaining else 0
+
+
+def employee_report(service, args):
+    yield ("employee_id", "name", "department_id", "position", "salary_id", "dob", "hired_date")
+    for employee in service.employees:
+        if args.department and employee.department_id != args.department:
+            continue
+        yield (employee.employee_id, employee.name, employee.department_id, employee.position, employee.salary_id,
+               format_date(employee.dob_timestamp), format_date(employee.hired_date_timestamp))
+
+
+def attendance_report(service, args):
+    period = args.period or datetime.now().strftime("%Y-%m")
+    working_days = count_working_days(period)
+    yield ("employee_id", "name", "department_id", "period", "days_present", "working_days", "late_count")
+    for employee in service.employees:
+        if args.department and employee.department_id != args.department:
+            continue
+        yield (employee.employee_id, employee.name, employee.department_id, period,
+               service.attendance_stats.days_present(employee.employee_id, period), working_days,
+               service.attendance_stats.late_count(employee.employee_id, period))
+
+
+def salary_report(service, args):
+    columns = ("name", "employee_id", "department_id", "salary_id", "total_salary", "calculation_time", "period")
+    yield columns
+    history = service.salary_history
+    for key in history.keys(department_id=args.department, month=args.period):
+        record = history.get(key)
+        yield tuple(record.get(column, "") for column in columns)
+
+
+def aggregate_report(kind):
+    # Báo cáo tổng hợp của ReportEngine (cùng dữ liệu với tab "Báo cáo")
+    def rows(service, args):
+        report = service.reports.run(kind, args.period, args.department)
+        yield report.columns
+        yield from report.rows
+    return rows
+
+
+REPORTS = {
+    "employees": employee_report,
+    "attendance": attendance_report,
+    "salary": salary_report,
+}
+REPORTS.update((kind, aggregate_report(kind)) for kind in ReportEngine.KINDS)
+
+
+def report(service, args):
+    rows = REPORTS[args.kind](service, args)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(rows)
+    else:
+        csv.writer(sys.stdout).writerows(rows)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Quản lý nhân viên - chạy các tác vụ hàng loạt")
+    parser.add_argument("--data-dir", default=".", help="thư mục chứa dữ liệu (mặc định: thư mục hiện tại)")
+    parser.set_defaults(read_only=False)
+    parser.add_argument("--storage", choices=("json", "sqlite"), help="engine lưu trữ (mặc định: theo HR_STORAGE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import-employees", help="nhập nhân viên từ CSV/XLSX/JSONL")
+    command.add_argument("path")
+    command.set_defaults(handler=import_employees)
+
+    command = commands.add_parser("import-badges", help="nhập chấm công từ tệp CSV/XLSX/JSONL của máy chấm công")
+    command.add_argument("path")
+    command.set_defaults(handler=import_badges)
+
+    command = commands.add_parser("payroll", help="tính lương cả kỳ")
+    command.add_argument("period", help="kỳ lương YYYY-MM")
+    command.add_argument("--department", help="chỉ tính cho một phòng")
+    command.add_argument("--position", help="chỉ tính cho một chức vụ")
+    command.add_argument("--bonus", help="bảng thưởng CSV (employee_id, amount)")
+    command.add_argument("--penalty", help="bảng phạt CSV (employee_id, amount)")
+    command.set_defaults(handler=payroll)
+
+    command = commands.add_parser("report", help="xuất báo cáo CSV")
+    command.add_argument("kind", choices=sorted(REPORTS))
+    command.add_argument("--period", help="tháng YYYY-MM")
+    command.add_argument("--department", help="lọc theo mã phòng")
+    command.add_argument("-o", "--output", help="tệp kết quả (mặc định: in ra màn hình)")
+    command.set_defaults(handler=report, read_only=True)
+
+    command = commands.add_parser("export", help="xuất dữ liệu ra CSV/XLSX/JSONL (theo đuôi tệp)")
+    command.add_argument("kind", choices=sorted(EXPORTS))
+    command.add_argument("path")
+    command.add_argument("--period", help="tháng YYYY-MM (bảng lương)")
+    command.add_argument("--department", help="lọc theo mã phòng")
+    command.set_defaults(handler=export, read_only=True)
+
+    command = commands.add_parser("verify", help="kiểm tra mã trùng và tham chiếu tới nhân viên không tồn tại")
+    command.add_argument("--repair", action="store_true", help="sửa các vi phạm sửa được (cấp mã mới cho mã trùng, bỏ gán dự án mồ côi)")
+    command.set_defaults(handler=verify, read_only=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "period", None):
+        try:
+            datetime.strptime(args.period, "%Y-%m")
+        except ValueError:
+            print(f"Kỳ không hợp lệ: {args.period}", file=sys.stderr)
+            return 2
+    # report, export và verify (không --repair) chỉ đọc: không tạo tệp phụ trong thư mục dữ liệu
+    read_only = args.read_only and not getattr(args, "repair", False)
+    service = HRService(open_storage(args.storage, args.data_dir, read_only))
+    try:
+        service.load()
+        return args.handler(service, args)
+    except (OSError, ValueError) as e:
+        # Tệp không mở được, sai định dạng hoặc thiếu openpyxl cho .xlsx
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 2
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
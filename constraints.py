@@ -0,0 +1,194 @@
+class ConstraintError(ValueError):
+    pass
+
+
+class UniqueIndex:
+    # Chỉ mục duy nhất trên một trường của nhân viên: giá trị -> tập khóa đang giữ giá trị đó,
+    # cập nhật dần theo sự kiện của EmployeeRepository nên kiểm tra chỉ là một lần tra dict.
+    # Dữ liệu cũ có thể đã bị trùng nên một giá trị vẫn được phép có nhiều khóa; check()
+    # chỉ chặn thay đổi tạo thêm trùng lặp mới. Giá trị rỗng không bị ràng buộc.
+    def __init__(self, field, label, items, key_of):
+        self.field = field
+        self.label = label
+        self.items = items
+        self.key_of = key_of
+        self._keys = {}
+        self._values = {}
+
+    def check(self, value, key=None):
+        # key là khóa của bản ghi đang sửa (None khi thêm mới); giữ nguyên giá trị cũ thì luôn hợp lệ
+        if not value or (key is not None and self._values.get(key) == value):
+            return
+        if self._keys.get(value):
+            raise ConstraintError(f"{self.label} {value} đã thuộc về nhân viên khác")
+
+    def __contains__(self, value):
+        return value in self._keys
+
+    def duplicates(self):
+        return {value: keys for value, keys in self._keys.items() if len(keys) > 1}
+
+    def reset(self):
+        self._keys = {}
+        self._values = {}
+        for item in self.items():
+            self.add(item)
+
+    def add(self, item):
+        value = getattr(item, self.field)
+        if value:
+            key = self.key_of(item)
+            self._values[key] = value
+            self._keys.setdefault(value, set()).add(key)
+
+    def remove(self, item):
+        key = self.key_of(item)
+        value = self._values.pop(key, None)
+        if value is None:
+            return
+        keys = self._keys[value]
+        keys.discard(key)
+        if not keys:
+            del self._keys[value]
+
+    def update(self, item):
+        self.remove(item)
+        self.add(item)
+
+    def on_change(self, event, item):
+        # Dùng làm listener của EmployeeRepository.subscribe()
+        if event == "load":
+            self.reset()
+        elif event == "add":
+            self.add(item)
+        elif event == "add_many":
+            for added in item:
+                self.add(added)
+        elif event == "remove":
+            self.remove(item)
+        else:
+            self.update(item)
+
+
+class Violation:
+    # Một vi phạm ràng buộc; fix là hàm sửa tự động (None nếu cần người xem xét)
+    def __init__(self, dataset, reference, message, fix=None):
+        self.dataset = dataset
+        self.reference = reference
+        self.message = message
+        self.fix = fix
+
+
+class ConstraintEngine:
+    # Ràng buộc toàn vẹn trên dữ liệu đang nạp của HRService:
+    # - duy nhất: employee_id và id_number (UniqueIndex, kiểm tra O(1) mỗi lần thêm/sửa)
+    # - tham chiếu: chấm công, bảng lương và danh sách gán dự án phải trỏ tới mã nhân
+    #   viên đang có (tra repository theo chỉ mục băm)
+    # verify() quét mỗi bộ dữ liệu đúng một lượt và liệt kê mọi vi phạm; repair() chỉ sửa
+    # những gì sửa được mà không mất dữ liệu (cấp mã mới cho nhân viên trùng mã, bỏ mã gán
+    # dự án không còn nhân viên). Chấm công mồ côi, số CMND trùng và bảng lương lệch tên
+    # chỉ được báo cáo: bảng lương là lịch sử đã chi trả nên không bị viết lại.
+    UNIQUE_FIELDS = {"employee_id": "Mã nhân viên", "id_number": "Số CMND/CCCD"}
+
+    def __init__(self, service):
+        self.service = service
+        self.unique = {
+            field: UniqueIndex(field, label, lambda: service.employees, lambda employee: employee.key)
+            for field, label in self.UNIQUE_FIELDS.items()
+        }
+
+    def on_employee_change(self, event, employee):
+        for index in self.unique.values():
+            index.on_change(event, employee)
+
+    def check_employee(self, values, employee=None):
+        # values: {trường: giá trị mới}; employee là nhân viên đang sửa (None khi thêm mới)
+        key = employee.key if employee is not None else None
+        for field, index in self.unique.items():
+            if field in values:
+                index.check(values[field], key)
+
+    def check_employee_ids(self, employee_ids):
+        missing = [employee_id for employee_id in employee_ids if self.service.employees.get(employee_id) is None]
+        if missing:
+            raise ConstraintError(f"Không có nhân viên mã: {', '.join(map(str, missing))}")
+
+    def verify(self):
+        violations = []
+        violations.extend(self._verify_employees())
+        violations.extend(self._verify_attendance())
+        violations.extend(self._verify_projects())
+        violations.extend(self._verify_salary())
+        return violations
+
+    def repair(self):
+        # Trả về (các vi phạm đã sửa, các vi phạm còn lại)
+        fixed = []
+        remaining = []
+        for violation in self.verify():
+            if violation.fix is None:
+                remaining.append(violation)
+            else:
+                violation.fix()
+                fixed.append(violation)
+        return fixed, remaining
+
+    def _verify_employees(self):
+        employees = self.service.employees
+        taken = set()
+        for field, index in self.unique.items():
+            for value, keys in sorted(index.duplicates().items(), key=lambda item: str(item[0])):
+                # Nhân viên thêm vào trước (khóa nhỏ nhất) giữ giá trị
+                first, *others = sorted(keys)
+                for key in others:
+                    employee = employees.get_by_key(key)
+                    message = f"{index.label} {value} của {employee.name} trùng với {employees.get_by_key(first).name}"
+                    fix = None
+                    if field == "employee_id":
+                        new_employee_id = self._free_employee_id(value, taken)
+                        taken.add(new_employee_id)
+                        message += f" (sửa: đổi thành {new_employee_id})"
+                        fix = self._renumber(employee, new_employee_id)
+                    yield Violation("employees", value, message, fix)
+
+    def _verify_attendance(self):
+        employees = self.service.employees
+        for employee_id, column in self.service.attendance.items():
+            if employees.get(employee_id) is None:
+                yield Violation("attendance", employee_id, f"{len(column)} lượt chấm công của mã {employee_id} không thuộc nhân viên nào")
+        for name, count in self.service.attendance.unresolved.items():
+            yield Violation("attendance", name, f"{count} lượt chấm công cũ của {name} không khớp tên nhân viên nào nên chưa được chuyển")
+
+    def _verify_projects(self):
+        employees = self.service.employees
+        for project in self.service.projects:
+            for employee_id in project.assigned_employees:
+                if employees.get(employee_id) is None:
+                    yield Violation("projects", project.project_id, f"Dự án {project.name} gán mã {employee_id} không thuộc nhân viên nào (sửa: bỏ gán)",
+                                    self._unassign(project, employee_id))
+
+    def _verify_salary(self):
+        # Mã đang bị trùng thì dòng lương khớp tên với bất kỳ người giữ mã nào đều hợp lệ
+        # (phần trùng mã đã được báo ở trên)
+        employees = self.service.employees
+        for record in self.service.salary_history.records():
+            employee_id = record.get("employee_id")
+            holders = employees.find_by("employee_id", employee_id)
+            period = record.get("period") or record.get("calculation_time", "")
+            if not holders:
+                yield Violation("salary", employee_id, f"Bảng lương {period} của {record.get('name')} có mã {employee_id} không thuộc nhân viên nào")
+            elif all(record.get("name") != employee.name for employee in holders):
+                yield Violation("salary", employee_id, f"Bảng lương {period} của mã {employee_id} ghi tên {record.get('name')}, nhân viên hiện tại là {holders[0].name}")
+
+    def _free_employee_id(self, employee_id, taken):
+        # taken: các mã đã định cấp trong lượt quét này nhưng chưa áp dụng
+        number = 2
+        while f"{employee_id}-{number}" in self.unique["employee_id"] or f"{employee_id}-{number}" in taken:
+            number += 1
+        return f"{employee_id}-{number}"
+
+    def _renumber(self, employee, employee_id):
+        return lambda: self.service.renumber_employee(employee, employee_id)
+
+    def _unassign(self, project, employee_id):
+        return lambda: self.service.unassign_employee(project, employee_id)
@@ -0,0 +1,508 @@
+import getpass
+import time
+from datetime import datetime
+
+from activity_log import make_record, parse_legacy
+from assignments import AssignmentIndex
+from io_worker import SyncExecutor
+from attendance import AttendanceAggregates, AttendanceStore, check_in_many, read_badge_file
+from bulk import read_rows, write_rows
+from constraints import ConstraintEngine, ConstraintError
+from models import Employee, Project
+from payroll import compute_payroll, select_employees
+from reports import ReportEngine
+from repository import EmployeeRepository
+from search import employee_search_index, project_search_index
+from sorting import EMPLOYEE_SORT_KEYS, PROJECT_SORT_KEYS, SortOrders
+from storage import open_storage
+from temporal import format_date, format_datetime, parse_datetime
+from tracing import tracer
+
+
+# Thứ tự nạp khi khởi động: chấm công cần danh sách nhân viên để chuyển dữ liệu cũ theo tên
+DATASETS = ("employees", "attendance", "projects", "salary")
+# Phần phải được apply() xong trước khi đọc: chấm công cũ theo tên cần danh sách nhân viên
+# để đổi sang mã nhân viên
+DATASET_DEPENDENCIES = {"attendance": ("employees",)}
+
+# Các thao tác lưu trữ được đo thời gian (xem tracing.py)
+STORAGE_METHODS = ("load_employees", "save_employee", "save_employees", "delete_employee", "load_attendance", "save_attendance",
+                   "load_projects", "save_projects", "append_salary", "flush")
+
+EMPLOYEE_FIELDS = ("employee_id", "department_id", "salary_id", "name", "dob", "gender", "ethnicity", "id_number", "id_issued_place", "position")
+
+# Cột của các tệp xuất; tệp nhân viên/chấm công xuất ra nhập lại được
+EMPLOYEE_EXPORT_COLUMNS = EMPLOYEE_FIELDS + ("hired_date",)
+ATTENDANCE_EXPORT_COLUMNS = ("employee_id", "timestamp")
+SALARY_EXPORT_COLUMNS = ("name", "employee_id", "department_id", "salary_id", "total_salary", "calculation_time", "period")
+
+
+def current_user():
+    # Người thực hiện ghi vào lịch sử hoạt động; không xác định được thì để trống
+    try:
+        return getpass.getuser()
+    except Exception:
+        return ""
+
+
+class HRService:
+    # Lớp nghiệp vụ không phụ thuộc giao diện: nhân viên, dự án, chấm công, lương và
+    # lịch sử hoạt động. Giao diện Tk và dòng lệnh (cli.py) đều chỉ gọi vào đây.
+    # Mọi thao tác ghi đi qua executor: giao diện dùng IOWorker (luồng nền), dòng lệnh
+    # dùng SyncExecutor (ghi ngay). Dữ liệu được chụp lại trước khi gửi đi ghi.
+    def __init__(self, storage=None, executor=None):
+        self.storage = storage or open_storage()
+        tracer.instrument(self.storage, STORAGE_METHODS, "storage", "storage")
+        self.executor = executor or SyncExecutor()
+        self.employees = EmployeeRepository()
+        self.projects = []
+        self._projects_by_id = {}
+        self.assignments = AssignmentIndex()
+        self.activity = self.storage.activity_log()
+        self.actor = current_user()
+        self._activity_listeners = []
+        self.attendance = AttendanceStore()
+        self.attendance_stats = AttendanceAggregates()
+        self.salary_history = self.storage.salary_history()
+        self.employee_index = employee_search_index()
+        self._prebuilt_employee_index = None
+        self.project_index = project_search_index()
+        self.employees.subscribe(self._on_employee_change)
+        # Thứ tự sắp xếp tính sẵn cho bảng nhân viên/dự án, dựng khi cần và cập nhật dần
+        self.employee_orders = SortOrders(EMPLOYEE_SORT_KEYS, lambda: self.employees, lambda employee: employee.key)
+        self.employees.subscribe(self.employee_orders.on_change)
+        self.project_orders = SortOrders(PROJECT_SORT_KEYS, lambda: self.projects, lambda project: project.project_id)
+        # Báo cáo tổng hợp, nhớ kết quả tới khi dữ liệu nguồn thay đổi (xem reports.py)
+        self.reports = ReportEngine(self)
+        self.employees.subscribe(self.reports.on_employee_change)
+        # Ràng buộc duy nhất/tham chiếu, kiểm tra trước mỗi thao tác ghi (xem constraints.py)
+        self.constraints = ConstraintEngine(self)
+        self.employees.subscribe(self.constraints.on_employee_change)
+        self._project_listeners = [self.project_orders.on_change, self.reports.on_project_change]
+        self.loaded = set()
+
+    def load(self):
+        for dataset in DATASETS:
+            self.apply(dataset, self.read(dataset))
+
+    def is_loaded(self, *datasets):
+        return all(dataset in self.loaded for dataset in datasets)
+
+    def read(self, dataset):
+        # Đọc và dựng sẵn dữ liệu của một phần mà không đụng vào trạng thái đang dùng,
+        # nên có thể chạy trên luồng nền; apply() gắn kết quả vào trên luồng gọi.
+        with tracer.span(f"load.{dataset}", "load"):
+            return self._read(dataset)
+
+    def _read(self, dataset):
+        if dataset == "employees":
+            employees_data, legacy_activity = self.storage.load_employees()
+            # Lịch sử kiểu cũ chỉ được phân tích ở đây; apply() mới đưa vào ActivityLog
+            legacy_records = [parse_legacy(entry) for entry in legacy_activity]
+            employees = [Employee.from_dict(employee_data) for employee_data in employees_data]
+            # Khóa đã được engine lưu trữ gán sẵn nên chỉ mục tìm kiếm dựng được ngay tại đây
+            index = employee_search_index()
+            index.load((employee.key, employee) for employee in employees)
+            return employees, legacy_records, index
+        if dataset == "attendance":
+            # Nếu chưa có nhân viên thì mọi tên trong dữ liệu cũ đều không khớp và bị bỏ mất
+            if not self.is_loaded(*DATASET_DEPENDENCIES[dataset]):
+                raise RuntimeError("Phải nạp nhân viên trước khi đọc dữ liệu chấm công")
+            attendance = self.storage.load_attendance(self.employee_id_for_name)
+            attendance_stats = AttendanceAggregates()
+            attendance_stats.rebuild(attendance)
+            return attendance, attendance_stats
+        if dataset == "projects":
+            projects = [Project.from_dict(project_data) for project_data in self.storage.load_projects()]
+            # project_id là khóa định danh dự án; dữ liệu cũ bị trùng mã thì cấp mã mới
+            seen = set()
+            next_id = max((project.project_id for project in projects), default=0) + 1
+            for project in projects:
+                if project.project_id in seen:
+                    project.project_id = next_id
+                    next_id += 1
+                seen.add(project.project_id)
+            index = project_search_index()
+            index.load((project, project) for project in projects)
+            assignments = AssignmentIndex()
+            assignments.load(projects)
+            return projects, index, assignments
+        if dataset == "salary":
+            # Chỉ quét phần tệp chưa có trong chỉ mục; bản ghi được đọc khi cần
+            if self.salary_history.exists():
+                self.salary_history.refresh()
+            return None
+        raise ValueError(f"Không có dữ liệu {dataset}")
+
+    def apply(self, dataset, data):
+        with tracer.span(f"apply.{dataset}", "load"):
+            self._apply(dataset, data)
+
+    def _apply(self, dataset, data):
+        if dataset == "employees":
+            employees, legacy_records, index = data
+            if legacy_records and not self.storage.read_only:
+                # Lịch sử kiểu cũ trong employees.json/bảng activity_log được chuyển sang log
+                # riêng một lần, ghi xong mới xóa bản cũ (cùng hàng đợi nên đúng thứ tự).
+                # Lệnh chỉ đọc để nguyên dữ liệu cũ cho lần mở ghi được tiếp theo.
+                if not len(self.activity):
+                    self.activity.import_legacy(legacy_records)
+                    self.executor.submit(None, self.activity.write_pending)
+                self.executor.submit(None, self.storage.clear_legacy_activity)
+            # Chỉ mục đã dựng sẵn được dùng luôn khi nhận sự kiện "load", không dựng lại
+            self._prebuilt_employee_index = index
+            self.employees.load(employees)
+        elif dataset == "attendance":
+            self.attendance, self.attendance_stats = data
+        elif dataset == "projects":
+            self.projects, self.project_index, self.assignments = data
+            self._projects_by_id = {project.project_id: project for project in self.projects}
+            self._notify_projects("load", None)
+        self.reports.invalidate()
+        self.loaded.add(dataset)
+
+    def close(self):
+        # Ghi nốt các việc đang chờ rồi đóng engine lưu trữ
+        self.executor.close()
+        self.storage.close()
+
+    def flush(self):
+        self.executor.submit(None, self.storage.flush)
+        self.executor.flush()
+
+    # --- Nhân viên ---
+
+    def add_employee(self, employee):
+        self.constraints.check_employee({field: getattr(employee, field) for field in ConstraintEngine.UNIQUE_FIELDS})
+        self.employees.add(employee)
+        self._save_employee(employee)
+        return employee
+
+    def add_employees(self, employees):
+        # Thêm cả lô và ghi xuống lưu trữ bằng một lần ghi
+        self.employees.add_many(employees)
+        employees_data = [employee.to_dict() for employee in employees]
+        if employees_data:
+            self.executor.submit(None, lambda: self.storage.save_employees(employees_data))
+        return employees
+
+    def update_employee(self, employee, **changes):
+        self.constraints.check_employee(changes, employee)
+        old_employee_id = employee.employee_id
+        new_employee_id = changes.get("employee_id", old_employee_id)
+        # Mã cũ có thể vẫn thuộc về nhân viên khác (dữ liệu cũ bị trùng mã): khi đó chấm công
+        # theo mã cũ không phân biệt được của ai nên ở lại với nhân viên còn giữ mã cũ
+        shared = len(self.employees.find_by("employee_id", old_employee_id)) > 1
+        # Đổi mã nhân viên thì chuyển luôn dữ liệu chấm công sang mã mới
+        if new_employee_id != old_employee_id and not shared:
+            self.attendance.rename_employee(old_employee_id, new_employee_id)
+            self.attendance_stats.rename_employee(old_employee_id, new_employee_id)
+            self.save_attendance()
+        self.employees.update(employee, **changes)
+        self._save_employee(employee)
+        if new_employee_id != old_employee_id:
+            if not shared:
+                project_ids = self.assignments.rename_employee(old_employee_id, new_employee_id)
+            else:
+                project_ids = self.assignments.projects_of(old_employee_id)
+                for project_id in project_ids:
+                    self.assignments.assign(project_id, [new_employee_id])
+            self._sync_assignments(project_ids)
+        return employee
+
+    def renumber_employee(self, employee, employee_id):
+        # Cấp mã mới cho nhân viên bị trùng mã (ConstraintEngine.repair). Chấm công và gán dự
+        # án theo mã cũ không phân biệt được của ai nên ở lại với nhân viên giữ mã cũ.
+        self.constraints.check_employee({"employee_id": employee_id}, employee)
+        old_employee_id = employee.employee_id
+        self.employees.update(employee, employee_id=employee_id)
+        self._save_employee(employee)
+        self.log_activity(f"Đổi mã nhân viên trùng {old_employee_id} của {employee.name} thành {employee_id}", "employee.renumber", employee_id)
+        return employee
+
+    def verify_integrity(self):
+        return self.constraints.verify()
+
+    def repair_integrity(self):
+        return self.constraints.repair()
+
+    def remove_employee(self, employee):
+        self.employees.remove(employee)
+        key = employee.key
+        self.executor.submit(None, lambda: self.storage.delete_employee(key))
+        # Gỡ nhân viên khỏi các dự án, trừ khi mã vẫn còn thuộc về nhân viên khác
+        if self.employees.get(employee.employee_id) is None:
+            self._sync_assignments(self.assignments.remove_employee(employee.employee_id))
+        return employee
+
+    def _save_employee(self, employee):
+        employee_data = employee.to_dict()
+        self.executor.submit(None, lambda: self.storage.save_employee(employee_data))
+
+    def import_employees(self, path):
+        # Tệp CSV/XLSX/JSONL có các cột trùng tên thuộc tính Employee, đọc từng dòng.
+        # Dòng lỗi (thiếu cột, ngày sai, mã NV/số CMND đã có) bị bỏ qua; các dòng hợp lệ được
+        # thêm trong một lô. Trả về (số đã thêm, lỗi theo số dòng).
+        errors = []
+        employees = []
+        # Giá trị duy nhất (mã NV, số CMND) đã gặp trong tệp -> số dòng
+        seen = {field: {} for field in ConstraintEngine.UNIQUE_FIELDS}
+        for line_number, row in read_rows(path, errors):
+            missing = [field for field in EMPLOYEE_FIELDS if not (row.get(field) or "").strip()]
+            if missing:
+                errors.append((line_number, f"thiếu {', '.join(missing)}"))
+                continue
+            values = {field: row[field].strip() for field in EMPLOYEE_FIELDS}
+            duplicate = next(((field, values[field]) for field in seen if values[field] in seen[field]), None)
+            if duplicate is not None:
+                field, value = duplicate
+                errors.append((line_number, f"{ConstraintEngine.UNIQUE_FIELDS[field]} {value} trùng với dòng {seen[field][value]}"))
+                continue
+            try:
+                self.constraints.check_employee(values)
+            except ConstraintError as e:
+                errors.append((line_number, str(e)))
+                continue
+            try:
+                values["dob"] = parse_datetime(values["dob"])
+            except ValueError:
+                errors.append((line_number, f"dob không hợp lệ: {values['dob']} (dd/mm/yyyy hoặc YYYY-MM-DD)"))
+                continue
+            hired_date = (row.get("hired_date") or "").strip()
+            try:
+                values["hired_date"] = parse_datetime(hired_date) if hired_date else None
+            except ValueError:
+                errors.append((line_number, f"hired_date không hợp lệ: {hired_date}"))
+                continue
+            for field in seen:
+                seen[field][values[field]] = line_number
+            employees.append(Employee(**values))
+        self.add_employees(employees)
+        if employees:
+            self.log_activity(f"Nhập {len(employees)} nhân viên từ {path}", "employee.import", path)
+        return len(employees), errors
+
+    def export_employees(self, path, department_id=None):
+        employees = self.employees.find_by_department(department_id) if department_id else self.employees
+        rows = ((employee.employee_id, employee.department_id, employee.salary_id, employee.name, format_date(employee.dob_timestamp),
+                 employee.gender, employee.ethnicity, employee.id_number, employee.id_issued_place, employee.position,
+                 format_datetime(employee.hired_date_timestamp))
+                for employee in employees)
+        return write_rows(path, EMPLOYEE_EXPORT_COLUMNS, rows)
+
+    def search_employees(self, text, limit=20):
+        return [self.employees.get_by_key(key) for key in self.employee_index.search(text, limit)]
+
+    def filter_employees(self, text="", department_id=None):
+        # Khóa các nhân viên khớp bộ lọc theo thứ tự thêm vào: phòng tra theo chỉ mục băm,
+        # tên/mã theo chỉ mục tìm kiếm (không dấu, theo tiền tố)
+        keys = None
+        if department_id:
+            keys = {employee.key for employee in self.employees.find_by_department(department_id)}
+        if text.strip():
+            matched = self.employee_index.matches(text)
+            keys = matched if keys is None else keys & matched
+        if keys is None:
+            return [employee.key for employee in self.employees]
+        return sorted(keys)
+
+    def employee_matches(self, employee, text="", department_id=None):
+        if department_id and employee.department_id != department_id:
+            return False
+        return not text.strip() or self.employee_index.document_matches(employee.key, text)
+
+    # --- Chấm công ---
+
+    def save_attendance(self):
+        snapshot = self.attendance.snapshot()
+        self.executor.submit("attendance", lambda: self.storage.save_attendance(snapshot))
+
+    def employee_id_for_name(self, employee_name):
+        # Dữ liệu chấm công cũ theo tên nhân viên được chuyển sang mã nhân viên khi nạp
+        matches = self.employees.find_by_name(employee_name)
+        return matches[0].employee_id if matches else None
+
+    def check_in(self, entries):
+        # Ghi nhận cả lô chấm công với một lần lưu và một dòng lịch sử
+        result = check_in_many(self.attendance, self.attendance_stats, entries, self.employees.get)
+        if result.recorded:
+            self.save_attendance()
+            self.log_activity(f"Chấm công cho {len(result.recorded)} nhân viên", "attendance.check_in")
+        return result
+
+    def import_badges(self, path):
+        # Trả về (CheckInResult, lỗi đọc tệp theo số dòng)
+        entries, errors = read_badge_file(path)
+        return self.check_in(entries), errors
+
+    def export_attendance(self, path):
+        # Mỗi lần chấm công một dòng, cùng dạng tệp máy chấm công nên nhập lại được
+        rows = ((employee_id, format_datetime(timestamp))
+                for employee_id, column in self.attendance.items() for timestamp in column)
+        return write_rows(path, ATTENDANCE_EXPORT_COLUMNS, rows)
+
+    def remove_attendance(self, employee_ids):
+        for employee_id in employee_ids:
+            if employee_id in self.attendance:
+                self.attendance.remove_employee(employee_id)
+                self.attendance_stats.remove_employee(employee_id)
+        self.save_attendance()
+
+    # --- Dự án ---
+
+    def save_projects(self):
+        projects_data = [project.to_dict() for project in self.projects]
+        self.executor.submit("projects", lambda: self.storage.save_projects(projects_data))
+
+    def add_project(self, name, start_date, end_date, description):
+        # Mã mới luôn lớn hơn mọi mã hiện có để không trùng với dự án còn lại sau khi xóa
+        project_id = max(self._projects_by_id, default=0) + 1
+        project = Project(project_id, name, start_date, end_date, description)
+        self.projects.append(project)
+        self._projects_by_id[project.project_id] = project
+        self.project_index.add(project, project)
+        self._notify_projects("add", project)
+        self.save_projects()
+        return project
+
+    def update_project(self, project, **changes):
+        for field, value in changes.items():
+            setattr(project, field, value)
+        self.project_index.update(project, project)
+        self._notify_projects("update", project)
+        self.save_projects()
+        return project
+
+    def remove_project(self, project):
+        self.projects.remove(project)
+        self._projects_by_id.pop(project.project_id, None)
+        self.project_index.remove(project)
+        self.assignments.remove_project(project.project_id)
+        self._notify_projects("remove", project)
+        self.save_projects()
+        return project
+
+    def assign_employees(self, project, employee_ids):
+        # Mã đã gán rồi được bỏ qua; trả về các mã mới được gán
+        self.constraints.check_employee_ids(employee_ids)
+        added = self.assignments.assign(project.project_id, employee_ids)
+        if added:
+            project.assigned_employees.extend(added)
+            self._notify_projects("update", project)
+            self.save_projects()
+        return added
+
+    def unassign_employee(self, project, employee_id):
+        if self.assignments.unassign(project.project_id, employee_id):
+            project.assigned_employees.remove(employee_id)
+            self._notify_projects("update", project)
+            self.save_projects()
+            return True
+        return False
+
+    def get_project(self, project_id):
+        return self._projects_by_id.get(project_id)
+
+    def projects_for_employee(self, employee_id):
+        return sorted((self._projects_by_id[project_id] for project_id in self.assignments.projects_of(employee_id)), key=lambda project: project.project_id)
+
+    def project_employees(self, project):
+        # Nhân viên của dự án theo thứ tự gán; mã không còn nhân viên nào được bỏ qua
+        employees = []
+        for employee_id in project.assigned_employees:
+            employee = self.employees.get(employee_id)
+            if employee is not None:
+                employees.append(employee)
+        return employees
+
+    def headcounts(self):
+        return self.assignments.headcounts()
+
+    def _sync_assignments(self, project_ids):
+        # Đồng bộ danh sách gán (có thứ tự) của các dự án bị ảnh hưởng theo chỉ mục
+        if not project_ids:
+            return
+        for project_id in project_ids:
+            project = self._projects_by_id[project_id]
+            members = self.assignments.employees_of(project_id)
+            assigned = [employee_id for employee_id in project.assigned_employees if employee_id in members]
+            assigned.extend(sorted(members.difference(assigned)))
+            project.assigned_employees = assigned
+            self._notify_projects("update", project)
+        self.save_projects()
+
+    def _notify_projects(self, event, project):
+        # Cùng kiểu sự kiện với EmployeeRepository: "load", "add", "update", "remove"
+        for listener in self._project_listeners:
+            listener(event, project)
+
+    def search_projects(self, text, limit=20):
+        return self.project_index.search(text, limit)
+
+    # --- Lương ---
+
+    def pay_employee(self, employee, bonus=0.0, penalty=0.0, period=None, on_written=None):
+        period = period or datetime.now().strftime("%Y-%m")
+        payroll_run = compute_payroll([employee], period, {employee.employee_id: bonus}, {employee.employee_id: penalty}, self.attendance_stats)
+        if payroll_run.records:
+            self._write_payroll(payroll_run, (f"Tính lương cho nhân viên: {employee.name}", "payroll.employee", employee.employee_id), on_written)
+        return payroll_run
+
+    def export_salary(self, path, month=None, department_id=None):
+        rows = (tuple(record.get(column, "") for column in SALARY_EXPORT_COLUMNS)
+                for record in self.salary_history.records(department_id=department_id, month=month))
+        return write_rows(path, SALARY_EXPORT_COLUMNS, rows)
+
+    def run_payroll(self, period, department_id=None, position=None, bonuses=None, penalties=None, on_written=None):
+        # Trả về None nếu không có nhân viên nào phù hợp; on_written(payroll_run) được gọi
+        # khi bảng lương đã ghi xong và lịch sử lương đã đọc tiếp các dòng mới
+        selected_employees = select_employees(self.employees, department_id, position)
+        if not selected_employees:
+            return None
+        payroll_run = compute_payroll(selected_employees, period, bonuses, penalties, self.attendance_stats)
+        self._write_payroll(payroll_run, None, on_written)
+        return payroll_run
+
+    def _write_payroll(self, payroll_run, activity, on_written):
+        # Cả đợt lương được ghi bằng một lần ghi duy nhất
+        records = payroll_run.records
+
+        def write():
+            started = time.perf_counter()
+            self.storage.append_salary(records, payroll_run.period)
+            payroll_run.write_seconds = time.perf_counter() - started
+
+        def written(result):
+            self.salary_history.refresh()
+            self.log_activity(*(activity or (f"Tính lương hàng loạt: {payroll_run.summary()}", "payroll.batch", payroll_run.period)))
+            if on_written is not None:
+                on_written(payroll_run)
+
+        self.executor.submit(None, write, written)
+
+    # --- Lịch sử hoạt động ---
+
+    def log_activity(self, message, action="", entity_id=None):
+        # Bản ghi vào bộ nhớ ngay; các lần ghi đĩa dồn lại thành một lần trên luồng nền
+        record = self.activity.add(make_record(message, action, entity_id, self.actor))
+        self.executor.submit("activity", self.activity.write_pending)
+        for listener in self._activity_listeners:
+            listener(record)
+        return record
+
+    def subscribe_activity(self, listener):
+        self._activity_listeners.append(listener)
+
+    def _on_employee_change(self, event, employee):
+        # Giữ chỉ mục tìm kiếm khớp với kho nhân viên
+        if event == "load":
+            if self._prebuilt_employee_index is not None:
+                self.employee_index, self._prebuilt_employee_index = self._prebuilt_employee_index, None
+            else:
+                self.employee_index.load((employee.key, employee) for employee in self.employees)
+        elif event == "add_many":
+            self.employee_index.add_many((added.key, added) for added in employee)
+        elif event == "remove":
+            self.employee_index.remove(employee.key)
+        else:
+            self.employee_index.update(employee.key, employee)
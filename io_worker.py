@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+
+
+class IOJob:
+    def __init__(self, key, func, due):
+        self.key = key
+        self.func = func
+        self.due = due
+        self.callbacks = []
+
+
+class IOWorker:
+    # Luồng nền duy nhất cho mọi thao tác ghi tệp để vòng lặp Tk không bị chặn.
+    # - Việc có khóa (vd. "attendance", "projects") là ghi đè cả tệp: các lần gửi lặp lại
+    #   trong khoảng debounce được gộp thành một lần ghi với dữ liệu mới nhất.
+    # - Việc không có khóa (ghi nhật ký, ghi thêm bảng lương) chạy ngay, đúng thứ tự gửi.
+    # Hàm func chạy trên luồng nền nên phải tự mang theo bản sao dữ liệu cần ghi.
+    # Kết quả và lỗi được xếp hàng rồi gọi lại trên luồng giao diện qua poll()
+    # (ứng dụng Tk gọi poll() định kỳ bằng after()).
+    def __init__(self, debounce=0.5, on_error=None):
+        self.debounce = debounce
+        self.on_error = on_error
+        self._condition = threading.Condition()
+        self._jobs = []
+        self._keyed = {}
+        self._running = False
+        self._closed = False
+        self._completed = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="io-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, func, on_done=None, on_error=None):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("IOWorker đã đóng")
+            job = self._keyed.get(key) if key is not None else None
+            if job is None:
+                job = IOJob(key, func, time.monotonic() + (self.debounce if key is not None else 0.0))
+                self._jobs.append(job)
+                if key is not None:
+                    self._keyed[key] = job
+            else:
+                # Gộp với lần ghi đang chờ: chỉ giữ dữ liệu mới nhất, giữ nguyên hạn chạy
+                job.func = func
+            job.callbacks.append((on_done, on_error))
+            self._condition.notify_all()
+
+    def pending(self):
+        with self._condition:
+            return len(self._jobs) + (1 if self._running else 0)
+
+    def flush(self):
+        # Chạy ngay mọi việc đang chờ và đợi tới khi xong
+        with self._condition:
+            for job in self._jobs:
+                job.due = 0.0
+            self._condition.notify_all()
+            while self._jobs or self._running:
+                self._condition.wait()
+
+    def close(self):
+        # Callback hoàn tất có thể gửi thêm việc (vd. ghi bảng lương xong thì ghi nhật ký),
+        # nên chỉ đóng khi đã chạy hết việc và không còn callback nào sinh thêm việc mới
+        while True:
+            self.flush()
+            if not self.poll():
+                with self._condition:
+                    if not self._jobs and not self._running:
+                        self._closed = True
+                        self._condition.notify_all()
+                        break
+        self._thread.join()
+
+    def poll(self):
+        # Gọi trên luồng giao diện: chạy các callback hoàn tất/lỗi đã xếp hàng
+        handled = 0
+        while True:
+            try:
+                callbacks, result, error = self._completed.get_nowait()
+            except queue.Empty:
+                return handled
+            handled += 1
+            for on_done, on_error in callbacks:
+                if error is None:
+                    if on_done is not None:
+                        on_done(result)
+                else:
+                    handler = on_error or self.on_error
+                    if handler is None:
+                        raise error
+                    handler(error)
+
+    def _next_job(self):
+        # Việc đầu tiên (theo thứ tự gửi) đã tới hạn, hoặc thời gian phải chờ
+        now = time.monotonic()
+        earliest = None
+        for position, job in enumerate(self._jobs):
+            if job.due <= now:
+                del self._jobs[position]
+                if job.key is not None:
+                    del self._keyed[job.key]
+                return job, None
+            earliest = job.due if earliest is None else min(earliest, job.due)
+        return None, (None if earliest is None else earliest - now)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    job, wait = self._next_job()
+                    if job is not None:
+                        break
+                    if self._closed:
+                        return
+                    self._condition.wait(wait)
+                self._running = True
+            result = error = None
+            try:
+                result = job.func()
+            except Exception as e:
+                error = e
+            self._completed.put((job.callbacks, result, error))
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+
+
+class SyncExecutor:
+    # Cùng giao diện với IOWorker nhưng chạy ngay trên luồng gọi; dùng cho dòng lệnh
+    def submit(self, key, func, on_done=None, on_error=None):
+        try:
+            result = func()
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            return
+        if on_done is not None:
+            on_done(result)
+
+    def pending(self):
+        return 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def poll(self):
+        return 0
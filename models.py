@@ -0,0 +1,178 @@
+import sys
+from datetime import datetime
+
+from temporal import format_datetime, format_day, from_day, from_timestamp, parse_day, parse_timestamp, to_day, to_timestamp
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def parse_salary(salary_id):
+    # Mã lương thực chất là mức lương; giữ dạng số, chuỗi không hợp lệ được giữ nguyên để báo lỗi khi tính lương
+    try:
+        return float(salary_id)
+    except (TypeError, ValueError):
+        return salary_id
+
+
+def format_salary(salary):
+    if isinstance(salary, float):
+        return f"{salary:.0f}" if salary.is_integer() else repr(salary)
+    return salary
+
+
+class Project:
+    # __slots__ thay cho __dict__; ngày lưu dạng số ngày kể từ 1970-01-01 (temporal.to_day).
+    # start_day/end_day dùng để so sánh, sắp xếp và hiển thị mà không phải tạo datetime.
+    __slots__ = ("project_id", "name", "_start_date", "_end_date", "description", "status", "assigned_employees")
+
+    def __init__(self, project_id, name, start_date, end_date, description, status="", assigned_employees=None):
+        self.project_id = project_id
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.description = description
+        self.status = status
+        self.assigned_employees = assigned_employees if assigned_employees else []
+
+    @property
+    def start_date(self):
+        return from_day(self._start_date)
+
+    @start_date.setter
+    def start_date(self, value):
+        self._start_date = value if isinstance(value, int) else to_day(value)
+
+    @property
+    def start_day(self):
+        return self._start_date
+
+    @property
+    def end_date(self):
+        return from_day(self._end_date)
+
+    @end_date.setter
+    def end_date(self, value):
+        self._end_date = value if isinstance(value, int) else to_day(value)
+
+    @property
+    def end_day(self):
+        return self._end_date
+
+    def to_dict(self):
+        return {
+            'project_id': self.project_id,
+            'name': self.name,
+            'start_date': format_day(self._start_date),
+            'end_date': format_day(self._end_date),
+            'description': self.description,
+            'status': self.status,
+            'assigned_employees': list(self.assigned_employees)
+        }
+
+    @classmethod
+    def from_dict(cls, project_dict):
+        return cls(
+            project_dict['project_id'],
+            project_dict['name'],
+            parse_day(project_dict['start_date']),
+            parse_day(project_dict['end_date']),
+            project_dict['description'],
+            project_dict.get('status', ''),
+            project_dict.get('assigned_employees', [])
+        )
+
+
+class Employee:
+    # Bản ghi gọn: __slots__ thay cho __dict__, ngày sinh/ngày vào làm lưu dạng số giây
+    # (int, xem temporal.py), lương lưu dạng số thực. dob, hired_date và salary_id vẫn
+    # đọc/ghi như trước qua property (nhận cả datetime lẫn số giây); dob_timestamp và
+    # hired_date_timestamp trả thẳng số giây để sắp xếp/hiển thị không phải tạo datetime.
+    # Các chuỗi ít giá trị (phòng, chức vụ...) được intern khi nạp để dùng chung.
+    __slots__ = ("employee_id", "department_id", "_salary", "name", "_dob", "gender", "ethnicity", "id_number", "id_issued_place", "position", "_hired_date", "key")
+
+    def __init__(self, employee_id, department_id, salary_id, name, dob, gender, ethnicity, id_number, id_issued_place, position, hired_date=None, key=None):
+        self.employee_id = employee_id
+        self.department_id = department_id
+        self.salary_id = salary_id
+        self.name = name
+        self.dob = dob
+        self.gender = gender
+        self.ethnicity = ethnicity
+        self.id_number = id_number
+        self.id_issued_place = id_issued_place
+        self.position = position
+        self.hired_date = hired_date if hired_date is not None else datetime.now()
+        self.key = key
+
+    @property
+    def salary(self):
+        # Mức lương dạng số, None nếu mã lương không hợp lệ
+        return self._salary if isinstance(self._salary, float) else None
+
+    @property
+    def salary_id(self):
+        return format_salary(self._salary)
+
+    @salary_id.setter
+    def salary_id(self, value):
+        self._salary = parse_salary(value)
+
+    @property
+    def dob(self):
+        return from_timestamp(self._dob)
+
+    @dob.setter
+    def dob(self, value):
+        self._dob = value if isinstance(value, int) else to_timestamp(value)
+
+    @property
+    def dob_timestamp(self):
+        return self._dob
+
+    @property
+    def hired_date(self):
+        return from_timestamp(self._hired_date)
+
+    @hired_date.setter
+    def hired_date(self, value):
+        self._hired_date = value if isinstance(value, int) else to_timestamp(value)
+
+    @property
+    def hired_date_timestamp(self):
+        return self._hired_date
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'employee_id': self.employee_id,
+            'department_id': self.department_id,
+            'salary_id': self.salary_id,
+            'name': self.name,
+            'dob': format_datetime(self._dob),
+            'gender': self.gender,
+            'ethnicity': self.ethnicity,
+            'id_number': self.id_number,
+            'id_issued_place': self.id_issued_place,
+            'position': self.position,
+            'hired_date': format_datetime(self._hired_date)
+        }
+
+    @classmethod
+    def from_dict(cls, employee_dict):
+        hired_date = employee_dict.get('hired_date')
+        return cls(
+            employee_dict['employee_id'],
+            intern(employee_dict['department_id']),
+            employee_dict['salary_id'],
+            employee_dict['name'],
+            parse_timestamp(employee_dict['dob']),
+            intern(employee_dict['gender']),
+            intern(employee_dict['ethnicity']),
+            employee_dict['id_number'],
+            intern(employee_dict['id_issued_place']),
+            intern(employee_dict['position']),
+            parse_timestamp(hired_date) if hired_date else None,
+            employee_dict.get('key')
+        )
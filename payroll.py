@@ -0,0 +1,119 @@
+import calendar
+import csv
+import time
+from datetime import datetime
+
+
+class PayrollRun:
+    # Kết quả của một đợt tính lương: các bản ghi lương, lỗi theo nhân viên và thời gian chạy
+    def __init__(self, period, records, errors, compute_seconds):
+        self.period = period
+        self.records = records
+        self.errors = errors
+        self.compute_seconds = compute_seconds
+        self.write_seconds = 0.0
+
+    @property
+    def total(self):
+        return sum(record["total_salary"] for record in self.records)
+
+    @property
+    def working_days(self):
+        return self.records[0]["working_days"] if self.records else 0
+
+    @property
+    def absent(self):
+        # Nhân viên không có ngày công nào trong kỳ: lương cơ bản bằng 0
+        return [record for record in self.records if not record["days_present"]]
+
+    def summary(self):
+        text = f"Kỳ {self.period}: {len(self.records)} nhân viên, tổng {self.total:,.0f}"
+        if self.records:
+            average = sum(record["days_present"] for record in self.records) / len(self.records)
+            text += f", ngày công trung bình {average:.1f}/{self.working_days}"
+        if self.absent:
+            text += f", {len(self.absent)} nhân viên không có ngày công"
+        return text + f", tính {self.compute_seconds * 1000:.1f} ms, ghi {self.write_seconds * 1000:.1f} ms"
+
+
+def load_adjustments(source):
+    # Bảng thưởng/phạt: dict {mã NV: số tiền} hoặc đường dẫn CSV có cột employee_id, amount
+    if source is None:
+        return {}
+    if isinstance(source, dict):
+        return {employee_id: float(amount) for employee_id, amount in source.items()}
+    adjustments = {}
+    with open(source, "r", newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            employee_id = row["employee_id"].strip()
+            adjustments[employee_id] = adjustments.get(employee_id, 0.0) + float(row["amount"])
+    return adjustments
+
+
+def select_employees(repository, department_id=None, position=None):
+    # Dùng chỉ mục của kho nhân viên thay vì duyệt toàn bộ danh sách
+    if department_id and position:
+        return [employee for employee in repository.find_by_department(department_id) if employee.position == position]
+    if department_id:
+        return repository.find_by_department(department_id)
+    if position:
+        return repository.find_by("position", position)
+    return list(repository)
+
+
+def count_working_days(period):
+    # Số ngày làm việc (thứ Hai đến thứ Sáu) trong kỳ "YYYY-MM"
+    year, month = (int(part) for part in period.split("-"))
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    return sum(1 for day in range(days_in_month) if (first_weekday + day) % 7 < 5)
+
+
+def compute_payroll(employees, period, bonuses=None, penalties=None, attendance=None, calculation_time=None):
+    # attendance: AttendanceAggregates; khi có, lương cơ bản được tính theo số ngày đi làm trong kỳ.
+    # Nhân viên không có lượt chấm công nào trong kỳ vẫn được tính (lương cơ bản bằng 0, chỉ còn
+    # thưởng/phạt) và được liệt kê trong PayrollRun.absent để nơi gọi cảnh báo.
+    started = time.perf_counter()
+    bonuses = load_adjustments(bonuses)
+    penalties = load_adjustments(penalties)
+    calculation_time = calculation_time or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Tính theo cột trong một lượt: lương cơ bản, thưởng, phạt rồi cộng từng phần tử
+    employees = list(employees)
+    errors = []
+    base = []
+    valid = []
+    for employee in employees:
+        # Lương đã ở dạng số từ khi nạp, không phải phân tích lại chuỗi mỗi kỳ
+        salary = employee.salary
+        if salary is None:
+            errors.append((employee.employee_id, f"Mã lương không hợp lệ: {employee.salary_id}"))
+        else:
+            base.append(salary)
+            valid.append(employee)
+    ids = [employee.employee_id for employee in valid]
+    working_days = count_working_days(period)
+    if attendance is not None:
+        days_present = [attendance.days_present(employee_id, period) for employee_id in ids]
+        base = [b * min(1.0, days / working_days) for b, days in zip(base, days_present)]
+    else:
+        days_present = [working_days] * len(ids)
+    bonus = [bonuses.get(employee_id, 0.0) for employee_id in ids]
+    penalty = [penalties.get(employee_id, 0.0) for employee_id in ids]
+    totals = [b + plus - minus for b, plus, minus in zip(base, bonus, penalty)]
+
+    records = [
+        {
+            "name": employee.name,
+            "employee_id": employee.employee_id,
+            "department_id": employee.department_id,
+            "salary_id": employee.salary_id,
+            "total_salary": total,
+            "calculation_time": calculation_time,
+            "period": period,
+            "days_present": days,
+            "working_days": working_days
+        }
+        for employee, total, days in zip(valid, totals, days_present)
+    ]
+    return PayrollRun(period, records, errors, time.perf_counter() - started)
+
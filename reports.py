@@ -0,0 +1,182 @@
+from datetime import datetime
+
+from payroll import count_working_days
+from temporal import format_day
+
+
+class GroupCounter:
+    # Số bản ghi theo từng nhóm (bộ giá trị của các trường `fields`), dựng lần đầu khi
+    # được dùng rồi cập nhật dần theo sự kiện thêm/sửa/xóa. Nhóm hiện tại của từng bản
+    # ghi được nhớ theo khóa để khi sửa biết nhóm cũ cần trừ đi.
+    def __init__(self, fields, items, key_of):
+        self.fields = fields
+        self.items = items
+        self.key_of = key_of
+        self._groups = None
+        self._counts = None
+
+    def counts(self, fields=None):
+        # {nhóm: số bản ghi}; fields là một phần của self.fields để gộp lên (vd. chỉ theo phòng)
+        if self._counts is None:
+            self._groups = {}
+            self._counts = {}
+            for item in self.items():
+                self._add(item)
+        if fields is None or tuple(fields) == self.fields:
+            return dict(self._counts)
+        positions = [self.fields.index(field) for field in fields]
+        counts = {}
+        for group, count in self._counts.items():
+            key = tuple(group[position] for position in positions)
+            counts[key] = counts.get(key, 0) + count
+        return counts
+
+    def reset(self):
+        self._groups = None
+        self._counts = None
+
+    def add(self, item):
+        if self._counts is not None:
+            self._add(item)
+
+    def remove(self, item):
+        if self._counts is None:
+            return
+        group = self._groups.pop(self.key_of(item), None)
+        if group is None:
+            return
+        count = self._counts[group] - 1
+        if count:
+            self._counts[group] = count
+        else:
+            del self._counts[group]
+
+    def update(self, item):
+        self.remove(item)
+        self.add(item)
+
+    def on_change(self, event, item):
+        # Dùng làm listener của EmployeeRepository.subscribe()
+        if event == "load":
+            self.reset()
+        elif event == "add":
+            self.add(item)
+        elif event == "add_many":
+            for added in item:
+                self.add(added)
+        elif event == "remove":
+            self.remove(item)
+        else:
+            self.update(item)
+
+    def _add(self, item):
+        group = tuple(getattr(item, field) for field in self.fields)
+        self._groups[self.key_of(item)] = group
+        self._counts[group] = self._counts.get(group, 0) + 1
+
+
+class Report:
+    def __init__(self, title, columns, rows):
+        self.title = title
+        self.columns = columns
+        self.rows = rows
+
+
+class ReportEngine:
+    # Báo cáo tổng hợp trên dữ liệu đang nạp của HRService, dùng chung cho tab "Báo cáo"
+    # và cli.py. Mỗi báo cáo đọc từ một tổng hợp vốn đã được cập nhật dần:
+    # - nhân sự theo phòng/chức vụ: GroupCounter theo sự kiện của kho nhân viên
+    # - tổng lương theo tháng/phòng: cộng dồn trong chỉ mục lương (SalaryLog.totals)
+    # - tỷ lệ đi làm: AttendanceAggregates (số ngày có mặt theo nhân viên, tháng)
+    # - nhân sự dự án: AssignmentIndex
+    # Kết quả được nhớ theo (loại, tham số) cho tới khi phiên bản dữ liệu nguồn thay đổi.
+    KINDS = {
+        "headcount": "Nhân sự theo phòng",
+        "headcount-position": "Nhân sự theo phòng và chức vụ",
+        "payroll-totals": "Tổng lương theo tháng và phòng",
+        "attendance-rate": "Tỷ lệ đi làm theo nhân viên",
+        "staffing": "Nhân sự theo dự án",
+    }
+
+    def __init__(self, service):
+        self.service = service
+        self.headcounts = GroupCounter(("department_id", "position"), lambda: service.employees, lambda employee: employee.key)
+        self._employee_version = 0
+        self._project_version = 0
+        self._generation = 0
+        self._cache = {}
+
+    def on_employee_change(self, event, employee):
+        self.headcounts.on_change(event, employee)
+        self._employee_version += 1
+
+    def on_project_change(self, event, project):
+        self._project_version += 1
+
+    def invalidate(self):
+        # Gọi khi một bộ dữ liệu được nạp lại toàn bộ
+        self._generation += 1
+        self._cache = {}
+
+    def run(self, kind, period=None, department_id=None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Không có báo cáo: {kind}")
+        key = (kind, period, department_id)
+        version = self._version(kind)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        builder = getattr(self, "_" + kind.replace("-", "_"))
+        report = Report(self.KINDS[kind], *builder(period, department_id))
+        self._cache[key] = (version, report)
+        return report
+
+    def _version(self, kind):
+        if kind in ("headcount", "headcount-position"):
+            return self._generation, self._employee_version
+        if kind == "payroll-totals":
+            return self._generation, len(self.service.salary_history)
+        if kind == "attendance-rate":
+            return self._generation, self._employee_version, self.service.attendance_stats.version
+        return self._generation, self._project_version, self._employee_version
+
+    def _headcount(self, period, department_id):
+        rows = [group + (count,) for group, count in self.headcounts.counts(("department_id",)).items()
+                if department_id is None or group[0] == department_id]
+        rows.sort(key=lambda row: str(row[0]))
+        return ("department_id", "headcount"), rows
+
+    def _headcount_position(self, period, department_id):
+        rows = [group + (count,) for group, count in self.headcounts.counts().items()
+                if department_id is None or group[0] == department_id]
+        rows.sort(key=lambda row: (str(row[0]), str(row[1])))
+        return ("department_id", "position", "headcount"), rows
+
+    def _payroll_totals(self, period, department_id):
+        return ("month", "department_id", "records", "total_salary"), self.service.salary_history.totals(period, department_id)
+
+    def _attendance_rate(self, period, department_id):
+        period = period or datetime.now().strftime("%Y-%m")
+        working_days = count_working_days(period)
+        stats = self.service.attendance_stats
+        employees = self.service.employees
+        rows = []
+        for employee in employees.find_by_department(department_id) if department_id else employees:
+            monthly = stats.get(employee.employee_id, period)
+            days_present = monthly.days_present if monthly else 0
+            rate = round(100 * days_present / working_days, 1) if working_days else 0.0
+            rows.append((employee.employee_id, employee.name, employee.department_id, period, days_present, working_days, rate,
+                         monthly.late_count if monthly else 0))
+        return ("employee_id", "name", "department_id", "period", "days_present", "working_days", "rate", "late_count"), rows
+
+    def _staffing(self, period, department_id):
+        # Chỉ đếm các mã còn thuộc về một nhân viên; lọc theo phòng thì chỉ đếm nhân viên của phòng đó
+        employees = self.service.employees
+        rows = []
+        for project in sorted(self.service.projects, key=lambda project: project.project_id):
+            members = self.service.assignments.employees_of(project.project_id)
+            staffed = [employees.get(employee_id) for employee_id in members]
+            headcount = sum(1 for employee in staffed if employee is not None and (department_id is None or employee.department_id == department_id))
+            rows.append((project.project_id, project.name, project.status, format_day(project.start_day),
+                         format_day(project.end_day), len(members), headcount))
+        return ("project_id", "name", "status", "start_date", "end_date", "assigned", "active_headcount"), rows
@@ -0,0 +1,163 @@
+import bisect
+
+from temporal import to_timestamp
+
+
+class EmployeeRepository:
+    # Kho nhân viên: giữ danh sách theo thứ tự hiển thị cùng các chỉ mục tra cứu.
+    # Mọi thao tác thêm/sửa/xóa phải đi qua đây để chỉ mục không bị lệch.
+    # Mỗi nhân viên được gán một khóa nội bộ bền vững (employee.key) vì employee_id
+    # trong dữ liệu cũ có thể bị trùng. Danh sách được giữ trong dict theo khóa (dict giữ
+    # thứ tự chèn) nên xóa/thay một nhân viên là O(1) mà thứ tự hiển thị không đổi.
+    # Các chỉ mục bên ngoài (tìm kiếm...) đăng ký qua subscribe() để nhận sự kiện
+    # "load", "add", "update", "remove" và "add_many" (thêm cả lô khi nhập từ tệp).
+    HASH_FIELDS = ("employee_id", "name", "department_id", "position")
+    # Chỉ mục có thứ tự theo số giây (không tạo datetime): trường -> thuộc tính số giây
+    SORTED_FIELDS = {"dob": "dob_timestamp", "hired_date": "hired_date_timestamp"}
+
+    def __init__(self, employees=None):
+        self._by_key = {}
+        self._next_key = 1
+        self._hash_indexes = {field: {} for field in self.HASH_FIELDS}
+        self._sorted_indexes = {field: [] for field in self.SORTED_FIELDS}
+        self._listeners = []
+        if employees:
+            self.load(employees)
+
+    def __iter__(self):
+        return iter(self._by_key.values())
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def subscribe(self, listener):
+        # listener(sự kiện, nhân viên); với "load" nhân viên là None, với "add_many" là danh sách
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self._listeners.remove(listener)
+
+    def load(self, employees):
+        employees = list(employees)
+        self._by_key = {}
+        self._next_key = max((employee.key or 0 for employee in employees), default=0) + 1
+        for employee in employees:
+            self._assign_key(employee)
+        self._hash_indexes = {field: {} for field in self.HASH_FIELDS}
+        for employee in employees:
+            for field in self.HASH_FIELDS:
+                self._hash_indexes[field].setdefault(getattr(employee, field), []).append(employee)
+        # Dựng chỉ mục có thứ tự một lần bằng sort thay vì chèn từng phần tử
+        self._sorted_indexes = {
+            field: sorted((getattr(employee, attribute), id(employee), employee) for employee in employees)
+            for field, attribute in self.SORTED_FIELDS.items()
+        }
+        self._notify("load", None)
+
+    def add(self, employee):
+        self._assign_key(employee)
+        self._index(employee)
+        self._notify("add", employee)
+        return employee
+
+    def add_many(self, employees):
+        # Chỉ mục có thứ tự được sắp lại một lần cho cả lô thay vì chèn từng phần tử
+        employees = list(employees)
+        for employee in employees:
+            self._assign_key(employee)
+            for field in self.HASH_FIELDS:
+                self._hash_indexes[field].setdefault(getattr(employee, field), []).append(employee)
+        for field, attribute in self.SORTED_FIELDS.items():
+            entries = self._sorted_indexes[field]
+            entries.extend((getattr(employee, attribute), id(employee), employee) for employee in employees)
+            entries.sort()
+        self._notify("add_many", employees)
+        return employees
+
+    def remove(self, employee):
+        self._unindex(employee)
+        del self._by_key[employee.key]
+        self._notify("remove", employee)
+        return employee
+
+    def update(self, employee, **changes):
+        self._unindex(employee)
+        for field, value in changes.items():
+            setattr(employee, field, value)
+        self._index(employee)
+        self._notify("update", employee)
+        return employee
+
+    def replace(self, employee, new_employee):
+        # Thay bản ghi tại chỗ, giữ nguyên khóa và vị trí trong danh sách
+        self._unindex(employee)
+        new_employee.key = employee.key
+        self._by_key[new_employee.key] = new_employee
+        self._index(new_employee)
+        self._notify("update", new_employee)
+        return new_employee
+
+    def get_by_key(self, key):
+        return self._by_key.get(key)
+
+    def get(self, employee_id):
+        matches = self._hash_indexes["employee_id"].get(employee_id)
+        return matches[0] if matches else None
+
+    def find_by(self, field, value):
+        return list(self._hash_indexes[field].get(value, ()))
+
+    def find_by_name(self, name):
+        return self.find_by("name", name)
+
+    def find_by_department(self, department_id):
+        return self.find_by("department_id", department_id)
+
+    def distinct(self, field):
+        # Các giá trị khác nhau đang có của một trường băm (vd. danh sách phòng ban)
+        return sorted(self._hash_indexes[field], key=str)
+
+    def range(self, field, start=None, end=None):
+        # Trả về nhân viên có start <= giá trị <= end (datetime) theo chỉ mục có thứ tự
+        entries = self._sorted_indexes[field]
+        low = 0 if start is None else bisect.bisect_left(entries, (to_timestamp(start),))
+        high = len(entries) if end is None else bisect.bisect_right(entries, (to_timestamp(end), float("inf")))
+        return [entry[2] for entry in entries[low:high]]
+
+    def born_between(self, start=None, end=None):
+        return self.range("dob", start, end)
+
+    def hired_between(self, start=None, end=None):
+        return self.range("hired_date", start, end)
+
+    def _notify(self, event, employee):
+        for listener in self._listeners:
+            listener(event, employee)
+
+    def _assign_key(self, employee):
+        if employee.key is None:
+            employee.key = self._next_key
+        self._next_key = max(self._next_key, employee.key + 1)
+        self._by_key[employee.key] = employee
+
+    def _index(self, employee):
+        for field in self.HASH_FIELDS:
+            self._hash_indexes[field].setdefault(getattr(employee, field), []).append(employee)
+        for field, attribute in self.SORTED_FIELDS.items():
+            bisect.insort(self._sorted_indexes[field], (getattr(employee, attribute), id(employee), employee))
+
+    def _unindex(self, employee):
+        for field in self.HASH_FIELDS:
+            bucket = self._hash_indexes[field].get(getattr(employee, field))
+            if bucket:
+                for position, candidate in enumerate(bucket):
+                    if candidate is employee:
+                        del bucket[position]
+                        break
+                if not bucket:
+                    del self._hash_indexes[field][getattr(employee, field)]
+        for field, attribute in self.SORTED_FIELDS.items():
+            entries = self._sorted_indexes[field]
+            position = bisect.bisect_left(entries, (getattr(employee, attribute), id(employee)))
+            if position < len(entries) and entries[position][2] is employee:
+                del entries[position]
@@ -0,0 +1,230 @@
+import json
+import os
+from collections import OrderedDict
+
+from journal import write_atomic
+
+
+def record_month(record):
+    # Tháng của bản ghi lương: theo kỳ lương nếu có, không thì theo ngày tính lương
+    return record.get("period") or record["calculation_time"][:7]
+
+
+class RecordCache:
+    # Bộ nhớ đệm LRU nhỏ cho các bản ghi đã đọc, đủ cho vài trang đang hiển thị
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self._records = OrderedDict()
+
+    def get(self, key, load):
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = load(key)
+            if len(self._records) > self.capacity:
+                self._records.popitem(last=False)
+        else:
+            self._records.move_to_end(key)
+        return record
+
+
+class SalaryLog:
+    # Đọc salary.json (JSONL, chỉ ghi thêm) theo yêu cầu thay vì nạp toàn bộ.
+    # Tệp chỉ mục salary.json.idx lưu vị trí byte của từng dòng cùng chỉ mục theo
+    # phòng, mã nhân viên và tháng; các dòng mới được quét nối tiếp từ vị trí đã chỉ mục.
+    # Chỉ mục chỉ được ghi lại khi đóng hoặc sau một lượt quét lớn: nếu nó cũ hơn tệp
+    # thì lần mở sau chỉ việc quét tiếp phần còn thiếu. Số bản ghi và tổng lương theo
+    # (tháng, phòng) được cộng dồn ngay khi chỉ mục nên báo cáo không phải đọc lại tệp.
+    # read_only=True (lệnh chỉ đọc): chỉ mục chỉ dựng trong bộ nhớ, không ghi tệp .idx.
+    SAVE_AFTER = 10000
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.index_path = path + ".idx"
+        self._offsets = []
+        self._departments = None
+        self._by_department = {}
+        self._by_employee = {}
+        self._by_month = {}
+        self._totals = {}
+        self._size = 0
+        self._head = ""
+        self._dirty = False
+        self._file = None
+        self._cache = RecordCache()
+        self._load_index()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def refresh(self):
+        # Chỉ mục thêm các dòng mới ghi; trả về số bản ghi mới
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+        if size < self._size or not self._read_head().startswith(self._head):
+            # Tệp đã bị thay thế hoặc cắt ngắn: dựng lại chỉ mục từ đầu
+            self._reset()
+        if size == self._size:
+            return 0
+
+        added = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._size)
+            offset = self._size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Dòng cuối đang được ghi dở: để lần sau
+                    break
+                if line.strip():
+                    self._add(offset, json.loads(line))
+                    added += 1
+                offset += len(line)
+        self._size = offset
+        self._head = self._read_head()
+        self._dirty = True
+        if added >= self.SAVE_AFTER and not self.read_only:
+            self._save_index()
+        return added
+
+    def keys(self, department_id=None, employee_id=None, month=None):
+        # Danh sách khóa (số thứ tự dòng) thỏa các bộ lọc, xếp theo mã phòng như bảng lương cũ.
+        # Duyệt thẳng danh sách chỉ mục hẹp nhất; chỉ giao với danh sách tháng khi lọc cả
+        # mã nhân viên lẫn tháng, lọc phòng tra mã phòng của từng dòng.
+        if employee_id is not None:
+            lines = self._by_employee.get(employee_id, [])
+            if month is not None:
+                allowed = set(self._by_month.get(month, ()))
+                lines = [line for line in lines if line in allowed]
+            if department_id is not None:
+                departments = self._line_departments()
+                lines = [line for line in lines if departments[line] == department_id]
+            return list(lines)
+        if month is not None:
+            departments = self._line_departments()
+            groups = {}
+            for line in self._by_month.get(month, []):
+                if department_id is None or departments[line] == department_id:
+                    groups.setdefault(departments[line], []).append(line)
+            return [line for department in sorted(groups) for line in groups[department]]
+        if department_id is not None:
+            return list(self._by_department.get(department_id, []))
+        return [line for department in sorted(self._by_department) for line in self._by_department[department]]
+
+    def get(self, key):
+        return self._cache.get(key, self._read)
+
+    def records(self, **filters):
+        # Đọc lần lượt mọi bản ghi thỏa bộ lọc, không giữ trong bộ nhớ đệm (dùng khi xuất tệp)
+        for key in self.keys(**filters):
+            yield self._read(key)
+
+    def page(self, number, size=100, **filters):
+        keys = self.keys(**filters)
+        return [self.get(key) for key in keys[number * size:(number + 1) * size]]
+
+    def totals(self, month=None, department_id=None):
+        # [(tháng, mã phòng, số bản ghi, tổng lương)] theo tháng rồi mã phòng
+        rows = []
+        months = sorted(self._totals) if month is None else [month]
+        for current_month in months:
+            departments = self._totals.get(current_month, {})
+            for department in sorted(departments) if department_id is None else [department_id]:
+                if department in departments:
+                    count, total = departments[department]
+                    rows.append((current_month, department, count, total))
+        return rows
+
+    def months(self):
+        return sorted(self._by_month)
+
+    def departments(self):
+        return sorted(self._by_department)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._dirty and not self.read_only:
+            self._save_index()
+
+    def _add(self, offset, record):
+        line = len(self._offsets)
+        self._offsets.append(offset)
+        if self._departments is not None:
+            self._departments.append(record["department_id"])
+        self._by_department.setdefault(record["department_id"], []).append(line)
+        self._by_employee.setdefault(record["employee_id"], []).append(line)
+        month = record_month(record)
+        self._by_month.setdefault(month, []).append(line)
+        totals = self._totals.setdefault(month, {}).setdefault(record["department_id"], [0, 0])
+        totals[0] += 1
+        totals[1] += record["total_salary"]
+
+    def _line_departments(self):
+        # Mã phòng của từng dòng: không lưu trong tệp chỉ mục mà dựng lại từ chỉ mục theo
+        # phòng ở lần lọc đầu tiên cần tới, sau đó cập nhật dần theo các dòng mới
+        if self._departments is None:
+            self._departments = [None] * len(self._offsets)
+            for department, lines in self._by_department.items():
+                for line in lines:
+                    self._departments[line] = department
+        return self._departments
+
+    def _read(self, key):
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        self._file.seek(self._offsets[key])
+        return json.loads(self._file.readline())
+
+    def _read_head(self):
+        try:
+            with open(self.path, "rb") as f:
+                return f.read(64).hex()
+        except FileNotFoundError:
+            return ""
+
+    def _reset(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._offsets = []
+        self._departments = None
+        self._by_department = {}
+        self._by_employee = {}
+        self._by_month = {}
+        self._totals = {}
+        self._size = 0
+        self._cache = RecordCache()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if "totals" not in index:
+            # Chỉ mục cũ chưa có tổng theo tháng/phòng: quét lại từ đầu
+            return
+        self._offsets = index["offsets"]
+        self._by_department = index["by_department"]
+        self._by_employee = index["by_employee"]
+        self._by_month = index["by_month"]
+        self._totals = index["totals"]
+        self._size = index["size"]
+        self._head = index["head"]
+
+    def _save_index(self):
+        self._dirty = False
+        write_atomic(self.index_path, {
+            "size": self._size,
+            "head": self._head,
+            "offsets": self._offsets,
+            "by_department": self._by_department,
+            "by_employee": self._by_employee,
+            "by_month": self._by_month,
+            "totals": self._totals
+        })
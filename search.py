@@ -0,0 +1,204 @@
+import bisect
+import re
+import unicodedata
+from functools import lru_cache
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Điểm cho mỗi kiểu khớp, nhân với trọng số của trường
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+FUZZY_SCORE = 1.0
+MAX_EXPANSIONS = 64
+
+
+def normalize(text):
+    # Bỏ dấu tiếng Việt để "Lê Thị D" và "le thi d" khớp nhau
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFD", text.replace("đ", "d").replace("Đ", "D"))
+    return "".join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+@lru_cache(maxsize=4096)
+def _tokenize_text(text):
+    # Tên, phòng, chức vụ lặp lại rất nhiều giữa các nhân viên nên kết quả được nhớ lại
+    return tuple(TOKEN_PATTERN.findall(normalize(text)))
+
+
+def tokenize(text):
+    text = str(text)
+    if text.isascii():
+        return TOKEN_PATTERN.findall(text.lower())
+    return list(_tokenize_text(text))
+
+
+def deletions(token):
+    # Các biến thể xóa một ký tự, dùng để tìm từ sai khác một ký tự (kiểu SymSpell)
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SearchIndex:
+    # Chỉ mục đảo ngược với tìm theo tiền tố và tìm gần đúng (sai một ký tự).
+    # fields: {tên trường: trọng số}; mỗi tài liệu được thêm/sửa/xóa riêng lẻ.
+    def __init__(self, fields):
+        self.fields = fields
+        self._postings = {}      # token -> {khóa: trọng số}
+        self._documents = {}     # khóa -> {token: trọng số}
+        self._sorted_tokens = []
+        self._neighbours = {}    # biến thể xóa một ký tự -> tập token
+
+    def __len__(self):
+        return len(self._documents)
+
+    def load(self, items):
+        # Dựng lại toàn bộ từ các cặp (khóa, tài liệu); danh sách token chỉ sắp xếp một lần
+        self._postings = {}
+        self._documents = {}
+        self._neighbours = {}
+        self._sorted_tokens = None
+        for key, document in items:
+            self.add(key, document)
+        self._sorted_tokens = sorted(self._postings)
+
+    def add(self, key, document):
+        # document: đối tượng có các thuộc tính trùng tên trường, hoặc dict
+        if key in self._documents:
+            self.remove(key)
+        weights = {}
+        for field, weight in self.fields.items():
+            value = document.get(field) if isinstance(document, dict) else getattr(document, field)
+            for token in tokenize(value or ""):
+                weights[token] = max(weights.get(token, 0.0), weight)
+        self._documents[key] = weights
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._add_token(token)
+            postings[key] = weight
+
+    def add_many(self, items):
+        # Như add() cho từng cặp (khóa, tài liệu), nhưng danh sách token chỉ sắp xếp lại một lần
+        self._sorted_tokens = None
+        try:
+            for key, document in items:
+                self.add(key, document)
+        finally:
+            self._sorted_tokens = sorted(self._postings)
+
+    def remove(self, key):
+        weights = self._documents.pop(key, None)
+        if weights is None:
+            return
+        for token in weights:
+            postings = self._postings[token]
+            del postings[key]
+            if not postings:
+                del self._postings[token]
+                self._remove_token(token)
+
+    def update(self, key, document):
+        self.remove(key)
+        self.add(key, document)
+
+    def search(self, query, limit=20):
+        # Mọi từ trong truy vấn đều phải khớp; kết quả xếp theo tổng điểm giảm dần
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        scores = None
+        for query_token in query_tokens:
+            token_scores = {}
+            for token, score in self._candidates(query_token):
+                for key, weight in self._postings[token].items():
+                    token_scores[key] = max(token_scores.get(key, 0.0), score * weight)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {key: scores[key] + value for key, value in token_scores.items() if key in scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return [key for key, _ in ranked[:limit]]
+
+    def matches(self, query):
+        # Tập khóa khớp mọi từ của truy vấn (chính xác, tiền tố hoặc gần đúng), không xếp
+        # hạng và không giới hạn số token tiền tố: dùng cho bộ lọc cần đủ mọi kết quả
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return set()
+        keys = None
+        for query_token in query_tokens:
+            token_keys = set()
+            for token, score in self._candidates(query_token, expansions=None):
+                token_keys.update(self._postings[token])
+            keys = token_keys if keys is None else keys & token_keys
+            if not keys:
+                break
+        return keys
+
+    def document_matches(self, key, query):
+        # Như matches() nhưng chỉ cho một tài liệu: so với các token của chính nó
+        weights = self._documents.get(key)
+        if weights is None:
+            return False
+        for query_token in tokenize(query):
+            if not any(token.startswith(query_token) for token in weights) and not self._fuzzy_tokens(query_token).intersection(weights):
+                return False
+        return True
+
+    def _candidates(self, query_token, expansions=MAX_EXPANSIONS):
+        # expansions: số token tiền tố tối đa (None: tất cả), chỉ giới hạn khi xếp hạng
+        if query_token in self._postings:
+            yield query_token, EXACT_SCORE
+        position = bisect.bisect_right(self._sorted_tokens, query_token)
+        end = bisect.bisect_left(self._sorted_tokens, query_token + "\U0010ffff", position)
+        if expansions is not None:
+            end = min(end, position + expansions)
+        for token in self._sorted_tokens[position:end]:
+            yield token, PREFIX_SCORE
+        for token in self._fuzzy_tokens(query_token):
+            yield token, FUZZY_SCORE
+
+    def _fuzzy_tokens(self, query_token):
+        # Token sai khác một ký tự (không tính token trùng hoặc có tiền tố query_token)
+        if len(query_token) < 3:
+            return set()
+        fuzzy = set(self._neighbours.get(query_token, ()))
+        for variant in deletions(query_token):
+            fuzzy.update(self._neighbours.get(variant, ()))
+            if variant in self._postings:
+                fuzzy.add(variant)
+        return {token for token in fuzzy if not token.startswith(query_token)}
+
+    def _add_token(self, token):
+        if self._sorted_tokens is not None:
+            bisect.insort(self._sorted_tokens, token)
+        if not token.isalpha():
+            # Mã số (mã NV, CMND...) chỉ tìm chính xác hoặc theo tiền tố
+            return
+        for variant in deletions(token):
+            self._neighbours.setdefault(variant, set()).add(token)
+
+    def _remove_token(self, token):
+        if self._sorted_tokens is not None:
+            del self._sorted_tokens[bisect.bisect_left(self._sorted_tokens, token)]
+        if not token.isalpha():
+            return
+        for variant in deletions(token):
+            tokens = self._neighbours.get(variant)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._neighbours[variant]
+
+
+def employee_search_index():
+    return SearchIndex({"name": 3.0, "employee_id": 3.0, "id_number": 2.0, "position": 1.0, "department_id": 1.0})
+
+
+def project_search_index():
+    return SearchIndex({"name": 3.0, "description": 1.0})
@@ -0,0 +1,182 @@
+import bisect
+import re
+
+
+# Khóa sắp xếp theo kiểu dữ liệu thật: lương theo số, ngày theo ngày, mã theo thứ tự tự
+# nhiên ("KT9" < "KT10"), tên không phân biệt hoa thường. Giá trị không hợp lệ xếp cuối.
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(text):
+    parts = _DIGITS.split(str(text).casefold())
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in parts if part)
+
+
+def text_key(text):
+    return str(text).casefold()
+
+
+def number_key(value):
+    return (1, 0.0) if value is None else (0, value)
+
+
+EMPLOYEE_SORT_KEYS = {
+    "name": lambda employee: text_key(employee.name),
+    "employee_id": lambda employee: natural_key(employee.employee_id),
+    "department_id": lambda employee: natural_key(employee.department_id),
+    "position": lambda employee: text_key(employee.position),
+    "salary": lambda employee: number_key(employee.salary),
+    "dob": lambda employee: employee.dob_timestamp,
+    "hired_date": lambda employee: employee.hired_date_timestamp,
+}
+
+PROJECT_SORT_KEYS = {
+    "name": lambda project: text_key(project.name),
+    "start_date": lambda project: project.start_day,
+    "end_date": lambda project: project.end_day,
+    "status": lambda project: text_key(project.status),
+    "headcount": lambda project: len(project.assigned_employees),
+}
+
+
+class SortIndex:
+    # Thứ tự tăng dần của mọi bản ghi theo một khóa, giữ dạng danh sách (khóa sắp xếp,
+    # khóa bản ghi) đã sắp. Thêm/sửa/xóa chỉ chèn hoặc gỡ một phần tử bằng bisect.
+    # Khóa bản ghi dùng để phân định các giá trị bằng nhau nên thứ tự luôn ổn định.
+    def __init__(self, sort_key, key_of, items):
+        self.sort_key = sort_key
+        self.key_of = key_of
+        self._values = {}
+        for item in items:
+            self._values[key_of(item)] = sort_key(item)
+        self._entries = sorted((value, item_key) for item_key, value in self._values.items())
+        self._keys = None
+        self._ranks = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, item):
+        item_key = self.key_of(item)
+        value = self._values[item_key] = self.sort_key(item)
+        bisect.insort(self._entries, (value, item_key))
+        self._invalidate()
+
+    def add_many(self, items):
+        # Nối cả lô rồi sắp lại một lần (timsort gộp phần đã sắp với phần mới)
+        for item in items:
+            item_key = self.key_of(item)
+            value = self._values[item_key] = self.sort_key(item)
+            self._entries.append((value, item_key))
+        self._entries.sort()
+        self._invalidate()
+
+    def remove(self, item):
+        item_key = self.key_of(item)
+        if item_key not in self._values:
+            return
+        value = self._values.pop(item_key)
+        del self._entries[bisect.bisect_left(self._entries, (value, item_key))]
+        self._invalidate()
+
+    def update(self, item):
+        item_key = self.key_of(item)
+        value = self.sort_key(item)
+        if item_key in self._values and self._values[item_key] == value:
+            return
+        self.remove(item)
+        self._values[item_key] = value
+        bisect.insort(self._entries, (value, item_key))
+        self._invalidate()
+
+    def keys(self, descending=False):
+        if self._keys is None:
+            self._keys = [item_key for value, item_key in self._entries]
+        return self._keys[::-1] if descending else self._keys
+
+    def ranks(self):
+        # Hạng (bằng nhau thì cùng hạng) của từng bản ghi, dùng để ghép nhiều khóa
+        if self._ranks is None:
+            ranks = {}
+            rank = -1
+            previous = object()
+            for value, item_key in self._entries:
+                if value != previous:
+                    rank += 1
+                    previous = value
+                ranks[item_key] = rank
+            self._ranks = ranks
+        return self._ranks
+
+    def _invalidate(self):
+        self._keys = None
+        self._ranks = None
+
+
+class SortOrders:
+    # Các thứ tự sắp xếp đã tính sẵn cho một tập bản ghi, mỗi khóa một SortIndex dựng
+    # lần đầu khi được dùng rồi cập nhật dần theo thay đổi. order() trả về danh sách khóa
+    # bản ghi theo một hoặc nhiều tiêu chí, mỗi tiêu chí là tên khóa hoặc (tên, giảm_dần).
+    # Kết quả nhiều khóa được nhớ lại tới lần thay đổi dữ liệu tiếp theo.
+    def __init__(self, sort_keys, items, key_of):
+        self.sort_keys = sort_keys
+        self.items = items
+        self.key_of = key_of
+        self._indexes = {}
+        self._combined = {}
+
+    def order(self, *specs):
+        specs = tuple((spec, False) if isinstance(spec, str) else tuple(spec) for spec in specs)
+        if len(specs) == 1:
+            field, descending = specs[0]
+            return self.index(field).keys(descending)
+        combined = self._combined.get(specs)
+        if combined is None:
+            columns = [(self.index(field).ranks(), -1 if descending else 1) for field, descending in specs]
+            first = self.index(specs[0][0]).keys()
+            combined = self._combined[specs] = sorted(first, key=lambda item_key: tuple(sign * ranks[item_key] for ranks, sign in columns))
+        return combined
+
+    def index(self, field):
+        index = self._indexes.get(field)
+        if index is None:
+            index = self._indexes[field] = SortIndex(self.sort_keys[field], self.key_of, self.items())
+        return index
+
+    def reset(self):
+        self._indexes = {}
+        self._combined = {}
+
+    def add(self, item):
+        for index in self._indexes.values():
+            index.add(item)
+        self._combined = {}
+
+    def add_many(self, items):
+        for index in self._indexes.values():
+            index.add_many(items)
+        self._combined = {}
+
+    def remove(self, item):
+        for index in self._indexes.values():
+            index.remove(item)
+        self._combined = {}
+
+    def update(self, item):
+        for index in self._indexes.values():
+            index.update(item)
+        self._combined = {}
+
+    def on_change(self, event, item):
+        # Dùng làm listener của EmployeeRepository.subscribe()
+        if event == "load":
+            self.reset()
+        elif event == "add":
+            self.add(item)
+        elif event == "add_many":
+            self.add_many(item)
+        elif event == "remove":
+            self.remove(item)
+        else:
+            self.update(item)
@@ -0,0 +1,604 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from array import array
+from itertools import groupby
+
+from activity_log import ActivityLog
+from attendance import AttendanceStore
+from journal import Journal, write_atomic
+from salary_log import RecordCache, SalaryLog
+
+
+class StorageEngine:
+    # Giao diện lưu trữ chung cho ứng dụng. Dữ liệu trao đổi ở dạng dict/chuỗi
+    # giống hệt định dạng JSON cũ để có thể thay engine mà không sửa ứng dụng.
+    # read_only: mở cho lệnh chỉ đọc, không tạo tệp phụ và không chuyển đổi dữ liệu cũ.
+    read_only = False
+
+    def load_employees(self):
+        # Trả về (danh sách dict nhân viên, lịch sử hoạt động dạng chuỗi cũ). Lịch sử cũ chỉ
+        # còn để chuyển một lần sang ActivityLog rồi được xóa qua clear_legacy_activity().
+        raise NotImplementedError
+
+    def save_employee(self, employee_data):
+        raise NotImplementedError
+
+    def save_employees(self, employees_data):
+        # Ghi cả lô nhân viên (nhập từ tệp) trong một lần: có đủ cả lô hoặc không có gì
+        raise NotImplementedError
+
+    def delete_employee(self, key):
+        raise NotImplementedError
+
+    def activity_log(self):
+        # Trả về ActivityLog (tệp riêng, chỉ ghi thêm) dùng chung cho mọi engine
+        raise NotImplementedError
+
+    def clear_legacy_activity(self):
+        raise NotImplementedError
+
+    def load_attendance(self, resolve_employee_id):
+        # Trả về AttendanceStore; resolve_employee_id(tên) dùng để chuyển dữ liệu cũ theo tên
+        raise NotImplementedError
+
+    def save_attendance(self, store):
+        raise NotImplementedError
+
+    def load_projects(self):
+        raise NotImplementedError
+
+    def save_projects(self, projects_data):
+        raise NotImplementedError
+
+    def load_salary(self):
+        raise NotImplementedError
+
+    def salary_history(self):
+        # Trả về đối tượng đọc lịch sử lương theo trang (xem SalaryLog)
+        raise NotImplementedError
+
+    def append_salary(self, records, period=None):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonStorage(StorageEngine):
+    # Lưu trữ trên các tệp JSON như trước; employees.json đi kèm nhật ký ghi trước
+    def __init__(self, directory=".", compact_threshold=256 * 1024, read_only=False):
+        self.directory = directory
+        self.read_only = read_only
+        self.employees_path = os.path.join(directory, "employees.json")
+        self.attendance_path = os.path.join(directory, "attendance.bin")
+        self.legacy_attendance_path = os.path.join(directory, "attendance.json")
+        self.projects_path = os.path.join(directory, "projects.json")
+        self.salary_path = os.path.join(directory, "salary.json")
+        self.journal = Journal(self.employees_path, compact_threshold)
+        self._salary_log = None
+        self._activity_log = None
+        self._employees = {}
+        self._activity = []
+        self._legacy_attendance = {}
+
+    def load_employees(self):
+        snapshot, events = self.journal.load()
+        snapshot = snapshot or {}
+        self._employees = {}
+        for employee_data in assign_keys(snapshot.get("employees", [])):
+            self._employees[employee_data["key"]] = employee_data
+        self._activity = list(snapshot.get("activity_history", []))
+        self._legacy_attendance = snapshot.get("attendance", {})
+
+        # Phát lại các thay đổi ghi sau snapshot gần nhất
+        for event in events:
+            if event["op"] == "put":
+                self._employees[event["employee"]["key"]] = event["employee"]
+            elif event["op"] == "put_many":
+                for employee_data in event["employees"]:
+                    self._employees[employee_data["key"]] = employee_data
+            elif event["op"] == "delete":
+                self._employees.pop(event["key"], None)
+            elif event["op"] == "activity":
+                self._activity.append(event["entry"])
+        return list(self._employees.values()), list(self._activity)
+
+    def save_employee(self, employee_data):
+        self.journal.append({"op": "put", "employee": employee_data})
+        self._employees[employee_data["key"]] = employee_data
+        self._maybe_compact()
+
+    def save_employees(self, employees_data):
+        # Một dòng nhật ký cho cả lô; lô lớn sẽ làm nhật ký vượt ngưỡng và được gộp vào snapshot
+        self.journal.append({"op": "put_many", "employees": employees_data})
+        for employee_data in employees_data:
+            self._employees[employee_data["key"]] = employee_data
+        self._maybe_compact()
+
+    def delete_employee(self, key):
+        self.journal.append({"op": "delete", "key": key})
+        self._employees.pop(key, None)
+        self._maybe_compact()
+
+    def activity_log(self):
+        if self._activity_log is None:
+            self._activity_log = ActivityLog(os.path.join(self.directory, "activity"), read_only=self.read_only)
+        return self._activity_log
+
+    def clear_legacy_activity(self):
+        # Lịch sử đã nằm trong ActivityLog: ghi lại snapshot để employees.json không còn mang nó
+        if self._activity:
+            self._activity = []
+            self.journal.compact(self._snapshot())
+
+    def load_attendance(self, resolve_employee_id):
+        if os.path.exists(self.attendance_path):
+            return AttendanceStore.load(self.attendance_path)
+        try:
+            with open(self.legacy_attendance_path, "r") as f:
+                return AttendanceStore.from_legacy(json.load(f), resolve_employee_id)
+        except FileNotFoundError:
+            return AttendanceStore()
+
+    def save_attendance(self, store):
+        store.save(self.attendance_path)
+
+    def load_projects(self):
+        try:
+            with open(self.projects_path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    def save_projects(self, projects_data):
+        write_atomic(self.projects_path, projects_data, indent=4, default=str)
+
+    def load_salary(self):
+        with open(self.salary_path, "r") as f:
+            return [json.loads(line) for line in f]
+
+    def salary_history(self):
+        if self._salary_log is None:
+            self._salary_log = SalaryLog(self.salary_path, read_only=self.read_only)
+        return self._salary_log
+
+    def append_salary(self, records, period=None):
+        # Một lần ghi cho cả lô bản ghi lương
+        with open(self.salary_path, "a") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def flush(self):
+        self.journal.compact(self._snapshot(), wait=True)
+
+    def close(self):
+        self.journal.close()
+        if self._salary_log is not None:
+            self._salary_log.close()
+        if self._activity_log is not None:
+            self._activity_log.close()
+
+    def _maybe_compact(self):
+        if self.journal.needs_compaction():
+            self.journal.compact(self._snapshot())
+
+    def _snapshot(self):
+        # Bản sao nông là đủ: các dict nhân viên được thay mới chứ không sửa tại chỗ
+        snapshot = {
+            "employees": list(self._employees.values()),
+            "attendance": self._legacy_attendance
+        }
+        if self._activity:
+            snapshot["activity_history"] = list(self._activity)
+        return snapshot
+
+
+class SqliteStorage(StorageEngine):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS employees (
+            key INTEGER PRIMARY KEY,
+            employee_id TEXT NOT NULL,
+            department_id TEXT,
+            salary_id TEXT,
+            name TEXT NOT NULL,
+            dob TEXT,
+            gender TEXT,
+            ethnicity TEXT,
+            id_number TEXT,
+            id_issued_place TEXT,
+            position TEXT,
+            hired_date TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_employees_employee_id ON employees (employee_id);
+        CREATE INDEX IF NOT EXISTS idx_employees_name ON employees (name);
+        CREATE INDEX IF NOT EXISTS idx_employees_department_id ON employees (department_id);
+
+        CREATE TABLE IF NOT EXISTS attendance_events (
+            id INTEGER PRIMARY KEY,
+            employee_id TEXT NOT NULL,
+            check_in INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_attendance_employee_time ON attendance_events (employee_id, check_in);
+
+        CREATE TABLE IF NOT EXISTS projects (
+            project_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            start_date TEXT,
+            end_date TEXT,
+            description TEXT,
+            status TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_projects_name ON projects (name);
+
+        CREATE TABLE IF NOT EXISTS project_assignments (
+            project_id INTEGER NOT NULL REFERENCES projects (project_id) ON DELETE CASCADE,
+            employee_id TEXT NOT NULL,
+            position INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_assignments_project ON project_assignments (project_id, position);
+        CREATE INDEX IF NOT EXISTS idx_assignments_employee ON project_assignments (employee_id);
+
+        CREATE TABLE IF NOT EXISTS payroll_runs (
+            run_id INTEGER PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            period TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_payroll_runs_period ON payroll_runs (period);
+
+        CREATE TABLE IF NOT EXISTS payroll_entries (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL REFERENCES payroll_runs (run_id),
+            name TEXT,
+            employee_id TEXT NOT NULL,
+            department_id TEXT,
+            salary_id TEXT,
+            total_salary REAL NOT NULL,
+            calculation_time TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_payroll_employee ON payroll_entries (employee_id);
+        CREATE INDEX IF NOT EXISTS idx_payroll_department ON payroll_entries (department_id, calculation_time);
+        CREATE INDEX IF NOT EXISTS idx_payroll_time ON payroll_entries (calculation_time);
+
+        CREATE TABLE IF NOT EXISTS activity_log (
+            id INTEGER PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            entry TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_activity_created_at ON activity_log (created_at);
+    """
+
+    EMPLOYEE_COLUMNS = ("key", "employee_id", "department_id", "salary_id", "name", "dob", "gender", "ethnicity", "id_number", "id_issued_place", "position", "hired_date")
+    SALARY_COLUMNS = ("name", "employee_id", "department_id", "salary_id", "total_salary", "calculation_time")
+
+    def __init__(self, path="employees.db", read_only=False):
+        self.path = path
+        self.read_only = read_only
+        # Kết nối dùng chung giữa luồng giao diện (đọc) và luồng ghi nền (IOWorker):
+        # mọi lần dùng kết nối phải giữ _lock, kết quả đọc được lấy hết trước khi nhả khóa
+        self._lock = threading.RLock()
+        if read_only and os.path.exists(path):
+            # Chế độ ro của SQLite: không tạo tệp CSDL mới, không đổi lược đồ hay chế độ nhật ký
+            self.connection = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+        elif read_only:
+            # Chưa có CSDL: đọc như kho rỗng (giống JsonStorage khi thiếu tệp), không tạo tệp trên đĩa
+            self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.executescript(self.SCHEMA)
+        else:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA foreign_keys = ON")
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.executescript(self.SCHEMA)
+        self._activity_log = None
+        # Trạng thái đã có trong CSDL sau lần nạp/lưu gần nhất, để mỗi lần lưu chỉ ghi phần
+        # thay đổi: {mã NV: mảng mốc thời gian} và {mã dự án: (hàng dự án, các mã NV được gán)}
+        self._saved_attendance = None
+        self._saved_projects = None
+
+    def load_employees(self):
+        employees = [dict(row) for row in self.query("SELECT * FROM employees ORDER BY key")]
+        activity = [row["entry"] for row in self.query("SELECT entry FROM activity_log ORDER BY id")]
+        return employees, activity
+
+    def save_employee(self, employee_data):
+        with self._lock, self.connection:
+            self._insert_employees([employee_data])
+
+    def save_employees(self, employees_data):
+        with self._lock, self.connection:
+            self._insert_employees(employees_data)
+
+    def delete_employee(self, key):
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM employees WHERE key = ?", (key,))
+
+    def activity_log(self):
+        # Bảng activity_log chỉ còn là nguồn chuyển đổi; lịch sử mới nằm cạnh tệp CSDL
+        if self._activity_log is None:
+            self._activity_log = ActivityLog(os.path.join(os.path.dirname(os.path.abspath(self.path)), "activity"), read_only=self.read_only)
+        return self._activity_log
+
+    def clear_legacy_activity(self):
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM activity_log")
+
+    def load_attendance(self, resolve_employee_id):
+        rows = self.query("SELECT employee_id, check_in FROM attendance_events ORDER BY employee_id, check_in")
+        store = AttendanceStore.from_pairs(rows)
+        with self._lock:
+            self._saved_attendance = {employee_id: array("q", column) for employee_id, column in store.items()}
+        return store
+
+    def save_attendance(self, store):
+        # store là bản chụp (AttendanceStore.snapshot) nên được giữ lại làm trạng thái đã lưu.
+        # Cột chỉ dài thêm thì chỉ chèn các lần chấm công mới; cột đổi ở giữa (nhập lần chấm
+        # công cũ hơn, đổi mã) thì ghi lại riêng cột đó; nhân viên không còn thì xóa.
+        with self._lock, self.connection:
+            saved = self._saved_attendance
+            if saved is None:
+                self.connection.execute("DELETE FROM attendance_events")
+                self._insert_attendance(store)
+            else:
+                removed = [employee_id for employee_id in saved if employee_id not in store]
+                rewritten = []
+                added = []
+                for employee_id, column in store.items():
+                    previous = saved.get(employee_id)
+                    if previous is None:
+                        added.extend((employee_id, timestamp) for timestamp in column)
+                    elif len(previous) == len(column) and previous == column:
+                        continue
+                    elif len(previous) < len(column) and column[:len(previous)] == previous:
+                        added.extend((employee_id, timestamp) for timestamp in column[len(previous):])
+                    else:
+                        rewritten.append(employee_id)
+                        added.extend((employee_id, timestamp) for timestamp in column)
+                self.connection.executemany("DELETE FROM attendance_events WHERE employee_id = ?", ((employee_id,) for employee_id in removed + rewritten))
+                self.connection.executemany("INSERT INTO attendance_events (employee_id, check_in) VALUES (?, ?)", added)
+            self._saved_attendance = dict(store.items())
+
+    def load_projects(self):
+        projects = []
+        assignments = {}
+        for row in self.query("SELECT project_id, employee_id FROM project_assignments ORDER BY project_id, position"):
+            assignments.setdefault(row["project_id"], []).append(row["employee_id"])
+        for row in self.query("SELECT * FROM projects ORDER BY project_id"):
+            project = dict(row)
+            project["assigned_employees"] = assignments.get(project["project_id"], [])
+            projects.append(project)
+        with self._lock:
+            self._saved_projects = {project["project_id"]: self._project_state(project) for project in projects}
+        return projects
+
+    def save_projects(self, projects_data):
+        # Chỉ ghi dự án có thông tin đổi và danh sách gán của dự án có danh sách gán đổi
+        current = {project["project_id"]: self._project_state(project) for project in projects_data}
+        with self._lock, self.connection:
+            saved = self._saved_projects
+            if saved is None:
+                self.connection.execute("DELETE FROM project_assignments")
+                self.connection.execute("DELETE FROM projects")
+                self._insert_projects(projects_data)
+            else:
+                removed = [(project_id,) for project_id in saved if project_id not in current]
+                self.connection.executemany("DELETE FROM project_assignments WHERE project_id = ?", removed)
+                self.connection.executemany("DELETE FROM projects WHERE project_id = ?", removed)
+                for project_id, (row, assigned) in current.items():
+                    previous = saved.get(project_id)
+                    if previous is None or previous[0] != row:
+                        self.connection.execute(
+                            "INSERT INTO projects (project_id, name, start_date, end_date, description, status) VALUES (?, ?, ?, ?, ?, ?) "
+                            "ON CONFLICT (project_id) DO UPDATE SET name = excluded.name, start_date = excluded.start_date, "
+                            "end_date = excluded.end_date, description = excluded.description, status = excluded.status", row)
+                    if previous is None or previous[1] != assigned:
+                        self.connection.execute("DELETE FROM project_assignments WHERE project_id = ?", (project_id,))
+                        self.connection.executemany(
+                            "INSERT INTO project_assignments (project_id, employee_id, position) VALUES (?, ?, ?)",
+                            ((project_id, employee_id, position) for position, employee_id in enumerate(assigned)))
+            self._saved_projects = current
+
+    def load_salary(self):
+        columns = ", ".join(f"e.{column}" for column in self.SALARY_COLUMNS)
+        query = f"SELECT {columns}, r.period FROM payroll_entries e JOIN payroll_runs r ON r.run_id = e.run_id ORDER BY e.id"
+        return [dict(row) for row in self.query(query)]
+
+    def salary_history(self):
+        return SqliteSalaryHistory(self)
+
+    def append_salary(self, records, period=None):
+        with self._lock, self.connection:
+            self._insert_salary(records, period)
+
+    def query(self, query, parameters=()):
+        with self._lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+        if self._activity_log is not None:
+            self._activity_log.close()
+
+    def import_from(self, source):
+        # Chuyển toàn bộ dữ liệu từ một engine khác trong một giao dịch duy nhất
+        employees, activity = source.load_employees()
+        try:
+            salary = source.load_salary()
+        except FileNotFoundError:
+            salary = []
+        with self._lock, self.connection:
+            for table in ("project_assignments", "projects", "payroll_entries", "payroll_runs", "attendance_events", "activity_log", "employees"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self._insert_employees(employees)
+            self._insert_activity(activity)
+            names = {}
+            for employee_data in employees:
+                names.setdefault(employee_data["name"], employee_data["employee_id"])
+            self._insert_attendance(source.load_attendance(names.get))
+            self._insert_projects(source.load_projects())
+            # Bản ghi cùng một đợt tính lương (cùng kỳ và thời điểm tính, liền nhau trong tệp)
+            # thành một payroll_run như khi ghi bằng append_salary
+            for (period, calculation_time), records in groupby(salary, key=lambda record: (record.get("period"), record["calculation_time"])):
+                self._insert_salary(list(records), period)
+            self._saved_attendance = None
+            self._saved_projects = None
+
+    def _insert_employees(self, employees):
+        placeholders = ", ".join("?" for _ in self.EMPLOYEE_COLUMNS)
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO employees ({', '.join(self.EMPLOYEE_COLUMNS)}) VALUES ({placeholders})",
+            ([employee_data.get(column) for column in self.EMPLOYEE_COLUMNS] for employee_data in employees)
+        )
+
+    def _insert_activity(self, entries):
+        # Mỗi dòng lịch sử bắt đầu bằng "YYYY-MM-DD HH:MM:SS - "
+        self.connection.executemany(
+            "INSERT INTO activity_log (created_at, entry) VALUES (?, ?)",
+            ((entry[:19], entry) for entry in entries)
+        )
+
+    def _insert_attendance(self, store):
+        self.connection.executemany(
+            "INSERT INTO attendance_events (employee_id, check_in) VALUES (?, ?)",
+            ((employee_id, timestamp) for employee_id, column in store.items() for timestamp in column)
+        )
+
+    @staticmethod
+    def _project_state(project):
+        # (hàng bảng projects, các mã NV được gán theo thứ tự); bản sao nên danh sách gán
+        # của dự án có sửa tại chỗ sau đó cũng không làm lệch trạng thái đã lưu
+        row = (project["project_id"], project["name"], str(project["start_date"]), str(project["end_date"]), project["description"], project.get("status", ""))
+        return row, tuple(project.get("assigned_employees", []))
+
+    def _insert_projects(self, projects_data):
+        self.connection.executemany(
+            "INSERT INTO projects (project_id, name, start_date, end_date, description, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (self._project_state(project)[0] for project in projects_data)
+        )
+        self.connection.executemany(
+            "INSERT INTO project_assignments (project_id, employee_id, position) VALUES (?, ?, ?)",
+            ((project["project_id"], employee_id, position) for project in projects_data for position, employee_id in enumerate(project.get("assigned_employees", [])))
+        )
+
+    def _insert_salary(self, records, period=None):
+        if not records:
+            return
+        cursor = self.connection.execute("INSERT INTO payroll_runs (created_at, period) VALUES (?, ?)", (records[-1]["calculation_time"], period))
+        self.connection.executemany(
+            f"INSERT INTO payroll_entries (run_id, {', '.join(self.SALARY_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ([cursor.lastrowid] + [record[column] for column in self.SALARY_COLUMNS] for record in records)
+        )
+
+
+class SqliteSalaryHistory:
+    # Cùng giao diện với SalaryLog nhưng truy vấn trực tiếp bảng payroll_entries
+    def __init__(self, storage):
+        self.storage = storage
+        self._cache = RecordCache()
+
+    def exists(self):
+        return bool(self.storage.query("SELECT EXISTS (SELECT 1 FROM payroll_entries)")[0][0])
+
+    def __len__(self):
+        return self.storage.query("SELECT COUNT(*) FROM payroll_entries")[0][0]
+
+    def refresh(self):
+        return 0
+
+    def keys(self, department_id=None, employee_id=None, month=None):
+        where, parameters = self._where(department_id, employee_id, month)
+        query = f"SELECT e.id FROM payroll_entries e JOIN payroll_runs r ON r.run_id = e.run_id {where} ORDER BY e.department_id, e.id"
+        return [row[0] for row in self.storage.query(query, parameters)]
+
+    def records(self, department_id=None, employee_id=None, month=None):
+        where, parameters = self._where(department_id, employee_id, month)
+        columns = ", ".join(f"e.{column}" for column in SqliteStorage.SALARY_COLUMNS)
+        query = f"SELECT {columns}, r.period FROM payroll_entries e JOIN payroll_runs r ON r.run_id = e.run_id {where} ORDER BY e.department_id, e.id"
+        for row in self.storage.query(query, parameters):
+            yield dict(row)
+
+    def get(self, key):
+        return self._cache.get(key, self._read)
+
+    def page(self, number, size=100, **filters):
+        keys = self.keys(**filters)
+        return [self.get(key) for key in keys[number * size:(number + 1) * size]]
+
+    def totals(self, month=None, department_id=None):
+        where, parameters = self._where(department_id, None, month)
+        query = ("SELECT COALESCE(r.period, substr(e.calculation_time, 1, 7)) AS month, e.department_id, COUNT(*), SUM(e.total_salary) "
+                 f"FROM payroll_entries e JOIN payroll_runs r ON r.run_id = e.run_id {where} GROUP BY 1, 2 ORDER BY 1, 2")
+        return [tuple(row) for row in self.storage.query(query, parameters)]
+
+    def months(self):
+        query = "SELECT DISTINCT COALESCE(r.period, substr(e.calculation_time, 1, 7)) FROM payroll_entries e JOIN payroll_runs r ON r.run_id = e.run_id ORDER BY 1"
+        return [row[0] for row in self.storage.query(query)]
+
+    def departments(self):
+        return [row[0] for row in self.storage.query("SELECT DISTINCT department_id FROM payroll_entries ORDER BY 1")]
+
+    def close(self):
+        pass
+
+    def _where(self, department_id, employee_id, month):
+        conditions = []
+        parameters = []
+        if department_id is not None:
+            conditions.append("e.department_id = ?")
+            parameters.append(department_id)
+        if employee_id is not None:
+            conditions.append("e.employee_id = ?")
+            parameters.append(employee_id)
+        if month is not None:
+            conditions.append("COALESCE(r.period, substr(e.calculation_time, 1, 7)) = ?")
+            parameters.append(month)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), parameters
+
+    def _read(self, key):
+        columns = ", ".join(f"e.{column}" for column in SqliteStorage.SALARY_COLUMNS)
+        row = self.storage.query(f"SELECT {columns}, r.period FROM payroll_entries e JOIN payroll_runs r ON r.run_id = e.run_id WHERE e.id = ?", (key,))
+        return dict(row[0])
+
+
+def assign_keys(employees):
+    # Dữ liệu cũ chưa có khóa: đánh số tiếp theo khóa lớn nhất hiện có
+    next_key = max((employee_data.get("key") or 0 for employee_data in employees), default=0) + 1
+    keyed = []
+    for employee_data in employees:
+        if employee_data.get("key") is None:
+            employee_data = dict(employee_data, key=next_key)
+            next_key += 1
+        keyed.append(employee_data)
+    return keyed
+
+
+def open_storage(kind=None, directory=".", read_only=False):
+    # Chọn engine qua biến môi trường HR_STORAGE ("json" hoặc "sqlite")
+    kind = kind or os.environ.get("HR_STORAGE", "json")
+    if kind == "sqlite":
+        return SqliteStorage(os.path.join(directory, "employees.db"), read_only)
+    if kind == "json":
+        return JsonStorage(directory, read_only=read_only)
+    raise ValueError(f"Không hỗ trợ kiểu lưu trữ: {kind}")
+
+
+def migrate_json_to_sqlite(directory=".", db_path=None):
+    source = JsonStorage(directory)
+    target = SqliteStorage(db_path or os.path.join(directory, "employees.db"))
+    try:
+        target.import_from(source)
+    finally:
+        source.close()
+        target.close()
+
+
+if __name__ == "__main__":
+    # python storage.py [thư_mục] : chuyển dữ liệu JSON sang employees.db
+    migrate_json_to_sqlite(sys.argv[1] if len(sys.argv) > 1 else ".")
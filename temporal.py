@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+
+# Mã hóa thời gian dùng chung: bên trong mọi mốc thời gian là số nguyên (giây hoặc ngày
+# kể từ 1970-01-01, giờ địa phương không múi giờ), chỉ đổi sang datetime/chuỗi khi cần.
+#   lưu trữ : "YYYY-MM-DD HH:MM:SS" (và "YYYY-MM-DD" cho ngày)
+#   giao diện: "dd/mm/yyyy"
+# Đọc chuỗi dùng fromisoformat (viết bằng C, nhanh hơn strptime nhiều lần) rồi đổi sang số
+# bằng số học trên timedelta. Ghi chuỗi không dùng strftime: phần ngày và phần giờ (ít giá
+# trị khác nhau) được nhớ lại theo số ngày/số giây trong ngày.
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+SECONDS_PER_DAY = 86400
+
+
+def to_timestamp(moment):
+    # Nhận datetime hoặc date; phần nhỏ hơn giây bị bỏ
+    if not isinstance(moment, datetime):
+        return (moment.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY
+    delta = moment - EPOCH
+    return delta.days * SECONDS_PER_DAY + delta.seconds
+
+
+def from_timestamp(timestamp):
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def to_day(moment):
+    return moment.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day):
+    return datetime.fromordinal(day + EPOCH_ORDINAL)
+
+
+@lru_cache(maxsize=65536)
+def format_day(day):
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+@lru_cache(maxsize=65536)
+def format_display_day(day):
+    moment = date.fromordinal(day + EPOCH_ORDINAL)
+    return f"{moment.day:02d}/{moment.month:02d}/{moment.year:04d}"
+
+
+def format_date(timestamp):
+    return format_day(timestamp // SECONDS_PER_DAY)
+
+
+def format_display_date(timestamp):
+    return format_display_day(timestamp // SECONDS_PER_DAY)
+
+
+@lru_cache(maxsize=SECONDS_PER_DAY)
+def format_clock(seconds):
+    # Số giây trong ngày -> "HH:MM:SS"
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_datetime(timestamp):
+    day, seconds = divmod(timestamp, SECONDS_PER_DAY)
+    return format_day(day) + " " + format_clock(seconds)
+
+
+def parse_day(text):
+    # "YYYY-MM-DD" -> số ngày
+    return date.fromisoformat(text).toordinal() - EPOCH_ORDINAL
+
+
+def parse_timestamp(text):
+    return to_timestamp(parse_datetime(text))
+
+
+def parse_datetime(text):
+    # Chấp nhận dd/mm/yyyy như trên giao diện hoặc ISO (YYYY-MM-DD[ HH:MM:SS])
+    text = text.strip()
+    if "/" in text:
+        day, month, year = text.split("/")
+        if len(year) != 4:
+            raise ValueError(f"Ngày không hợp lệ: {text}")
+        return datetime(int(year), int(month), int(day))
+    return datetime.fromisoformat(text)
@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Các mô-đun của ứng dụng nằm ở thư mục gốc, không đóng gói
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def employee_data(employee_id, name, department_id="Ke Toan", salary_id="5000000", id_number=None, key=None):
+    # Bản ghi nhân viên theo định dạng employees.json
+    data = {
+        "employee_id": employee_id,
+        "department_id": department_id,
+        "salary_id": salary_id,
+        "name": name,
+        "dob": "1990-01-01 00:00:00",
+        "gender": "Nam",
+        "ethnicity": "Kinh",
+        "id_number": id_number or f"ID-{employee_id}-{name}",
+        "id_issued_place": "Ha Noi",
+        "position": "Nhan Vien",
+        "hired_date": "2024-01-01 08:00:00"
+    }
+    if key is not None:
+        data["key"] = key
+    return data
+
+
+@pytest.fixture
+def make_employee():
+    return employee_data
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # Thư mục dữ liệu JSON với snapshot employees.json và các tệp JSON khác cho trước
+    def create(employees, files=None):
+        with open(tmp_path / "employees.json", "w", encoding="utf-8") as f:
+            json.dump({"employees": employees}, f)
+        for name, content in (files or {}).items():
+            with open(tmp_path / name, "w", encoding="utf-8") as f:
+                json.dump(content, f)
+        return str(tmp_path)
+    return create
@@ -0,0 +1,71 @@
+import os
+
+from activity_log import ActivityLog, format_record, make_record, parse_legacy
+
+
+def add_records(log, count, start=0):
+    for number in range(start, start + count):
+        log.add(make_record(f"Thao tac {number}", "test", number, moment=1_700_000_000 + number * 60))
+    log.write_pending()
+
+
+def test_activity_log_rotates_segments_and_reads_across_them(tmp_path):
+    directory = str(tmp_path / "activity")
+    log = ActivityLog(directory, segment_bytes=300, recent=5)
+    add_records(log, 20)
+    assert len(log._segments) >= 2
+    assert [record["entity"] for record in log.read(0, 20)] == list(range(20))
+    assert [record["entity"] for record in log.recent()] == list(range(15, 20))
+    log.close()
+
+    reopened = ActivityLog(directory, segment_bytes=300, recent=5)
+    assert len(reopened) == 20
+    assert [record["entity"] for record in reopened.read(3, 12)] == list(range(3, 12))
+    low, high = reopened.positions(1_700_000_000 + 5 * 60, 1_700_000_000 + 9 * 60)
+    assert (low, high) == (5, 10)
+    add_records(reopened, 3, start=20)
+    assert [record["entity"] for record in reopened.read(18, 23)] == [18, 19, 20, 21, 22]
+    reopened.close()
+
+
+def test_activity_log_drops_oldest_segments(tmp_path):
+    log = ActivityLog(str(tmp_path / "activity"), segment_bytes=300, max_segments=2)
+    add_records(log, 40)
+    first = log.first_position()
+    assert first > 0
+    assert len(log) == 40
+    assert [record["entity"] for record in log.read(0, first + 2)] == [first, first + 1]
+    log.close()
+
+
+def test_activity_log_recovers_unlisted_segment_and_torn_line(tmp_path):
+    directory = str(tmp_path / "activity")
+    log = ActivityLog(directory, segment_bytes=300)
+    add_records(log, 20)
+    log.close()
+    # Dừng giữa lúc xoay vòng (segments.json chưa có đoạn cuối) và dòng cuối bị ghi dở
+    os.remove(os.path.join(directory, "segments.json"))
+    current = max(name for name in os.listdir(directory) if name.endswith(".jsonl"))
+    with open(os.path.join(directory, current), "ab") as f:
+        f.write(b'{"ts": 1')
+
+    reopened = ActivityLog(directory, segment_bytes=300)
+    assert len(reopened) == 20
+    add_records(reopened, 1, start=20)
+    reopened.close()
+    assert [record["entity"] for record in ActivityLog(directory, segment_bytes=300).read(0, 21)] == list(range(21))
+
+
+def test_activity_log_read_only_creates_nothing(tmp_path):
+    directory = str(tmp_path / "activity")
+    log = ActivityLog(directory, read_only=True)
+    assert len(log) == 0
+    log.close()
+    assert not os.path.exists(directory)
+
+
+def test_legacy_entries_are_parsed():
+    record = parse_legacy("2024-03-03 23:41:56 - Thêm nhân viên: Le Thi D")
+    assert record["action"] == "legacy"
+    assert format_record(record) == "2024-03-03 23:41:56 - Thêm nhân viên: Le Thi D"
+    assert parse_legacy("khong co thoi gian")["ts"] == 0
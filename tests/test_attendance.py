@@ -0,0 +1,139 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from attendance import AttendanceAggregates, AttendanceStore, check_in_many
+from core import DATASET_DEPENDENCIES, DATASETS, HRService
+from io_worker import IOWorker
+from storage import JsonStorage
+from temporal import to_timestamp
+
+
+def test_attendance_bin_round_trip(tmp_path):
+    path = str(tmp_path / "attendance.bin")
+    store = AttendanceStore()
+    store.add("NV1", datetime(2024, 3, 4, 8, 30))
+    store.add("NV1", datetime(2024, 3, 1, 7, 55))
+    store.add("Lê-02", datetime(2024, 3, 2, 9, 0))
+    store.save(path)
+
+    loaded = AttendanceStore.load(path)
+    assert sorted(loaded.employee_ids()) == ["Lê-02", "NV1"]
+    assert loaded.check_ins("NV1") == [datetime(2024, 3, 1, 7, 55), datetime(2024, 3, 4, 8, 30)]
+    assert loaded.event_count() == 3
+
+    # Cột trên mmap được chép ra khi ghi, rồi lưu đè lên chính tệp đang ánh xạ
+    loaded.add("NV1", datetime(2024, 3, 2, 8, 0))
+    loaded.add("NV3", datetime(2024, 3, 5, 8, 0))
+    loaded.save(path)
+    reloaded = AttendanceStore.load(path)
+    assert list(reloaded.timestamps("NV1")) == sorted(list(reloaded.timestamps("NV1")))
+    assert reloaded.count("NV1") == 3
+    assert reloaded.count("NV3") == 1
+    reloaded.close()
+
+
+def test_attendance_bin_empty_and_invalid(tmp_path):
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert len(AttendanceStore.load(str(empty))) == 0
+
+    invalid = tmp_path / "invalid.bin"
+    invalid.write_bytes(b"XXXX" + b"\0" * 12)
+    with pytest.raises(ValueError):
+        AttendanceStore.load(str(invalid))
+
+
+def test_legacy_attendance_migrates_by_name_and_counts_unresolved():
+    legacy = {
+        "Nguyen Van A": ["2024-03-01 08:00:00", "2024-03-02 08:10:00"],
+        "Khong Ai": ["2024-03-01 08:00:00"]
+    }
+    store = AttendanceStore.from_legacy(legacy, {"Nguyen Van A": "NV1"}.get)
+    assert store.employee_ids() == ["NV1"]
+    assert store.count("NV1") == 2
+    assert store.unresolved == {"Khong Ai": 1}
+
+
+def test_legacy_attendance_is_saved_as_binary(data_dir, make_employee):
+    directory = data_dir([make_employee("NV1", "Nguyen Van A", key=1)],
+                         {"attendance.json": {"Nguyen Van A": ["2024-03-01 08:00:00"]}})
+    service = HRService(JsonStorage(directory))
+    service.load()
+    service.save_attendance()
+    service.close()
+
+    store = JsonStorage(directory).load_attendance(lambda name: None)
+    assert store.check_ins("NV1") == [datetime(2024, 3, 1, 8, 0)]
+
+
+def test_aggregates_rebuild_matches_incremental_updates():
+    moments = [datetime(2024, 3, 1, 7, 50), datetime(2024, 3, 1, 12, 0), datetime(2024, 3, 4, 8, 15), datetime(2024, 4, 1, 9, 0)]
+    store = AttendanceStore()
+    incremental = AttendanceAggregates()
+    for moment in moments:
+        store.add("NV1", moment)
+        incremental.add("NV1", moment)
+    rebuilt = AttendanceAggregates()
+    rebuilt.rebuild(store)
+
+    for aggregates in (incremental, rebuilt):
+        assert aggregates.days_present("NV1", "2024-03") == 2
+        assert aggregates.late_count("NV1", "2024-03") == 1
+        assert aggregates.days_present("NV1", "2024-04") == 1
+        assert aggregates.get("NV1", "2024-03").first_check_in == moments[0]
+        assert aggregates.get("NV1", "2024-03").last_check_in == moments[2]
+
+
+def test_check_in_many_skips_unknown_and_same_day():
+    store = AttendanceStore()
+    aggregates = AttendanceAggregates()
+    known = {"NV1": object()}
+    entries = [("NV1", datetime(2024, 3, 1, 8)), ("NV1", datetime(2024, 3, 1, 9)), ("NV9", datetime(2024, 3, 1, 8))]
+    result = check_in_many(store, aggregates, entries, known.get)
+    assert result.recorded == [("NV1", datetime(2024, 3, 1, 8))]
+    assert [employee_id for employee_id, _ in result.skipped] == ["NV1", "NV9"]
+    assert list(store.timestamps("NV1")) == [to_timestamp(datetime(2024, 3, 1, 8))]
+
+
+def test_attendance_read_requires_employees(data_dir, make_employee):
+    service = HRService(JsonStorage(data_dir([make_employee("NV1", "An", key=1)])))
+    with pytest.raises(RuntimeError):
+        service.read("attendance")
+    service.close()
+
+
+def test_async_load_migrates_legacy_attendance(data_dir, make_employee):
+    # Nạp như ứng dụng Tk: đọc trên IOWorker, apply() trong poll(), phần phụ thuộc chỉ được
+    # gửi đi đọc sau khi phần nó cần đã apply xong
+    directory = data_dir([make_employee("NV1", "Nguyen Van A", key=1), make_employee("NV2", "Tran Thi B", key=2)],
+                         {"attendance.json": {"Nguyen Van A": ["2024-03-01 08:00:00", "2024-03-04 08:05:00"],
+                                              "Tran Thi B": ["2024-03-01 07:45:00"],
+                                              "Khong Ai": ["2024-03-01 08:00:00"]}})
+    worker = IOWorker(debounce=0.0)
+    service = HRService(JsonStorage(directory), worker)
+
+    def load(dataset):
+        def loaded(data):
+            service.apply(dataset, data)
+            for waiting, dependencies in DATASET_DEPENDENCIES.items():
+                if dataset in dependencies and service.is_loaded(*dependencies):
+                    load(waiting)
+        worker.submit(None, lambda: service.read(dataset), loaded)
+
+    for dataset in DATASETS:
+        if not DATASET_DEPENDENCIES.get(dataset):
+            load(dataset)
+    deadline = time.monotonic() + 10
+    while not service.is_loaded(*DATASETS) and time.monotonic() < deadline:
+        worker.poll()
+        time.sleep(0.01)
+
+    assert service.is_loaded(*DATASETS)
+    assert service.attendance.count("NV1") == 2
+    assert service.attendance.count("NV2") == 1
+    assert service.attendance.unresolved == {"Khong Ai": 1}
+    assert service.attendance_stats.days_present("NV1", "2024-03") == 2
+    assert any(violation.reference == "Khong Ai" for violation in service.verify_integrity())
+    service.close()
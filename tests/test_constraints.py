@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+from constraints import ConstraintError
+from core import HRService
+from storage import JsonStorage
+
+
+def load_service(data_dir, make_employee):
+    employees = [make_employee("NV1", "An", key=1, id_number="111"), make_employee("NV1", "Binh", key=2, id_number="222"),
+                 make_employee("NV2", "Cuong", key=3, id_number="111")]
+    projects = [{"project_id": 1, "name": "Du an", "start_date": "2024-03-01", "end_date": "2024-03-31", "description": "",
+                 "status": "", "assigned_employees": ["NV1", "NV9"]}]
+    service = HRService(JsonStorage(data_dir(employees, {"projects.json": projects})))
+    service.load()
+    service.check_in([("NV1", datetime(2024, 3, 1, 8))])
+    return service
+
+
+def test_verify_reports_duplicates_and_dangling_references(data_dir, make_employee):
+    service = load_service(data_dir, make_employee)
+    violations = service.verify_integrity()
+    by_dataset = {}
+    for violation in violations:
+        by_dataset.setdefault(violation.dataset, []).append(violation)
+    # Trùng mã NV (sửa được) và trùng CMND (chỉ báo cáo)
+    assert sorted((violation.reference, violation.fix is not None) for violation in by_dataset["employees"]) == [("111", False), ("NV1", True)]
+    assert [violation.reference for violation in by_dataset["projects"]] == [1]
+    assert "NV9" in by_dataset["projects"][0].message
+    service.close()
+
+
+def test_repair_renumbers_duplicate_and_unassigns_missing(data_dir, make_employee):
+    service = load_service(data_dir, make_employee)
+    fixed, remaining = service.repair_integrity()
+    assert len(fixed) == 2
+    assert [violation.reference for violation in remaining] == ["111"]
+
+    binh = service.employees.get_by_key(2)
+    assert binh.employee_id == "NV1-2"
+    assert service.employees.get("NV1").key == 1
+    # Chấm công theo mã cũ ở lại với người giữ mã cũ
+    assert service.attendance.count("NV1") == 1
+    assert service.attendance.count("NV1-2") == 0
+    assert service.get_project(1).assigned_employees == ["NV1"]
+    assert [violation.reference for violation in service.verify_integrity()] == ["111"]
+    service.close()
+
+
+def test_unique_constraints_checked_before_write(data_dir, make_employee):
+    service = load_service(data_dir, make_employee)
+    cuong = service.employees.get_by_key(3)
+    with pytest.raises(ConstraintError):
+        service.update_employee(cuong, employee_id="NV1")
+    with pytest.raises(ConstraintError):
+        service.assign_employees(service.get_project(1), ["NV404"])
+    service.update_employee(cuong, id_number="333")
+    assert service.employees.find_by("employee_id", "NV2") == [cuong]
+    service.close()
+
+
+def test_update_employee_keeps_shared_attendance(data_dir, make_employee):
+    service = load_service(data_dir, make_employee)
+    binh = service.employees.get_by_key(2)
+    service.update_employee(binh, employee_id="NV3")
+    assert service.attendance.count("NV1") == 1
+    assert service.attendance.count("NV3") == 0
+    assert service.get_project(1).assigned_employees[:2] == ["NV1", "NV9"]
+    assert "NV3" in service.get_project(1).assigned_employees
+
+    # Khi chỉ còn một người giữ mã, đổi mã thì chấm công đi theo
+    an = service.employees.get_by_key(1)
+    service.update_employee(an, employee_id="NV4")
+    assert service.attendance.count("NV1") == 0
+    assert service.attendance.count("NV4") == 1
+    assert service.attendance_stats.days_present("NV4", "2024-03") == 1
+    service.close()
@@ -0,0 +1,58 @@
+import json
+import os
+
+from journal import Journal, iter_json, write_atomic
+from storage import JsonStorage
+
+
+def test_journal_replays_changes_after_snapshot(data_dir, make_employee):
+    directory = data_dir([make_employee("NV1", "An", key=1), make_employee("NV2", "Binh", key=2)])
+    storage = JsonStorage(directory)
+    storage.load_employees()
+    storage.save_employee(make_employee("NV3", "Cuong", key=3))
+    storage.save_employees([make_employee("NV4", "Dung", key=4), make_employee("NV5", "Giang", key=5)])
+    storage.delete_employee(1)
+    storage.close()
+
+    employees, activity = JsonStorage(directory).load_employees()
+    assert sorted(employee["key"] for employee in employees) == [2, 3, 4, 5]
+    assert os.path.exists(os.path.join(directory, "employees.json.journal"))
+
+
+def test_journal_compaction_writes_snapshot_and_drops_old_events(data_dir, make_employee):
+    directory = data_dir([make_employee("NV1", "An", key=1)])
+    storage = JsonStorage(directory, compact_threshold=1)
+    storage.load_employees()
+    for key in range(2, 6):
+        storage.save_employee(make_employee(f"NV{key}", f"Ten {key}", key=key))
+    storage.journal.wait()
+    storage.close()
+
+    with open(os.path.join(directory, "employees.json"), encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["journal_seq"] >= 3
+    assert not os.path.exists(os.path.join(directory, "employees.json.journal.old"))
+    employees, _ = JsonStorage(directory).load_employees()
+    assert sorted(employee["key"] for employee in employees) == [1, 2, 3, 4, 5]
+
+
+def test_journal_skips_events_already_in_snapshot_and_torn_last_line(tmp_path):
+    snapshot_path = str(tmp_path / "data.json")
+    write_atomic(snapshot_path, {"journal_seq": 2})
+    with open(snapshot_path + ".journal.old", "w", encoding="utf-8") as f:
+        for seq in (1, 2, 3):
+            f.write(json.dumps({"op": "put", "seq": seq}) + "\n")
+    with open(snapshot_path + ".journal", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "put", "seq": 4}) + "\n")
+        f.write('{"op": "put", "se')
+
+    journal = Journal(snapshot_path)
+    snapshot, events = journal.load()
+    assert [event["seq"] for event in events] == [3, 4]
+    assert journal.seq == 4
+
+
+def test_iter_json_matches_json_dumps():
+    data = {"employees": [{"name": "Lê Thị D", "key": 1}, []], "attendance": {}, "total": 1.5}
+    assert "".join(iter_json(data, {})) == json.dumps(data)
+    assert "".join(iter_json(data, {"ensure_ascii": False})) == json.dumps(data, ensure_ascii=False)
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from attendance import AttendanceAggregates
+from core import HRService
+from models import Employee
+from payroll import compute_payroll, count_working_days, load_adjustments, select_employees
+from repository import EmployeeRepository
+from storage import JsonStorage
+
+
+def employee(employee_id, salary_id="2100000", department_id="Ke Toan", position="Nhan Vien"):
+    return Employee(employee_id, department_id, salary_id, f"Ten {employee_id}", datetime(1990, 1, 1), "Nam", "Kinh",
+                    f"ID-{employee_id}", "Ha Noi", position, datetime(2024, 1, 1))
+
+
+def test_count_working_days():
+    assert count_working_days("2024-03") == 21
+    assert count_working_days("2024-02") == 21
+
+
+def test_payroll_prorates_by_attendance_and_pays_absent_with_warning():
+    attendance = AttendanceAggregates()
+    for day in range(1, 11):
+        attendance.add("NV1", datetime(2024, 3, day, 8))
+    run = compute_payroll([employee("NV1"), employee("NV2"), employee("NV3", salary_id="abc")], "2024-03",
+                          {"NV1": 500.0, "NV2": 300.0}, {"NV2": 100.0}, attendance, "2024-03-31 10:00:00")
+
+    records = {record["employee_id"]: record for record in run.records}
+    assert records["NV1"]["days_present"] == 10
+    assert records["NV1"]["total_salary"] == pytest.approx(1000000.0 + 500.0)
+    # Không có ngày công: vẫn được tính (chỉ còn thưởng/phạt) và được liệt kê để cảnh báo
+    assert records["NV2"]["total_salary"] == 200.0
+    assert [record["employee_id"] for record in run.absent] == ["NV2"]
+    assert run.errors == [("NV3", "Mã lương không hợp lệ: abc")]
+    assert "1 nhân viên không có ngày công" in run.summary()
+
+
+def test_payroll_without_attendance_pays_full_salary():
+    run = compute_payroll([employee("NV1")], "2024-03")
+    assert run.records[0]["total_salary"] == 2100000.0
+    assert run.absent == []
+
+
+def test_adjustments_from_csv_are_summed(tmp_path):
+    path = tmp_path / "bonus.csv"
+    path.write_text("employee_id,amount\nNV1,100\n NV1 ,50.5\nNV2,10\n", encoding="utf-8")
+    assert load_adjustments(str(path)) == {"NV1": 150.5, "NV2": 10.0}
+    assert load_adjustments({"NV1": "7"}) == {"NV1": 7.0}
+
+
+def test_select_employees_uses_department_and_position():
+    repository = EmployeeRepository([employee("NV1"), employee("NV2", position="Truong Phong"), employee("NS1", department_id="Nhan Su")])
+    assert [e.employee_id for e in select_employees(repository, "Ke Toan", "Truong Phong")] == ["NV2"]
+    assert [e.employee_id for e in select_employees(repository, position="Nhan Vien")] == ["NV1", "NS1"]
+    assert len(select_employees(repository)) == 3
+
+
+def test_run_payroll_appends_to_salary_history(data_dir, make_employee):
+    directory = data_dir([make_employee("NV1", "An", key=1, salary_id="2100000"), make_employee("NV2", "Binh", key=2, salary_id="2100000")])
+    service = HRService(JsonStorage(directory))
+    service.load()
+    service.check_in([("NV1", datetime(2024, 3, 1, 8))])
+    written = []
+    run = service.run_payroll("2024-03", on_written=written.append)
+    assert written == [run]
+    assert len(service.salary_history) == 2
+    assert service.salary_history.totals("2024-03") == [("2024-03", "Ke Toan", 2, pytest.approx(100000.0))]
+    assert [record["employee_id"] for record in run.absent] == ["NV2"]
+
+    single = service.pay_employee(service.employees.get("NV2"), bonus=50.0, period="2024-03")
+    assert single.records[0]["total_salary"] == 50.0
+    assert len(service.salary_history) == 3
+    service.close()
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from models import Employee
+from repository import EmployeeRepository
+
+
+def employee(employee_id, name, department_id="Ke Toan", dob=datetime(1990, 1, 1), key=None):
+    return Employee(employee_id, department_id, "5000000", name, dob, "Nam", "Kinh", f"ID-{name}", "Ha Noi", "Nhan Vien",
+                    datetime(2024, 1, 1), key)
+
+
+def test_load_assigns_keys_and_indexes():
+    repository = EmployeeRepository([employee("NV1", "An", key=5), employee("NV1", "Binh"), employee("NV2", "Cuong", "Nhan Su")])
+    assert [e.key for e in repository] == [5, 6, 7]
+    assert [e.name for e in repository.find_by("employee_id", "NV1")] == ["An", "Binh"]
+    assert repository.get("NV1").name == "An"
+    assert [e.name for e in repository.find_by_department("Nhan Su")] == ["Cuong"]
+    assert repository.distinct("department_id") == ["Ke Toan", "Nhan Su"]
+
+
+def test_remove_and_replace_keep_order_and_indexes():
+    employees = [employee(f"NV{number}", f"Ten {number}") for number in range(5)]
+    repository = EmployeeRepository(employees)
+    repository.remove(employees[1])
+    repository.remove(employees[3])
+    assert [e.employee_id for e in repository] == ["NV0", "NV2", "NV4"]
+    assert repository.get("NV1") is None
+    assert repository.get_by_key(employees[1].key) is None
+
+    replacement = employee("NV9", "Moi")
+    repository.replace(employees[2], replacement)
+    assert [e.employee_id for e in repository] == ["NV0", "NV9", "NV4"]
+    assert replacement.key == employees[2].key
+    assert repository.get_by_key(replacement.key) is replacement
+    assert repository.get("NV2") is None
+    assert len(repository) == 3
+
+    added = repository.add(employee("NV10", "Sau"))
+    assert list(repository)[-1] is added
+    assert added.key == 6
+
+
+def test_update_and_date_ranges():
+    an = employee("NV1", "An", dob=datetime(1985, 5, 1))
+    binh = employee("NV2", "Binh", dob=datetime(1995, 5, 1))
+    repository = EmployeeRepository([an, binh])
+    assert repository.born_between(datetime(1990, 1, 1)) == [binh]
+    repository.update(an, dob=datetime(1999, 1, 1), department_id="Nhan Su")
+    assert repository.born_between(datetime(1990, 1, 1), datetime(2000, 1, 1)) == [binh, an]
+    assert repository.find_by_department("Ke Toan") == [binh]
+
+    repository.add_many([employee("NV3", "Cuong", dob=datetime(1980, 1, 1)), employee("NV4", "Dung", dob=datetime(1992, 1, 1))])
+    assert [e.name for e in repository.born_between(end=datetime(1993, 1, 1))] == ["Cuong", "Dung"]
+
+
+def test_listeners_receive_events():
+    events = []
+    repository = EmployeeRepository()
+    repository.subscribe(lambda event, item: events.append(event))
+    an = repository.add(employee("NV1", "An"))
+    repository.add_many([employee("NV2", "Binh")])
+    repository.update(an, name="An Moi")
+    repository.remove(an)
+    repository.load([])
+    assert events == ["add", "add_many", "update", "remove", "load"]
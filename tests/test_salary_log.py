@@ -0,0 +1,77 @@
+import json
+import os
+
+from salary_log import SalaryLog
+
+
+def salary_record(employee_id, department_id, total_salary, period):
+    return {"name": f"Ten {employee_id}", "employee_id": employee_id, "department_id": department_id, "salary_id": "5000000",
+            "total_salary": total_salary, "calculation_time": f"{period}-28 10:00:00", "period": period}
+
+
+def append(path, records):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(record) + "\n" for record in records))
+
+
+def test_salary_index_offsets_point_at_lines(tmp_path):
+    path = str(tmp_path / "salary.json")
+    records = [salary_record("NV1", "Ke Toan", 100.0, "2024-03"), salary_record("NV2", "Nhan Su", 200.0, "2024-03"),
+               salary_record("NV1", "Ke Toan", 150.0, "2024-04")]
+    append(path, records)
+    log = SalaryLog(path)
+    assert log.refresh() == 3
+
+    with open(path, "rb") as f:
+        for key, record in enumerate(records):
+            f.seek(log._offsets[key])
+            assert json.loads(f.readline()) == record
+            assert log.get(key) == record
+    assert log.keys(employee_id="NV1") == [0, 2]
+    assert log.keys(month="2024-03", department_id="Nhan Su") == [1]
+    assert log.totals(month="2024-03") == [("2024-03", "Ke Toan", 1, 100.0), ("2024-03", "Nhan Su", 1, 200.0)]
+    log.close()
+
+
+def test_salary_index_is_reused_and_extended(tmp_path):
+    path = str(tmp_path / "salary.json")
+    append(path, [salary_record("NV1", "Ke Toan", 100.0, "2024-03")])
+    log = SalaryLog(path)
+    log.refresh()
+    log.close()
+    assert os.path.exists(path + ".idx")
+
+    append(path, [salary_record("NV2", "Nhan Su", 200.0, "2024-04")])
+    reopened = SalaryLog(path)
+    assert len(reopened) == 1
+    assert reopened.refresh() == 1
+    assert reopened.page(0, month="2024-04")[0]["employee_id"] == "NV2"
+    assert reopened.months() == ["2024-03", "2024-04"]
+    reopened.close()
+
+
+def test_salary_index_waits_for_torn_line_and_rebuilds_after_rewrite(tmp_path):
+    path = str(tmp_path / "salary.json")
+    append(path, [salary_record("NV1", "Ke Toan", 100.0, "2024-03")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"name": "dang ghi')
+    log = SalaryLog(path)
+    assert log.refresh() == 1
+
+    # Tệp bị thay bằng nội dung khác: chỉ mục cũ không còn đúng nên phải dựng lại
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(salary_record("NV9", "Marketing", 300.0, "2024-05")) + "\n")
+    assert log.refresh() == 1
+    assert len(log) == 1
+    assert log.get(0)["employee_id"] == "NV9"
+    assert log.departments() == ["Marketing"]
+    log.close()
+
+
+def test_salary_log_read_only_does_not_write_index(tmp_path):
+    path = str(tmp_path / "salary.json")
+    append(path, [salary_record("NV1", "Ke Toan", 100.0, "2024-03")])
+    log = SalaryLog(path, read_only=True)
+    log.refresh()
+    log.close()
+    assert not os.path.exists(path + ".idx")
@@ -0,0 +1,53 @@
+from search import SearchIndex, employee_search_index, normalize
+
+
+def build_index():
+    index = employee_search_index()
+    index.load([
+        (1, {"name": "Lê Thị Dung", "employee_id": "NS03", "id_number": "456789012", "position": "Truong Phong", "department_id": "Ke Toan"}),
+        (2, {"name": "Nguyễn Văn An", "employee_id": "NS01", "id_number": "123456789", "position": "Nhan Vien", "department_id": "Nhan Su"}),
+        (3, {"name": "Nguyễn Thị Anh", "employee_id": "KT02", "id_number": "987654321", "position": "Nhan Vien", "department_id": "Ke Toan"})
+    ])
+    return index
+
+
+def test_normalize_strips_vietnamese_marks():
+    assert normalize("Lê Thị Đào") == "le thi dao"
+
+
+def test_prefix_match_and_ranking():
+    index = build_index()
+    assert set(index.search("ngu")) == {2, 3}
+    # Khớp chính xác được xếp trước khớp tiền tố
+    assert index.search("an")[0] == 2
+    assert set(index.search("ns0")) == {1, 2}
+    assert index.search("nguyen thi") == [3]
+
+
+def test_fuzzy_match_one_character():
+    index = build_index()
+    assert set(index.search("nguyem")) == {2, 3}
+    assert index.search("dunq") == [1]
+    assert 1 in index.matches("Dugn thi")
+    # Mã số chỉ khớp chính xác hoặc theo tiền tố
+    assert index.search("456789013") == []
+
+
+def test_update_and_remove_keep_index_consistent():
+    index = build_index()
+    index.update(1, {"name": "Tran Van Hung", "employee_id": "NS03", "id_number": "456789012", "position": "", "department_id": ""})
+    assert index.search("le") == []
+    assert index.search("hung") == [1]
+    index.remove(1)
+    assert index.search("hung") == []
+    assert index.search("ns03") == []
+    assert len(index) == 2
+    assert index.document_matches(2, "van an")
+    assert not index.document_matches(2, "dung")
+
+
+def test_add_many_keeps_prefix_search_sorted():
+    index = SearchIndex({"name": 1.0})
+    index.add_many([(1, {"name": "zeta"}), (2, {"name": "alpha"}), (3, {"name": "alphabet"})])
+    assert index.matches("alp") == {2, 3}
+    assert index.matches("zet") == {1}
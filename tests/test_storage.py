@@ -0,0 +1,109 @@
+import json
+import os
+from datetime import datetime
+
+from attendance import AttendanceStore
+from storage import JsonStorage, SqliteStorage, migrate_json_to_sqlite, open_storage
+
+
+def salary_line(employee_id, total_salary, period, calculation_time):
+    return json.dumps({"name": f"Ten {employee_id}", "employee_id": employee_id, "department_id": "Ke Toan", "salary_id": "5000000",
+                       "total_salary": total_salary, "calculation_time": calculation_time, "period": period}) + "\n"
+
+
+def project(project_id, assigned, name="Du an"):
+    return {"project_id": project_id, "name": name, "start_date": "2024-03-01", "end_date": "2024-03-31", "description": "",
+            "status": "", "assigned_employees": assigned}
+
+
+def test_json_projects_round_trip(tmp_path):
+    storage = JsonStorage(str(tmp_path))
+    storage.save_projects([project(1, ["NV1", "NV2"]), project(2, [], "Dự án 2")])
+    assert JsonStorage(str(tmp_path)).load_projects() == [project(1, ["NV1", "NV2"]), project(2, [], "Dự án 2")]
+
+
+def test_sqlite_round_trip_and_incremental_saves(tmp_path, make_employee):
+    path = str(tmp_path / "employees.db")
+    storage = SqliteStorage(path)
+    storage.save_employees([make_employee("NV1", "An", key=1), make_employee("NV2", "Binh", key=2)])
+    storage.delete_employee(2)
+    store = AttendanceStore()
+    store.add("NV1", datetime(2024, 3, 1, 8))
+    storage.save_attendance(store.snapshot())
+    storage.save_projects([project(1, ["NV1"]), project(2, ["NV1", "NV2"])])
+    storage.close()
+
+    storage = SqliteStorage(path)
+    employees, _ = storage.load_employees()
+    assert [employee["employee_id"] for employee in employees] == ["NV1"]
+    store = storage.load_attendance(lambda name: None)
+    assert store.check_ins("NV1") == [datetime(2024, 3, 1, 8)]
+    projects = storage.load_projects()
+    assert [p["assigned_employees"] for p in projects] == [["NV1"], ["NV1", "NV2"]]
+
+    # Sau khi nạp, mỗi lần lưu chỉ ghi phần đổi: chấm công thêm, chấm công cũ chen giữa, xóa
+    store.add("NV1", datetime(2024, 3, 2, 8))
+    store.add("NV3", datetime(2024, 3, 2, 9))
+    storage.save_attendance(store.snapshot())
+    store.add("NV3", datetime(2024, 3, 1, 9))
+    store.remove_employee("NV1")
+    storage.save_attendance(store.snapshot())
+    storage.save_projects([project(2, ["NV2"], "Doi ten"), project(3, ["NV3"])])
+    storage.close()
+
+    storage = SqliteStorage(path)
+    reloaded = storage.load_attendance(lambda name: None)
+    assert reloaded.employee_ids() == ["NV3"]
+    assert reloaded.check_ins("NV3") == [datetime(2024, 3, 1, 9), datetime(2024, 3, 2, 9)]
+    assert storage.load_projects() == [project(2, ["NV2"], "Doi ten"), project(3, ["NV3"])]
+    storage.close()
+
+
+def test_sqlite_import_groups_payroll_runs(data_dir, make_employee):
+    directory = data_dir([make_employee("NV1", "An", key=1), make_employee("NV2", "Binh", key=2)],
+                         {"attendance.json": {"An": ["2024-03-01 08:00:00"]}, "projects.json": [project(1, ["NV2"])]})
+    with open(os.path.join(directory, "salary.json"), "w", encoding="utf-8") as f:
+        f.write(salary_line("NV1", 100.0, "2024-03", "2024-03-31 10:00:00"))
+        f.write(salary_line("NV2", 200.0, "2024-03", "2024-03-31 10:00:00"))
+        f.write(salary_line("NV1", 50.0, "2024-04", "2024-04-30 10:00:00"))
+    migrate_json_to_sqlite(directory)
+
+    storage = SqliteStorage(os.path.join(directory, "employees.db"))
+    assert storage.query("SELECT COUNT(*) FROM payroll_runs")[0][0] == 2
+    history = storage.salary_history()
+    assert history.exists()
+    assert len(history) == 3
+    assert history.totals() == [("2024-03", "Ke Toan", 2, 300.0), ("2024-04", "Ke Toan", 1, 50.0)]
+    assert storage.load_attendance(lambda name: None).count("NV1") == 1
+    assert storage.load_projects()[0]["assigned_employees"] == ["NV2"]
+    storage.close()
+
+
+def test_sqlite_salary_history_exists_only_with_entries(tmp_path):
+    storage = SqliteStorage(str(tmp_path / "employees.db"))
+    history = storage.salary_history()
+    assert not history.exists()
+    storage.append_salary([json.loads(salary_line("NV1", 100.0, "2024-03", "2024-03-31 10:00:00"))], "2024-03")
+    assert history.exists()
+    assert history.page(0, month="2024-03")[0]["total_salary"] == 100.0
+    storage.close()
+
+
+def test_read_only_storage_leaves_directory_untouched(tmp_path, data_dir, make_employee):
+    directory = data_dir([make_employee("NV1", "An", key=1)])
+    with open(os.path.join(directory, "salary.json"), "w", encoding="utf-8") as f:
+        f.write(salary_line("NV1", 100.0, "2024-03", "2024-03-31 10:00:00"))
+    before = sorted(os.listdir(directory))
+
+    storage = open_storage("json", directory, read_only=True)
+    storage.load_employees()
+    storage.activity_log()
+    storage.salary_history().refresh()
+    storage.close()
+    assert sorted(os.listdir(directory)) == before
+
+    missing = str(tmp_path / "missing")
+    storage = open_storage("sqlite", missing, read_only=True)
+    assert storage.load_employees() == ([], [])
+    storage.close()
+    assert not os.path.exists(missing)
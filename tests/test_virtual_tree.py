@@ -0,0 +1,99 @@
+import types
+
+import pytest
+
+import virtual_tree
+from virtual_tree import VirtualTreeview
+
+
+class FakeTree:
+    # Thay cho ttk.Treeview (không cần màn hình): giữ thứ tự iid và giá trị từng hàng
+    def __init__(self, height=5):
+        self.height = height
+        self.rows = []
+        self.values = {}
+        self.selected = ()
+
+    def cget(self, option):
+        return self.height
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def insert(self, parent, index, iid, text, values):
+        self.rows.insert(index, iid)
+        self.values[iid] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.rows.remove(iid)
+            del self.values[iid]
+
+    def move(self, iid, parent, index):
+        self.rows.remove(iid)
+        self.rows.insert(index, iid)
+
+    def item(self, iid, text=None, values=None):
+        self.values[iid] = values
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iids):
+        self.selected = tuple(iids)
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def after_idle(self, callback):
+        pass
+
+
+@pytest.fixture
+def view(monkeypatch):
+    monkeypatch.setattr(virtual_tree, "ttk", types.SimpleNamespace(Style=lambda tree: types.SimpleNamespace(lookup=lambda *args: 20)))
+    return VirtualTreeview(FakeTree(), lambda key, position: ("", (key, position)), buffer=2)
+
+
+def shown(view):
+    return [view.tree.values[iid][0] for iid in view.tree.rows]
+
+
+def test_only_window_is_rendered_and_scrolls(view):
+    view.set_rows(range(100))
+    assert shown(view) == list(range(7))
+    view.yview("moveto", "0.5")
+    assert shown(view) == list(range(50, 57))
+    view.see(3)
+    assert shown(view) == list(range(3, 10))
+    assert view.yview()[0] == pytest.approx(0.03)
+
+
+def test_splice_replaces_blocks_and_keeps_other_selection(view):
+    view.set_rows(["a0", "a1", "b0", "c0", "c1"])
+    view._selected = {"a1", "c1"}
+    # Bỏ khối b, thêm một hàng cho a, thêm khối d ở cuối
+    view.splice([(0, 2, ["a0", "a1", "a2"]), (2, 1, []), (5, 0, ["d0"])])
+    assert view.keys() == ["a0", "a1", "a2", "c0", "c1", "d0"]
+    assert shown(view) == view.keys()
+    assert [position for _, position in (view.tree.values[iid] for iid in view.tree.rows)] == list(range(6))
+    # Hàng thuộc khối bị thay thì bỏ chọn, hàng không đổi vẫn được chọn
+    assert view.selection_keys() == ["c1"]
+    assert view.tree.selection() == (view._bound_iids["c1"],)
+
+
+def test_insert_delete_and_iids_stay_bound(view):
+    view.set_rows(["x", "y"])
+    iid = view._bound_iids["y"]
+    view.insert("w", 0)
+    assert shown(view) == ["w", "x", "y"]
+    assert view._bound_iids["y"] == iid
+    assert view.key_of(iid) == "y"
+    view.delete("x")
+    assert shown(view) == ["w", "y"]
+    assert "x" not in view
+    with pytest.raises(ValueError):
+        view.index("x")
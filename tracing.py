@@ -0,0 +1,163 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Tracer:
+    # Ghi các khoảng thời gian (span) của thao tác giao diện và lưu trữ.
+    # - Trong bộ nhớ: giữ `window` lần đo gần nhất của mỗi tên để tính p50/p95.
+    # - Ra tệp (sau khi open()): định dạng Chrome trace-event, mở bằng chrome://tracing
+    #   hoặc Perfetto. Mỗi sự kiện một dòng, tệp được xoay vòng khi vượt max_bytes.
+    # An toàn khi dùng từ nhiều luồng (luồng giao diện và luồng ghi nền).
+    def __init__(self, window=1000):
+        self.window = window
+        self.path = None
+        self.max_bytes = 0
+        self.backups = 0
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._categories = {}
+        self._file = None
+        self._size = 0
+        self._pending = 0
+        self._threads = set()
+        self._origin = time.perf_counter()
+
+    def open(self, path, max_bytes=5 * 1024 * 1024, backups=3):
+        with self._lock:
+            self._close_file()
+            self.path = path
+            self.max_bytes = max_bytes
+            self.backups = backups
+            self._open_file()
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._pending = 0
+
+    @contextmanager
+    def span(self, name, category="app", **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, started, time.perf_counter(), args)
+
+    def wrap(self, func, name=None, category="app"):
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            with self.span(name, category):
+                return func(*args, **kwargs)
+
+        return traced
+
+    def instrument(self, obj, method_names, prefix, category):
+        # Thay các phương thức của một đối tượng cụ thể bằng bản có đo thời gian
+        for method_name in method_names:
+            method = getattr(obj, method_name, None)
+            if method is not None:
+                setattr(obj, method_name, self.wrap(method, f"{prefix}.{method_name}", category))
+
+    def record(self, name, category, started, finished, args=None):
+        duration = finished - started
+        thread = threading.current_thread()
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.window)
+                self._categories[name] = category
+            durations.append(duration)
+            if self._file is None:
+                return
+            if thread.ident not in self._threads:
+                self._threads.add(thread.ident)
+                self._write({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.ident, "args": {"name": thread.name}})
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((started - self._origin) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": thread.ident
+            }
+            if args:
+                event["args"] = args
+            self._write(event)
+
+    def stats(self):
+        # [(tên, nhóm, số lần, p50, p95, lâu nhất)] tính bằng giây, xếp theo p95 giảm dần
+        with self._lock:
+            snapshot = {name: sorted(durations) for name, durations in self._durations.items()}
+        rows = []
+        for name, durations in snapshot.items():
+            count = len(durations)
+            rows.append((name, self._categories[name], count, percentile(durations, 50), percentile(durations, 95), durations[-1]))
+        rows.sort(key=lambda row: -row[4])
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._durations = {}
+            self._categories = {}
+
+    def _write(self, event):
+        line = json.dumps(event, ensure_ascii=False) + ",\n"
+        self._file.write(line)
+        self._size += len(line)
+        self._pending += 1
+        if self._pending >= 64:
+            self._file.flush()
+            self._pending = 0
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _open_file(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._threads = set()
+        if self._size == 0:
+            # Định dạng mảng JSON của trace-event cho phép thiếu dấu "]" ở cuối
+            self._file.write("[\n")
+            self._size = 2
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._pending = 0
+
+    def _rotate(self):
+        self._close_file()
+        for number in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{number}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{number + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open_file()
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+# Bộ đo dùng chung cho cả ứng dụng; chỉ ghi ra tệp khi được open()
+tracer = Tracer()
@@ -0,0 +1,247 @@
+from tkinter import ttk
+
+from tracing import tracer
+
+
+class VirtualTreeview:
+    # Bảng ảo trên nền ttk.Treeview: chỉ các hàng đang hiển thị (cộng một vùng đệm nhỏ)
+    # mới thực sự được chèn vào widget, phần còn lại được nạp khi cuộn.
+    # row_builder(key, position) trả về (text, values) cho một hàng.
+    # Mỗi khóa được gắn cố định với một iid từ lần hiển thị đầu tiên, nên iid luôn trỏ
+    # đúng bản ghi dù thứ tự hiển thị thay đổi.
+    # Vùng chọn được giữ theo khóa ngay trong bảng (không chỉ trong widget) nên các hàng
+    # đã chọn vẫn được chọn khi cuộn ra khỏi cửa sổ rồi cuộn lại; nhấp chuột hoặc dùng
+    # phím mũi tên không kèm Ctrl/Shift thì chọn lại từ đầu như Treeview thông thường.
+    def __init__(self, tree, row_builder, scrollbar=None, buffer=10):
+        self.tree = tree
+        self.row_builder = row_builder
+        self.scrollbar = scrollbar
+        self.buffer = buffer
+        self.row_height = int(ttk.Style(tree).lookup("Treeview", "rowheight") or 20)
+        self.visible_rows = int(tree.cget("height"))
+
+        self._keys = []
+        self._key_positions = None  # key -> vị trí trong _keys, dựng lại khi cần
+        self._selected = set()
+        self._replace_selection = False
+        self._first = 0
+        self._iids = {}        # key -> iid của các hàng đang được hiển thị
+        self._keys_by_iid = {}
+        self._positions = {}   # iid -> vị trí hiện tại trong widget
+        self._bound_iids = {}  # key -> iid đã gắn cho khóa
+        self._next_iid = 0
+
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+        # Thanh cuộn phản ánh toàn bộ dữ liệu, không phải số hàng đang có trong widget
+        tree.configure(yscrollcommand=lambda first, last: None)
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda event: self._scroll_units(-3))
+        tree.bind("<Button-5>", lambda event: self._scroll_units(3))
+        tree.bind("<Prior>", lambda event: self._scroll_units(-self.visible_rows))
+        tree.bind("<Next>", lambda event: self._scroll_units(self.visible_rows))
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        for sequence in ("<ButtonPress-1>", "<KeyPress-Up>", "<KeyPress-Down>"):
+            tree.bind(sequence, self._on_select_start, add="+")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions_by_key()
+
+    def keys(self):
+        return list(self._keys)
+
+    def index(self, key):
+        position = self._positions_by_key().get(key)
+        if position is None:
+            raise ValueError(f"{key!r} không có trong bảng")
+        return position
+
+    def set_rows(self, keys, keep_position=False):
+        self._keys = list(keys)
+        self._key_positions = None
+        if self._bound_iids or self._selected:
+            present = self._positions_by_key()
+            self._bound_iids = {key: iid for key, iid in self._bound_iids.items() if key in present}
+            self._selected = {key for key in self._selected if key in present}
+        if not keep_position:
+            self._first = 0
+        self._render(refresh=True)
+
+    def insert(self, key, position=None):
+        if position is None:
+            position = len(self._keys)
+        self._keys.insert(position, key)
+        if self._key_positions is not None and position == len(self._keys) - 1:
+            self._key_positions[key] = position
+        else:
+            self._key_positions = None
+        # Hàng mới nằm sau cửa sổ hiển thị thì không cần chạm tới widget
+        if position < self._window_end():
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def splice(self, changes):
+        # Thay nhiều khối hàng liền nhau rồi vẽ lại một lần: changes là các bộ
+        # (vị trí, số hàng bỏ đi, các khóa chèn vào) với vị trí tính trên danh sách hiện tại.
+        # Các khối được thay từ cuối lên để vị trí của khối đứng trước không bị lệch.
+        for position, count, keys in sorted(changes, key=lambda change: change[0], reverse=True):
+            for key in self._keys[position:position + count]:
+                self._bound_iids.pop(key, None)
+                self._selected.discard(key)
+            self._keys[position:position + count] = keys
+        self._key_positions = None
+        self._render(refresh=True)
+
+    def delete(self, key):
+        position = self.index(key)
+        del self._keys[position]
+        self._key_positions = None
+        self._bound_iids.pop(key, None)
+        self._selected.discard(key)
+        if position < self._window_end():
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def refresh(self, key):
+        # Cập nhật đúng một hàng nếu nó đang được hiển thị
+        iid = self._iids.get(key)
+        if iid is not None:
+            text, values = self.row_builder(key, self._first + self._positions[iid])
+            self.tree.item(iid, text=text, values=values)
+
+    def key_of(self, iid):
+        return self._keys_by_iid.get(iid)
+
+    def selection_keys(self, ordered=True):
+        # Các khóa đang chọn (kể cả hàng đã cuộn khỏi cửa sổ), theo thứ tự hiển thị;
+        # ordered=False bỏ bước sắp xếp (không phải dựng bảng vị trí)
+        if not ordered:
+            return list(self._selected)
+        positions = self._positions_by_key()
+        return sorted((key for key in self._selected if key in positions), key=positions.get)
+
+    def clear_selection(self):
+        self._selected = set()
+        self.tree.selection_set(())
+
+    def _positions_by_key(self):
+        if self._key_positions is None:
+            self._key_positions = {key: position for position, key in enumerate(self._keys)}
+        return self._key_positions
+
+    def _on_select_start(self, event):
+        # Bit 0x1 là Shift, 0x4 là Control: không có thì lượt chọn mới thay vùng chọn cũ
+        if not event.state & 0x5:
+            self._replace_selection = True
+            # <<TreeviewSelect>> của lượt này (nếu vùng chọn đổi) được xử lý trước các việc
+            # idle; nếu vùng chọn không đổi thì không có sự kiện nên phải tự bỏ cờ
+            self.tree.after_idle(self._end_select)
+
+    def _end_select(self):
+        self._replace_selection = False
+
+    def _on_select(self, event):
+        # Chỉ các hàng đang hiển thị mới phản ánh thao tác của người dùng; hàng ngoài cửa
+        # sổ giữ nguyên trạng thái chọn trừ khi đây là một lượt chọn mới
+        selected = {self._keys_by_iid[iid] for iid in self.tree.selection() if iid in self._keys_by_iid}
+        if self._replace_selection:
+            self._replace_selection = False
+            self._selected = selected
+            return
+        self._selected.difference_update(key for key in self._iids if key not in selected)
+        self._selected.update(selected)
+
+    def see(self, key):
+        position = self.index(key)
+        if not self._first <= position < self._first + self.visible_rows:
+            self._first = position
+            self._render()
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self._first = int(float(args[1]) * len(self._keys))
+            self._render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows
+            self._scroll_units(amount)
+
+    def _scroll_units(self, amount):
+        self._first += amount
+        self._render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll_units(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event):
+        visible_rows = max(1, event.height // self.row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._render()
+
+    def _window_end(self):
+        return self._first + self.visible_rows + self.buffer
+
+    def _render(self, refresh=False):
+        with tracer.span("tree.render", "tree", rows=len(self._keys)):
+            self._render_window(refresh)
+
+    def _render_window(self, refresh):
+        self._first = max(0, min(self._first, len(self._keys) - self.visible_rows))
+        wanted = self._keys[self._first:self._window_end()]
+        wanted_set = set(wanted)
+
+        stale = [key for key in self._iids if key not in wanted_set]
+        if stale:
+            iids = [self._iids.pop(key) for key in stale]
+            for iid in iids:
+                del self._keys_by_iid[iid]
+                del self._positions[iid]
+            self.tree.delete(*iids)
+
+        # Chỉ chèn/di chuyển những hàng thay đổi vị trí trong cửa sổ
+        for index, key in enumerate(wanted):
+            iid = self._iids.get(key)
+            if iid is None:
+                text, values = self.row_builder(key, self._first + index)
+                iid = self._bound_iids.get(key)
+                if iid is None:
+                    iid = self._bound_iids[key] = f"v{self._next_iid}"
+                    self._next_iid += 1
+                self.tree.insert("", index, iid=iid, text=text, values=values)
+                self._iids[key] = iid
+                self._keys_by_iid[iid] = key
+            elif refresh or self._positions[iid] != index:
+                text, values = self.row_builder(key, self._first + index)
+                self.tree.move(iid, "", index)
+                self.tree.item(iid, text=text, values=values)
+            self._positions[iid] = index
+
+        # Chọn lại các hàng đã chọn vừa quay lại cửa sổ
+        selection = [self._iids[key] for key in wanted if key in self._selected]
+        if set(selection) != set(self.tree.selection()):
+            self.tree.selection_set(selection)
+
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def _fractions(self):
+        total = len(self._keys)
+        if not total:
+            return 0.0, 1.0
+        return self._first / total, min(1.0, (self._first + self.visible_rows) / total)
+
+    def _update_scrollbar(self):
+        if self.scrollbar is not None:
+            self.scrollbar.set(*self._fractions())
+